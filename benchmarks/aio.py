@@ -0,0 +1,113 @@
+"""Compares the throughput of the asyncio ingest (:mod:`liveserial.aio`) with
+that of the monitor threads for the same busy ports. The writers run in a
+separate process so that they don't compete with the readers for the GIL.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from common import pty_pair, sample_lines, write_process, report
+
+def _monitors(nports):
+    """Returns the pty masters and unstarted monitors for `nports` ports that
+    share a data queue.
+    """
+    from liveserial.config import Sensor
+    from liveserial.monitor import ComMonitorThread, create_queue
+    dataq, errorq = create_queue(), create_queue()
+    masters, coms = [], []
+    for i in range(nports):
+        master, name = pty_pair()
+        masters.append(master)
+        com = ComMonitorThread(dataq, errorq, name, 115200, port_timeout=0.01)
+        for key in ("W", "K"):
+            com.add_sensor(key, Sensor(com, key, key=key))
+        coms.append(com)
+    return masters, coms
+
+def bench_threads(nports, nlines, timeout=120.):
+    """Returns the aggregate lines/s read by a monitor thread per port."""
+    import os
+    from time import time, sleep
+    from liveserial.monitor import get_item_from_queue
+    masters, coms = _monitors(nports)
+    for com in coms:
+        com.start()
+    sleep(0.2)
+    writer = write_process(masters, sample_lines(nlines, sensors=("W", "K")))
+    expected, received = nports*nlines, 0
+    start = time()
+    writer.start()
+    while received < expected and time() - start < timeout:
+        batch = get_item_from_queue(coms[0].data_q, 1.)
+        if batch is not None:
+            received += len(batch)
+    elapsed = time() - start
+    writer.join()
+    for com in coms:
+        com.join(1)
+    for m in masters:
+        os.close(m)
+    return report("{} x threads".format(nports), received, elapsed)
+
+def bench_async(nports, nlines, timeout=120.):
+    """Returns the aggregate lines/s read by :class:`AsyncMonitor` instances
+    sharing one event loop.
+    """
+    import os, asyncio
+    from time import time
+    from liveserial.aio import AsyncMonitor
+    masters, coms = _monitors(nports)
+    ports = [AsyncMonitor(com) for com in coms]
+    expected = nports*nlines
+    counts = [0]
+
+    async def consume(port):
+        async for batch in port:
+            counts[0] += len(batch)
+            if counts[0] >= expected:
+                break
+
+    async def main():
+        for port in ports:
+            port.open()
+        writer = write_process(masters, sample_lines(nlines, sensors=("W", "K")))
+        start = time()
+        writer.start()
+        tasks = [asyncio.ensure_future(consume(p)) for p in ports]
+        done, pending = await asyncio.wait(tasks, timeout=timeout,
+                                           return_when=asyncio.FIRST_COMPLETED)
+        elapsed = time() - start
+        for t in pending:
+            t.cancel()
+        for port in ports:
+            port.close()
+        writer.join()
+        return elapsed
+
+    loop = asyncio.new_event_loop()
+    try:
+        elapsed = loop.run_until_complete(main())
+    finally:
+        loop.close()
+    for m in masters:
+        os.close(m)
+    return report("{} x asyncio".format(nports), counts[0], elapsed)
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-lines", type=int, default=50000,
+                        help="Number of lines to write to *each* port.")
+    parser.add_argument("-ports", type=int, nargs="+", default=[1, 4, 16],
+                        help="Numbers of simultaneously busy ports to test.")
+    parser.add_argument("-repeat", type=int, default=3,
+                        help=("Number of times to repeat each measurement; "
+                              "the best rate is compared."))
+    args = parser.parse_args()
+    for nports in args.ports:
+        threaded, aio = 0., 0.
+        for i in range(args.repeat):
+            threaded = max(threaded, bench_threads(nports, args.lines))
+            aio = max(aio, bench_async(nports, args.lines))
+        print("  asyncio/threads best aggregate rate: {:.2f}x".format(
+            aio/threaded))
@@ -0,0 +1,86 @@
+"""Helpers shared by the benchmark scripts: pseudo-terminal pairs that stand in
+for serial ports and generators for realistic sensor lines.
+"""
+import threading
+
+def pty_pair():
+    """Opens a raw pseudo-terminal pair.
+
+    Returns:
+        tuple: `(master, name)` where `master` is the file descriptor to write
+        to and `name` is the device path that a :class:`serial.Serial` can
+        open to read the data.
+    """
+    import os, pty, tty
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    tty.setraw(master)
+    return master, os.ttyname(slave)
+
+def sample_lines(nlines, sensors=("W", "K", None), seed=42):
+    """Returns a block of random sensor lines in the same format as
+    :class:`liveserial.simulator.ComSimulatorThread` writes them.
+
+    Args:
+        nlines (int): number of lines to generate.
+        sensors (tuple): of sensor keys to choose between; `None` writes a line
+          without a key.
+        seed (int): random seed so the data is reproducible.
+    """
+    import random
+    random.seed(seed)
+    lines = []
+    for i in range(nlines):
+        sensor = sensors[i % len(sensors)]
+        raw = [] if sensor is None else [sensor]
+        raw.append(random.randint(0, 100))
+        raw.append(random.randint(-1, 1) + random.random())
+        lines.append(' '.join(map(str, raw)))
+    return ('\n'.join(lines) + '\n').encode("ascii")
+
+class PtyWriter(threading.Thread):
+    """Writes a block of bytes to the master end of a pseudo-terminal as fast as
+    the reader on the other end will accept them.
+
+    Args:
+        master (int): file descriptor of the master end of the pty.
+        data (bytes): everything that should be written.
+        chunk (int): number of bytes to write per call.
+    """
+    def __init__(self, master, data, chunk=4096):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.master = master
+        self.data = data
+        self.chunk = chunk
+
+    def run(self):
+        import os
+        view = memoryview(self.data)
+        while len(view) > 0:
+            n = os.write(self.master, view[:self.chunk])
+            view = view[n:]
+
+def _write_all(masters, data):
+    """Writes `data` to each of the pty masters concurrently."""
+    writers = [PtyWriter(m, data) for m in masters]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+
+def write_process(masters, data):
+    """Returns an unstarted process that writes `data` to each of the pty
+    masters, so that the writers don't compete with the readers for the GIL.
+    """
+    import multiprocessing
+    context = multiprocessing.get_context("fork")
+    return context.Process(target=_write_all, args=(masters, data))
+
+def report(label, count, elapsed, unit="lines"):
+    """Prints a single line of benchmark results.
+    """
+    rate = count/elapsed if elapsed > 0 else float("inf")
+    print("{0:<32s} {1:>9d} {2} in {3:7.3f}s -> {4:12,.0f} {2}/s".format(
+        label, count, unit, elapsed, rate))
+    return rate
@@ -0,0 +1,62 @@
+"""Compares the per-line `readline` loop with the chunked reads and
+:class:`liveserial.framing.LineFramer` used by the monitor threads. Both readers
+consume the same block of lines from a pseudo-terminal pair.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from common import pty_pair, sample_lines, PtyWriter, report
+
+def _serial(name, baud):
+    from serial import Serial
+    return Serial(name, baud, timeout=0.01)
+
+def bench_readline(nlines, baud):
+    """Reads `nlines` using one `readline` call per line."""
+    from time import time
+    master, name = pty_pair()
+    port = _serial(name, baud)
+    writer = PtyWriter(master, sample_lines(nlines))
+    count = 0
+    start = time()
+    writer.start()
+    while count < nlines:
+        line = port.readline()
+        if len(line) > 0:
+            count += 1
+    elapsed = time() - start
+    port.close()
+    return report("readline", count, elapsed)
+
+def bench_framer(nlines, baud):
+    """Reads `nlines` using bulk reads of everything waiting on the port."""
+    from time import time
+    from liveserial.framing import LineFramer
+    master, name = pty_pair()
+    port = _serial(name, baud)
+    writer = PtyWriter(master, sample_lines(nlines))
+    framer = LineFramer()
+    count = 0
+    start = time()
+    writer.start()
+    while count < nlines:
+        data = port.read(port.in_waiting or 1)
+        waiting = port.in_waiting
+        if waiting > 0:
+            data += port.read(waiting)
+        count += len(framer.feed(data))
+    elapsed = time() - start
+    port.close()
+    return report("chunked + LineFramer", count, elapsed)
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-lines", type=int, default=100000,
+                        help="Number of lines to push through the pty.")
+    parser.add_argument("-baudrate", type=int, default=921600,
+                        help="Nominal baud rate for the serial instance.")
+    args = parser.parse_args()
+    before = bench_readline(args.lines, args.baudrate)
+    after = bench_framer(args.lines, args.baudrate)
+    print("speedup: {:.1f}x".format(after/before))
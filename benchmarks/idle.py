@@ -0,0 +1,98 @@
+"""Measures the CPU used while monitoring idle ports with a polling thread per
+port versus a single :class:`liveserial.multiplex.Multiplexer`, and the
+throughput of each when the same ports are busy.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from common import pty_pair, sample_lines, write_process, report
+
+def _monitors(nports):
+    """Returns the pty masters and unstarted monitors for `nports` ports that
+    share a data queue.
+    """
+    from liveserial.config import Sensor
+    from liveserial.monitor import ComMonitorThread, create_queue
+    dataq, errorq = create_queue(), create_queue()
+    masters, coms = [], []
+    for i in range(nports):
+        master, name = pty_pair()
+        masters.append(master)
+        com = ComMonitorThread(dataq, errorq, name, 115200, port_timeout=0.01)
+        for key in ("W", "K"):
+            com.add_sensor(key, Sensor(com, key, key=key))
+        coms.append(com)
+    return masters, coms
+
+def _readers(coms, multiplex):
+    """Returns the threads that read the ports of `coms`."""
+    if multiplex:
+        from liveserial.multiplex import Multiplexer
+        return [Multiplexer(coms)]
+    return coms
+
+def bench_idle(nports, multiplex, seconds):
+    """Returns the CPU seconds used per wall second while no data arrives."""
+    import os
+    from time import process_time, sleep
+    masters, coms = _monitors(nports)
+    readers = _readers(coms, multiplex)
+    for r in readers:
+        r.start()
+    sleep(0.2)
+    cpu = process_time()
+    sleep(seconds)
+    cpu = process_time() - cpu
+    for r in readers:
+        r.join(1)
+    for m in masters:
+        os.close(m)
+    return cpu/seconds
+
+def bench_busy(nports, multiplex, nlines, timeout=120.):
+    """Returns the aggregate lines/s read from `nports` busy ports."""
+    import os
+    from time import time, sleep
+    from liveserial.monitor import get_item_from_queue
+    masters, coms = _monitors(nports)
+    readers = _readers(coms, multiplex)
+    for r in readers:
+        r.start()
+    sleep(0.2)
+    data = sample_lines(nlines, sensors=("W", "K"))
+    writer = write_process(masters, data)
+    expected, received = nports*nlines, 0
+    start = time()
+    writer.start()
+    while received < expected and time() - start < timeout:
+        #Block on the queue so that the consumer doesn't spin and steal
+        #the GIL from the readers.
+        batch = get_item_from_queue(coms[0].data_q, 1.)
+        if batch is not None:
+            received += len(batch)
+    elapsed = time() - start
+    writer.join()
+    for r in readers:
+        r.join(1)
+    for m in masters:
+        os.close(m)
+    kind = "multiplexer" if multiplex else "threads"
+    return report("{} x {}".format(nports, kind), received, elapsed)
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-ports", type=int, nargs="+", default=[1, 8, 64],
+                        help="Numbers of ports to monitor.")
+    parser.add_argument("-seconds", type=float, default=2.,
+                        help="Number of seconds to measure idle CPU for.")
+    parser.add_argument("-lines", type=int, default=20000,
+                        help="Number of lines to write to *each* busy port.")
+    args = parser.parse_args()
+    for nports in args.ports:
+        idle = dict((m, bench_idle(nports, m, args.seconds))
+                    for m in (False, True))
+        print("{} idle ports: threads {:.1%} CPU, multiplexer {:.1%} CPU".format(
+            nports, idle[False], idle[True]))
+        for multiplex in (False, True):
+            bench_busy(nports, multiplex, args.lines)
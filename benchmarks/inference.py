@@ -0,0 +1,56 @@
+"""Micro-benchmark for the steady-state, per-line cost of parsing an inferred
+stream with :class:`liveserial.monitor.FormatInferrer` as the number of sensors
+on the port grows. The scan over all the known keys that the inferrer used
+before is reproduced here so that it can be compared with the dispatch on the
+key token.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from parsing import bench
+
+def legacy_parse(inferrer, raw):
+    """Parsing as it was done by `FormatInferrer.parse`, walking all the keys.
+    """
+    for k, v in inferrer._infer_keys.items():
+        if v is None or v >= len(raw):
+            continue
+        if raw[v] == inferrer._tokens[k]:
+            return (inferrer._parsers[k](raw), k)
+    if None in inferrer._parsers:
+        return (inferrer._parsers[None](raw), None)
+    return (None, None)
+
+def inferrer(nsensors, lines):
+    """Returns an inferrer that has learned the formats of all `nsensors`; most
+    of them are adopted after the initial inferrence.
+    """
+    from liveserial.monitor import FormatInferrer
+    result = FormatInferrer(15, "ascii")
+    for raw in lines[:nsensors*(FormatInferrer.promote_limit + 1)*4 + 15]:
+        result.parse(raw)
+    assert len(result.inferred) == nsensors
+    result._tokens = dict((k, k.encode("ascii")) for k in result.inferred)
+    return result
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-lines", type=int, default=100000,
+                        help="Number of split lines to parse per repeat.")
+    parser.add_argument("-sensors", type=int, nargs="+", default=[1, 8, 64],
+                        help="Numbers of sensors on the port.")
+    parser.add_argument("-repeat", type=int, default=5,
+                        help="Number of repeats; the best one is reported.")
+    args = parser.parse_args()
+
+    for nsensors in args.sensors:
+        keys = ["S{}".format(i).encode("ascii") for i in range(nsensors)]
+        lines = [[keys[i % nsensors], str(i).encode("ascii"), b"0.5"]
+                 for i in range(args.lines)]
+        fi = inferrer(nsensors, lines)
+        print("{} sensors".format(nsensors))
+        before = bench("  key scan", lambda r: legacy_parse(fi, r), lines,
+                       args.repeat)
+        after = bench("  token dispatch", fi.parse, lines, args.repeat)
+        print("  speedup: {:.2f}x".format(before/after))
@@ -0,0 +1,94 @@
+"""Micro-benchmark for the per-line parsing cost of a configured
+:class:`liveserial.config.Sensor`. The generic, per-field casting loop that the
+sensors used before is reproduced here so that it can be compared with the
+parsers generated by :func:`liveserial.config.compile_parser`, with and without
+a projection onto the one column that is logged and plotted. The whole-line
+cost (split plus parse) is also compared between the decode/regex path and the
+bytes-native path of :class:`liveserial.monitor.ComMonitorThread`.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+
+def legacy_parse(sensor, raw):
+    """Generic parsing as it was done by `Sensor.parse` and `Sensor._cast`."""
+    result = None
+    if sensor._keyloc is not None:
+        if raw[sensor._keyloc] == sensor.key:
+            if len(raw) != len(sensor.dtype) + 1:
+                return
+            try:
+                vals = []
+                for iv, v in enumerate(raw):
+                    if iv != sensor._keyloc:
+                        vals.append(sensor.dtype[len(vals)](v))
+                result = vals
+            except ValueError:
+                result = None
+    return result
+
+def bench(label, func, lines, repeat):
+    """Returns the median time per line (in ns) of `repeat` runs of `func` over
+    `lines`; the best time is printed as well.
+    """
+    from timeit import repeat as trepeat
+    times = sorted(trepeat(lambda: [func(l) for l in lines], number=1,
+                           repeat=repeat))
+    mid = len(times)//2
+    median = times[mid] if len(times) % 2 else (times[mid-1] + times[mid])/2
+    perline = median*1e9/len(lines)
+    print("{0:<24s} {1:8.1f} ns/line (best {2:.1f})".format(
+        label, perline, times[0]*1e9/len(lines)))
+    return perline
+
+def monitor(delimiter, sensor):
+    """Returns a monitor (which is never started) that parses lines for
+    `sensor` using the specified delimiter.
+    """
+    from liveserial.monitor import ComMonitorThread, create_queue
+    com = ComMonitorThread(create_queue(), create_queue(), "bench", 9600,
+                           delimiter=delimiter)
+    com.add_sensor(sensor.name, sensor)
+    return com
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-lines", type=int, default=100000,
+                        help="Number of split lines to parse per repeat.")
+    parser.add_argument("-columns", type=int, default=3,
+                        help="Number of value columns after the key.")
+    parser.add_argument("-repeat", type=int, default=5,
+                        help=("Number of repeats; the median one is "
+                              "reported."))
+    args = parser.parse_args()
+
+    from liveserial.config import Sensor
+    dtype = ["key"] + ["int", "float"]*(args.columns//2) + ["int"]*(args.columns%2)
+    sensor = Sensor(None, "W", key="W", dtype=','.join(dtype), port="bench")
+    line = ["W"] + [str(i) if c == "int" else str(i + 0.5)
+                    for i, c in enumerate(dtype[1:])]
+    lines = [list(line) for i in range(args.lines)]
+    print("{} lines of {} values; median of {} repeats.".format(
+        args.lines, args.columns, args.repeat))
+
+    before = bench("generic loop", lambda r: legacy_parse(sensor, r),
+                   lines, args.repeat)
+    after = bench("compiled parser", sensor.parse, lines, args.repeat)
+    print("speedup: {:.2f}x".format(before/after))
+
+    #Only the plotted/logged column is cast when the config limits them.
+    projected = Sensor(None, "W", key="W", dtype=','.join(dtype), port="bench",
+                       logging="1", value_index="1")
+    after = bench("projected parser", projected.parse, lines, args.repeat)
+    print("speedup: {:.2f}x".format(before/after))
+
+    #For the whole line, `[\s]` is the same delimiter as the default, but it
+    #is not in the list of simple ones so it takes the regex path.
+    rawlines = [' '.join(line).encode("ascii")]*args.lines
+    regex = monitor(r"[\s]", sensor)
+    native = monitor(r"\s", sensor)
+    before = bench("decode + regex split", regex._parse_line, rawlines,
+                   args.repeat)
+    after = bench("bytes split", native._parse_line, rawlines, args.repeat)
+    print("speedup: {:.2f}x".format(before/after))
@@ -0,0 +1,69 @@
+"""Measures the aggregate number of lines/s that are read, parsed and delivered to
+the logger's queue as the number of busy ports grows, with each port monitored
+either on a thread or in its own process (see
+:class:`liveserial.monitor.ComMonitorProcess`). The writers run in a separate
+process so that they don't compete with the monitors for the GIL.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from common import pty_pair, sample_lines, write_process, report
+
+def bench_ports(nports, process, nlines, timeout=120.):
+    """Monitors `nports` pseudo-terminals that each receive `nlines` lines and
+    returns the aggregate rate at which the records reach the consumer.
+    """
+    from time import time
+    from liveserial.config import Sensor
+    from liveserial.monitor import (monitor_class, create_queue,
+                                    get_item_from_queue)
+    CM = monitor_class(process)
+    dataq, errorq = create_queue(CM.transport), create_queue(CM.transport)
+    data = sample_lines(nlines, sensors=("W", "K"))
+    masters, coms = [], []
+    for i in range(nports):
+        master, name = pty_pair()
+        masters.append(master)
+        com = CM(dataq, errorq, name, 115200, port_timeout=0.01)
+        for key in ("W", "K"):
+            com.add_sensor(key, Sensor(com, key, key=key))
+        coms.append(com)
+
+    for com in coms:
+        com.start()
+    #Give the monitors a moment to open their ports before the data arrives.
+    coms[0].join(0.2, terminate=False)
+
+    writer = write_process(masters, data)
+    expected = nports*nlines
+    received = 0
+    start = time()
+    writer.start()
+    while received < expected and time() - start < timeout:
+        #Block on the queue so that the consumer doesn't spin and steal
+        #the GIL from the readers.
+        batch = get_item_from_queue(dataq, 1.)
+        if batch is not None:
+            received += len(batch)
+    elapsed = time() - start
+
+    writer.join()
+    for com in coms:
+        com.join(1)
+    kind = "process" if process else "thread"
+    return report("{} x {}".format(nports, kind), received, elapsed)
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-lines", type=int, default=100000,
+                        help="Number of lines to write to *each* port.")
+    parser.add_argument("-ports", type=int, nargs="+", default=[1, 2, 4],
+                        help="Numbers of simultaneously busy ports to test.")
+    args = parser.parse_args()
+    for nports in args.ports:
+        rates = {}
+        for process in (False, True):
+            rates[process] = bench_ports(nports, process, args.lines)
+        print("  process/thread aggregate rate: {:.2f}x".format(
+            rates[True]/rates[False]))
@@ -0,0 +1,87 @@
+"""Compares carrying records from a monitor process to the logger through a
+pickled :class:`multiprocessing.Queue` with a shared-memory ring
+(:class:`liveserial.ring.SharedRing`). The consumer groups the records by sensor
+into rows, as :meth:`liveserial.log.Logger._read_serial` does; its CPU time is
+reported per 100k records.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from common import report
+
+layouts = [("W", [int, float]), ("K", [int, float])]
+"""list: of `(sensor, dtype)` for the records that are published."""
+
+def _produce(q, nrecords, batch):
+    """Publishes `nrecords` in batches; runs in the producer process."""
+    import random
+    random.seed(42)
+    records = [(layouts[i % 2][0], i*1000000, random.randint(0, 100),
+                random.random()) for i in range(batch)]
+    for i in range(0, nrecords, batch):
+        q.put(records[:min(batch, nrecords - i)])
+
+def _consume_queue(q, nrecords, sensedata):
+    """Drains the pickled queue until `nrecords` have been grouped."""
+    from liveserial.monitor import get_item_from_queue
+    received = 0
+    while received < nrecords:
+        batch = get_item_from_queue(q, 1.)
+        if batch is None:
+            continue
+        for record in batch:
+            sensedata.setdefault(record[0], []).append(record[1:])
+        received += len(batch)
+    return received
+
+def _consume_ring(ring, nrecords, sensedata):
+    """Drains the ring until `nrecords` have been grouped."""
+    from time import sleep
+    received = 0
+    while received < nrecords:
+        if ring.empty():
+            sleep(0.001)
+            continue
+        for sensor, records in ring.drain():
+            rows = records.tolist()
+            sensedata.setdefault(sensor, []).extend(rows)
+            received += len(rows)
+    return received
+
+def bench(kind, nrecords, batch):
+    """Returns the consumer's CPU seconds per 100k records for one transport."""
+    import multiprocessing
+    from time import process_time, time
+    if kind == "ring":
+        from liveserial.ring import SharedRing
+        q = SharedRing(layouts, capacity=max(65536, 4*batch))
+        consume = _consume_ring
+    else:
+        q = multiprocessing.Queue()
+        consume = _consume_queue
+
+    producer = multiprocessing.Process(target=_produce, args=(q, nrecords, batch))
+    sensedata = {}
+    cpu, wall = process_time(), time()
+    producer.start()
+    received = consume(q, nrecords, sensedata)
+    cpu, wall = process_time() - cpu, time() - wall
+    producer.join()
+    if kind == "ring":
+        assert q.dropped == 0, "The ring overflowed; increase its capacity."
+        q.close()
+    report("{} (batch={})".format(kind, batch), received, wall, "records")
+    return cpu*100000./nrecords
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-records", type=int, default=500000,
+                        help="Number of records to carry through each transport.")
+    parser.add_argument("-batch", type=int, nargs="+", default=[10, 200],
+                        help="Number of records in each batch that is put.")
+    args = parser.parse_args()
+    for batch in args.batch:
+        cpu = dict((k, bench(k, args.records, batch)) for k in ("queue", "ring"))
+        print("  consumer CPU per 100k records: queue {:.3f}s, ring {:.3f}s".format(
+            cpu["queue"], cpu["ring"]))
@@ -0,0 +1,60 @@
+"""Measures the CPU time needed to move records from a producer thread to a
+consumer through each of the queue transports in
+:data:`liveserial.monitor.transports`. The numbers are reported per 100k
+records so that they can be compared directly.
+"""
+import sys
+from os import path
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), ".."))
+from common import report
+
+def _records(nrecords, batch):
+    """Returns the batches of records that the producer will publish."""
+    record = ("W", 0.125, 42, 0.75)
+    batches = []
+    for i in range(0, nrecords, batch):
+        batches.append([record]*min(batch, nrecords - i))
+    return batches
+
+def bench_transport(transport, nrecords, batch):
+    """Pushes `nrecords` through a queue of the given transport and returns the
+    process CPU time (all threads, including any queue feeder thread) that was
+    used.
+    """
+    import threading
+    from time import process_time, time
+    from liveserial.monitor import create_queue, get_all_from_queue
+    q = create_queue(transport)
+    batches = _records(nrecords, batch)
+    def produce():
+        for b in batches:
+            q.put(b)
+    producer = threading.Thread(target=produce)
+
+    received = 0
+    cpu, wall = process_time(), time()
+    producer.start()
+    while received < nrecords:
+        for b in get_all_from_queue(q):
+            received += len(b)
+    producer.join()
+    cpu, wall = process_time() - cpu, time() - wall
+    label = "{} (batch={})".format(transport, batch)
+    report(label, received, wall, "records")
+    return cpu*100000./nrecords
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-records", type=int, default=100000,
+                        help="Number of records to move through each queue.")
+    parser.add_argument("-batch", type=int, nargs="+", default=[1, 50],
+                        help="Number of records in each batch put on the queue.")
+    args = parser.parse_args()
+    for batch in args.batch:
+        cpu = {}
+        for transport in ("process", "thread"):
+            cpu[transport] = bench_transport(transport, args.records, batch)
+        print("  CPU per 100k records: process {:.3f}s, thread {:.3f}s; "
+              "saved {:.3f}s".format(cpu["process"], cpu["thread"],
+                                     cpu["process"] - cpu["thread"]))
@@ -0,0 +1,233 @@
+"""Asyncio counterparts of the monitor threads and the logger timer, for
+embedding live-serial in services that already run an event loop. The serial
+ports are read with :meth:`asyncio.AbstractEventLoop.add_reader` on their
+non-blocking file descriptors, so no threads or queues are involved; the
+framing and parsing is done by the same
+:class:`~liveserial.monitor.ComMonitorThread` (and
+:class:`~liveserial.config.Sensor`) code as for the threaded monitors.
+
+.. note:: this module needs python 3.5 or later and an event loop that supports
+   :meth:`~asyncio.AbstractEventLoop.add_reader` (i.e., not the proactor loop
+   on Windows).
+
+Example:
+
+    >>> async def main():
+    ...     async with AsyncMonitor.from_config("sensors.cfg", "/dev/ttyUSB0") as port:
+    ...         async for batch in port:
+    ...             for sensor, timestamp, *values in batch:
+    ...                 print(sensor, timestamp, values)
+"""
+import asyncio
+from collections import deque
+from liveserial import msg
+class AsyncMonitor(object):
+    """Asynchronous iterator over the batches of records parsed from a single
+    serial port. Each batch is a list of `(sensor, timestamp, values...)`
+    tuples, exactly as the threaded monitors put them on their data queue.
+
+    Args:
+        monitor (liveserial.monitor.ComMonitorThread): configured monitor that
+          frames and parses the port's data; it is never started itself.
+        maxsize (int): number of batches that can be waiting for the consumer
+          before the port stops being read; reading resumes once the consumer
+          catches up, so a slow consumer applies back-pressure instead of
+          growing the buffer without bounds.
+
+    Attributes:
+        monitor (liveserial.monitor.ComMonitorThread): monitor that parses the
+          data.
+        loop (asyncio.AbstractEventLoop): event loop that the port is read on
+          once it is opened.
+    """
+    chunksize = 65536
+    """int: maximum number of bytes to read from the port at a time.
+    """
+    def __init__(self, monitor, maxsize=64):
+        self.monitor = monitor
+        self.maxsize = maxsize
+        self.loop = None
+        self._fd = None
+        """int: file descriptor of the open port; `None` when it isn't being
+        read.
+        """
+        self._batches = deque()
+        """collections.deque: batches (or exceptions) waiting for the consumer.
+        """
+        self._waiter = None
+        """asyncio.Future: resolved when a batch arrives for a waiting consumer.
+        """
+        self._paused = False
+
+    @classmethod
+    def from_config(cls, config, port, sfilter=None, maxsize=64):
+        """Returns an asynchronous monitor for the specified port using the
+        sensor and port configuration (see
+        :meth:`liveserial.monitor.ComMonitor.from_config`).
+
+        Args:
+            config (ConfigParser): instance from which to extract the sensor list
+              and port information. `str` is also allowed, in which case it
+              should be the path to the config file to load.
+            port (str): name of the port to configure for.
+            sfilter (list): of sensor names that should be *included*. By
+              default, all sensors in the config that match the port are.
+            maxsize (int): see :class:`AsyncMonitor`.
+        """
+        from liveserial.monitor import ComMonitorThread, create_queue
+        monitor = ComMonitorThread.from_config(config, port, create_queue(),
+                                               create_queue(), sfilter=sfilter)
+        return cls(monitor, maxsize)
+
+    @classmethod
+    def from_port(cls, port, port_baud=9600, virtual=False, maxsize=64):
+        """Returns an asynchronous monitor for the specified port that infers
+        the structure of the data (see
+        :meth:`liveserial.monitor.ComMonitor.from_port`).
+        """
+        from liveserial.monitor import ComMonitorThread
+        return cls(ComMonitorThread.from_port(port, port_baud, virtual), maxsize)
+
+    def open(self, loop=None):
+        """Opens the serial port and starts reading it on the event loop.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): loop to read the port on; defaults
+              to the current event loop.
+
+        Raises:
+            serial.SerialException: if the port can't be opened.
+        """
+        import serial
+        from liveserial.monitor import get_item_from_queue
+        self.loop = asyncio.get_event_loop() if loop is None else loop
+        #The loop tells us when bytes are waiting, so the reads never block.
+        self.monitor.serial_arg["timeout"] = 0
+        if not self.monitor._open(): # pragma: no cover
+            raise serial.SerialException(get_item_from_queue(self.monitor.error_q))
+        self._fd = self.monitor.serial_port.fileno()
+        self._resume()
+
+    def close(self):
+        """Stops reading and closes the serial port. Batches that were already
+        parsed can still be consumed; the iteration ends after them.
+        """
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self._fd = None
+        if self.monitor.serial_port:
+            self.monitor.serial_port.close()
+        self._wake()
+
+    def _resume(self):
+        """Registers the port's file descriptor with the event loop."""
+        self._paused = False
+        self.loop.add_reader(self._fd, self._readable)
+
+    def _wake(self):
+        """Wakes up a consumer that is waiting for the next batch."""
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def _fail(self, error): # pragma: no cover
+        """Stops reading the port and hands the error to the consumer."""
+        msg.err("{}: {}".format(self.monitor.port, error))
+        self._batches.append(error)
+        self.close()
+
+    def _readable(self):
+        """Reads and parses whatever is waiting on the port; called by the event
+        loop when the file descriptor is readable.
+        """
+        import os, serial
+        from liveserial.monitor import clock_ns
+        #Serial ports hand out a few kB per read; we keep reading until the descriptor
+        #would block (or the chunk is big enough) so that the per-chunk
+        #overhead of the event loop is paid less often.
+        chunk = b""
+        try:
+            while len(chunk) < self.chunksize:
+                data = os.read(self._fd, self.chunksize - len(chunk))
+                if len(data) == 0: # pragma: no cover
+                    break
+                chunk += data
+        except BlockingIOError:
+            pass
+        except OSError as e: # pragma: no cover
+            if len(chunk) == 0:
+                self._fail(serial.SerialException(e.strerror))
+                return
+        if len(chunk) == 0: # pragma: no cover
+            #Usually, the device was disconnected.
+            self._fail(serial.SerialException("device reports readiness to "
+                                              "read but returned no data"))
+            return
+
+        records = self.monitor._parse_chunk(chunk,
+                                            clock_ns() - self.monitor._start)
+        if len(records) > 0:
+            self._batches.append(records)
+            if len(self._batches) >= self.maxsize:
+                self.loop.remove_reader(self._fd)
+                self._paused = True
+            self._wake()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while len(self._batches) == 0:
+            if self._fd is None:
+                raise StopAsyncIteration
+            self._waiter = self.loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        batch = self._batches.popleft()
+        if self._paused and self._fd is not None:
+            self._resume()
+        if isinstance(batch, Exception): # pragma: no cover
+            raise batch
+        return batch
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+async def log(logger, monitors):
+    """Counterpart of :meth:`liveserial.log.Logger.start` for the event loop:
+    consumes the batches from the monitors as they arrive and hands them to the
+    logger every `logger.interval` seconds. Runs until all the monitors are
+    exhausted, or until it is cancelled; either way, the logger is stopped and
+    the remaining data is written to CSV.
+
+    Args:
+        logger (liveserial.log.Logger): logger to aggregate, log and feed the
+          data with. Its data queues are ignored.
+        monitors (list): of *open* :class:`AsyncMonitor` instances.
+    """
+    pending = []
+    async def consume(monitor):
+        async for batch in monitor:
+            pending.append(batch)
+
+    tasks = [asyncio.ensure_future(consume(m)) for m in monitors]
+    try:
+        while True:
+            await asyncio.sleep(logger.interval)
+            batches = pending[:]
+            del pending[:]
+            logger.process(batches)
+            if all(t.done() for t in tasks):
+                break
+        for t in tasks:
+            t.result()
+    finally:
+        for t in tasks:
+            t.cancel()
+        logger.stop()
@@ -8,8 +8,16 @@ portdefaults = {
     "port_parity": serial.PARITY_NONE,
     "port_timeout":  0.01,
     "virtual": False,
+    "process": False,
+    "maxsize": 0,
+    "overflow": "block",
+    "decimate_by": 2,
+    "latency": 0,
     "delimiter": r"\s",
-    "encoding": "UTF-8"
+    "encoding": "UTF-8",
+    "protocol": "text",
+    "sync": "0xAA",
+    "checksum": "none"
     }
 """dict: default parameters passed to the :class:`serial.Serial` constructor for
 communicating with the serial port.
@@ -65,6 +73,14 @@ def _load_sensors(config):
                 if fnmatch(section, "sensor.*"):
                     name = section[len("sensor."):]
                     _sensors[name] = Sensor(None,name,**dict(parser.items(section)))
+
+            #Aggregate sensors combine *all* the values of their inputs, so
+            #none of the columns of those can be skipped at parse time.
+            for instance in _sensors.values():
+                if instance.port == "aggregate" and instance.sensors is not None:
+                    for name in instance.sensors:
+                        if name in _sensors:
+                            _sensors[name].aggregated = True
                 
         _sensors_parsed = True
     
@@ -98,7 +114,13 @@ def sensors(config, sensor=None, port=None, monitor=None):
                     
 _ports = {}
 """dict: keys are port names, values are updated parameter dictionaries that can
-be passed to the :class:`liveserial.monitor.ComMonitorThread` constructor.
+be passed to the :class:`liveserial.monitor.ComMonitor` constructor (except for
+`process`, which selects the kind of monitor; see
+:func:`liveserial.monitor.monitor_class`).
+"""
+_portset = {}
+"""dict: keys are port names, values are the `set` of options that the port's
+section actually sets (the others have their :data:`portdefaults` value).
 """
 _ports_parsed = False
 """bool: when True, we have already examined the config file for port settings.
@@ -121,26 +143,29 @@ def _load_ports(config):
                 continue
 
             params = portdefaults.copy()
+            _portset[name] = set()
             for option, value in params.items():
                 #Override the value using the config value unless it doesn't
                 #exist.
                 if parser.has_option(section, option):
                     params[option] = parser.get(section, option)
+                    _portset[name].add(option)
 
             #Python's bool is interesting because bool('0') => True. So, we test
             #explicitly here for the option value the user set.
             import re
-            if not isinstance(params["virtual"], bool):
-                if re.match(r"\b\d+\b", params["virtual"]):
-                    params["virtual"] = bool(int(params["virtual"]))
-                elif re.match(r"[a-z]", params["virtual"][0], re.I):
-                    params["virtual"] = params["virtual"][0].lower() == 't'
+            for option in ("virtual", "process"):
+                if not isinstance(params[option], bool):
+                    if re.match(r"\b\d+\b", params[option]):
+                        params[option] = bool(int(params[option]))
+                    elif re.match(r"[a-z]", params[option][0], re.I):
+                        params[option] = params[option][0].lower() == 't'
 
             _ports[name] = params
             
         _ports_parsed = True
 
-def ports(config, port):
+def ports(config, port, defaults=None):
     """Returns the port configuration dictionary for the specified port name.
 
     Args:
@@ -148,12 +173,21 @@ def ports(config, port):
           information. `str` is also allowed, in which case it
           should be the path to the config file to load.
         port (str): name of the port to return configuration for.
+        defaults (dict): values (from the script arguments, for instance) to
+          use instead of :data:`portdefaults` for the options that the port's
+          section doesn't set; the configuration always wins.
     """
     _load_ports(config)
     if port in _ports:
-        return _ports[port]
+        result = _ports[port]
     else: # pragma: no cover
-        return portdefaults.copy()
+        result = portdefaults.copy()
+    if defaults:
+        result = result.copy()
+        for option, value in defaults.items():
+            if option not in _portset.get(port, ()):
+                result[option] = value
+    return result
 
 _script = {}
 """dict: keys are command-line arguments usually accepted by the script when it
@@ -255,11 +289,12 @@ def reset_config():
     """Resets the global config variables so that a session can be continued
     with a new config file.
     """
-    global _sensors, _ports, _plot, _script
+    global _sensors, _ports, _portset, _plot, _script
     global _sensors_parsed, _ports_parsed, _plot_parsed, _script_parsed
     _sensors = {}
     _sensors_parsed = False
     _ports = {}
+    _portset = {}
     _ports_parsed = False
     _plot = {}
     _plot_parsed = False
@@ -275,6 +310,75 @@ def _parse_transform(function):
 
     return eval(function)            
 
+def compile_parser(dtype, keyloc=None, key=None, encoding=None, columns=None):
+    """Generates a parsing function that is specialized for a single line
+    format. The function unpacks the split fields positionally, skips the key
+    column and applies each cast directly, so that there is no per-field
+    branching or indexing at parse time.
+
+    Args:
+        dtype (list): of `type` (or other callables) to cast each value column
+          with, in the order they appear in the line.
+        keyloc (int): index of the key column in the split line, or `None` if
+          the line has no key.
+        key (str): value that must be found at `keyloc` for the line to belong
+          to this format. Ignored if `keyloc` is `None`.
+        encoding (str): when specified, the parser works on fields that were
+          split from the *undecoded* line (i.e., `bytes`). The key is encoded
+          for comparison and `str` columns are decoded; `int` and `float`
+          accept the bytes directly.
+        columns (set): of the (one-based) value columns that are needed; the
+          others are returned as `None` without being cast (or checked). If
+          `None`, all the columns are cast.
+
+    Returns:
+        function: accepting a `list` of split values and returning a `list` of
+        cast values, or `None` if the line has the wrong number of columns, the
+        wrong key or values that can't be cast.
+    """
+    nfields = len(dtype) + (0 if keyloc is None else 1)
+    if encoding is not None:
+        if key is not None:
+            key = key.encode(encoding)
+        decode = lambda b: b.decode(encoding)
+        dtype = [decode if c is str else c for c in dtype]
+
+    env = {"key": key}
+    fields, casts = [], []
+    for i in range(nfields):
+        if i == keyloc:
+            fields.append("k")
+        elif columns is not None and len(casts) + 1 not in columns:
+            #The column keeps its place in the record so that the value
+            #indices in the configuration still line up.
+            fields.append("_")
+            casts.append("None")
+        else:
+            caster = "c{}".format(len(casts))
+            env[caster] = dtype[len(casts)]
+            fields.append("f{}".format(i))
+            casts.append("{}(f{})".format(caster, i))
+
+    #Unpacking raises a ValueError when the number of columns is wrong, which
+    #is handled in the same way as a failed cast.
+    source = ["def parse(raw):",
+              "    try:",
+              "        [{}] = raw".format(", ".join(fields))]
+    if keyloc is not None:
+        source.extend(["        if k != key:",
+                       "            return None"])
+    source.extend(["        return [{}]".format(", ".join(casts)),
+                   "    except ValueError:",
+                   "        return None"])
+    exec(compile('\n'.join(source), "<liveserial parser>", "exec"), env)
+    return env["parse"]
+
+def _struct_type(value):
+    """Returns the name of the python type of a value unpacked from a binary
+    payload.
+    """
+    return "float" if isinstance(value, float) else "int"
+
 class Sensor(object):
     """Represents the configuration of a sensor on the serial port.
 
@@ -308,17 +412,37 @@ class Sensor(object):
             value. This only applies to the case of aggregate sensors.
         function (str): name of a function to use to transform the data. Only
             applies to the case of aggregate sensors.
+        sensor_id (str): for ports using the binary protocol, the value of the
+            id byte that identifies this sensor's frames (e.g., `1` or `0x01`).
+        payload (str): for ports using the binary protocol, the :mod:`struct`
+            format of the frame payload, e.g. `<if` for a little-endian `int32`
+            followed by a `float32`. When specified, `dtype` is derived from it.
+        decimate (int): reduce the sensor's records in the monitor over windows
+            of this many records.
+        max_rate (float): maximum rate (in Hz) of the sensor's records after the
+            monitor reduces them; each window spans at least `1/max_rate`
+            seconds. Can be combined with `decimate`.
+        reducer (str): how each window is reduced when `decimate` or `max_rate`
+            is set; one of :data:`liveserial.decimation.reducers`.
+        method (str): how the logger aggregates the sensor's records on each
+            tick; one of :data:`liveserial.reduction.methods`. Defaults to the
+            logger's `method`.
         kwargs (dict): additional keyword arguments supported that do not require
             special processing (i.e., are just simple string values).
 
     Attributes:
         options (dict): additional keyword arguments (or configurable options) for
           the sensor.
+        struct (struct.Struct): compiled `payload` format for binary frames, or
+          `None` for text sensors.
+        aggregated (bool): when True, the sensor is an input of an aggregate
+          sensor, so all of its values are needed (see :attr:`projection`).
     """
     def __init__(self, monitor, name, key=None, value_index=None,
                  dtype=["key", "int", "float"], label=None, port=None,
                  logging=None, columns=None, legends=None, function=None,
-                 sensors=None, **kwargs):
+                 sensors=None, sensor_id=None, payload=None, decimate=None,
+                 max_rate=None, reducer="every", method=None, **kwargs):
 
         self.monitor = monitor
         self.name = name
@@ -333,6 +457,16 @@ class Sensor(object):
         if isinstance(dtype, string_types):
             dtype = dtype.split(',')
 
+        self.sensor_id = None if sensor_id is None else int(str(sensor_id), 0)
+        self.struct = None
+        if payload is not None:
+            #Binary frames don't have a key column; the types of the values
+            #are fixed by the packed format.
+            import struct
+            self.struct = struct.Struct(payload)
+            dtype = [_struct_type(v) for v in
+                     self.struct.unpack(b"\0"*self.struct.size)]
+
         for i, sentry in enumerate(dtype):
             if sentry == "key":
                 self._keyloc = i
@@ -353,6 +487,18 @@ class Sensor(object):
         self.columns = _config_split(columns, ',')
         self.legends = _config_split(legends, ',')
         self.sensors = _config_split(sensors, ',')
+        self.decimate = None if decimate is None else int(decimate)
+        self.max_rate = None if max_rate is None else float(max_rate)
+        from liveserial.decimation import reducers
+        if reducer not in reducers:
+            raise ValueError("Unknown reducer '{}' for sensor '{}'; expected one "
+                             "of {}.".format(reducer, name, sorted(reducers)))
+        self.reducer = reducer
+        from liveserial.reduction import methods
+        if method is not None and method not in methods:
+            raise ValueError("Unknown method '{}' for sensor '{}'; expected one "
+                             "of {}.".format(method, name, sorted(methods)))
+        self.method = method
         
         if function is not None:
             self.transform = _parse_transform(function)
@@ -360,32 +506,110 @@ class Sensor(object):
             self.transform = None
         
         self.options = kwargs
-               
-    def _cast(self, raw):
-        """Casts all the values in the given list to their relevant data
-        types. Assumes that the list has the correct format.
-        
-        Args:
-            vals (list): string values from the split line to cast.
+        self.aggregated = False
+        self._parsers = {}
+        """dict: keys are encodings (or `None` for decoded lines); values are the
+        specialized parsers generated for this sensor's line format; see
+        :func:`compile_parser`.
         """
-        if (len(raw) != len(self.dtype)
-            + (1 if self._keyloc is not None else 0)): # pragma: no cover
-            return
-        
-        try:
-            vals = []
-            for iv, v in enumerate(raw):
-                if iv != self._keyloc:
-                    vals.append(self.dtype[len(vals)](v))
-
-            #Previously, we were changing the order of the columns based on the
-            #value index to make it easier for the plotter. Since we allow
-            #multiple values to be plotted on the same subplot now, it is easier
-            #to just not mangle them in the first place.
-            return vals
-        except ValueError: # pragma: no cover
+
+    def __getstate__(self):
+        """Drops the compiled parsers and payload layout, which can't be pickled;
+        see :meth:`liveserial.monitor.ComMonitor.__getstate__`.
+        """
+        state = self.__dict__.copy()
+        state["_parsers"] = {}
+        if self.struct is not None:
+            state["struct"] = self.struct.format
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.struct is not None:
+            import struct
+            self.struct = struct.Struct(self.struct)
+
+    @property
+    def projection(self):
+        """set: of the (one-based) value columns that are logged or plotted for
+        this sensor, or `None` if all of them are needed. Only the columns in
+        the projection are cast when a line is parsed; the others are kept in
+        the record as `None`, so the column indices don't change.
+        """
+        if self.logging is None or self.aggregated:
+            #Without a `logging` option, every column is written to the CSV.
             return None
-        
+        needed = set(self.logging)
+        needed.update(self.value_index if self.value_index is not None else [1])
+        if needed.issuperset(range(1, len(self.dtype) + 1)):
+            return None
+        return needed
+
+    def decimator(self):
+        """Returns a new :class:`liveserial.decimation.Decimator` that reduces
+        this sensor's records in the monitor, or `None` if neither `decimate`
+        nor `max_rate` is configured.
+        """
+        if self.decimate is None and self.max_rate is None:
+            return None
+        from liveserial.decimation import Decimator
+        #The monitors stamp the records in nanoseconds.
+        period = None if self.max_rate is None else 1e9/self.max_rate
+        column = self.value_index[0] if self.value_index is not None else 1
+        return Decimator(self.reducer, self.decimate or 1, period, column)
+
+    @property
+    def record_dtype(self):
+        """list: of the types of the values in the records that the monitor
+        publishes for this sensor. These are the :attr:`dtype`, except that
+        the `mean` reducer averages `int` columns into `float` ones.
+        """
+        if self.reducer == "mean" and self.decimator() is not None:
+            return [float if t is int else t for t in self.dtype]
+        return self.dtype
+
+    @property
+    def structured_dtype(self):
+        """numpy.dtype: of the sensor's records once the logger holds them in
+        columns (see :class:`liveserial.log.LogBuffer`): an integer `time` field
+        (in nanoseconds) and one `v<i>` field per value, as in the
+        shared-memory rings. Columns that aren't parsed (see
+        :attr:`projection`) are `float`, so that they can hold NaN, and `str`
+        values are kept as objects.
+        """
+        import numpy as np
+        projection = self.projection
+        fields = [("time", "<i8")]
+        for i, t in enumerate(self.record_dtype):
+            if t is int and (projection is None or i + 1 in projection):
+                fmt = "<i8"
+            elif t in (int, float):
+                fmt = "<f8"
+            else:
+                fmt = object
+            fields.append(("v{}".format(i), fmt))
+        return np.dtype(fields)
+
+    def parser(self, encoding=None):
+        """Returns the specialized parsing function for this sensor's line
+        format, compiling it the first time it is requested.
+
+        Args:
+            encoding (str): if the lines are split *without* being decoded
+              first, the encoding of the stream; otherwise `None`. See
+              :func:`compile_parser`.
+        """
+        if encoding not in self._parsers:
+            if self._keyloc is None and self.key is not None: # pragma: no cover
+                #A key without a column to find it in can never match a line.
+                self._parsers[encoding] = lambda raw: None
+            else:
+                self._parsers[encoding] = compile_parser(self.dtype,
+                                                         self._keyloc,
+                                                         self.key, encoding,
+                                                         self.projection)
+        return self._parsers[encoding]
+               
     def parse(self, raw):
         """Parses a single line read from the serial port and returns a tuple of
         values.
@@ -397,11 +621,8 @@ class Sensor(object):
             list: of values parsed using :attr:`Sensor.dtype` casting.
             None: if the `key` was not found in the correct location.
         """
-        result = None
-        if self._keyloc is not None:
-            if raw[self._keyloc] == self.key:
-                result = self._cast(raw)
-        elif self.key is None:
-            result = self._cast(raw)
-            
-        return result
+        #Previously, we were changing the order of the columns based on the
+        #value index to make it easier for the plotter. Since we allow
+        #multiple values to be plotted on the same subplot now, it is easier
+        #to just not mangle them in the first place.
+        return self.parser()(raw)
@@ -0,0 +1,117 @@
+"""Classes for reducing the records of fast sensors right after they are parsed,
+so that the queues, the logger and the plotter only ever see the reduced
+stream. A sensor is reduced over windows of a fixed number of records
+(`decimate`) and/or a minimum time span (`max_rate`); see
+:class:`liveserial.config.Sensor`.
+"""
+class Decimator(object):
+    """Reduces the records of a single sensor over consecutive windows. A window
+    is complete once it holds at least `count` records *and* spans at least
+    `period` seconds, so the reduced stream never exceeds either limit.
+
+    Args:
+        reducer (str): one of the keys in :data:`reducers`.
+        count (int): minimum number of records in each window.
+        period (float): minimum time spanned by each window, in the units of
+          the record timestamps (nanoseconds for the monitors), or `None` for
+          windows of `count` records only.
+        column (int): one-based value column that the `minmax` reducer picks
+          the records by.
+
+    Attributes:
+        window (list): of the records in the current, incomplete window.
+    """
+    def __init__(self, reducer="every", count=1, period=None, column=1):
+        if reducer not in reducers:
+            raise ValueError("Unknown reducer '{}'; expected one of {}.".format(
+                reducer, sorted(reducers)))
+        self.reducer = reducer
+        self.count = max(int(count), 1)
+        self.period = period
+        self.column = column
+        self.window = []
+        self._n = 0
+        """int: number of records pushed since the `every` reducer last emitted
+        one.
+        """
+        self._reduce = reducers[reducer]
+
+    def reset(self):
+        """Discards the current window; called when the port is (re)opened,
+        since the timestamps start again from zero.
+        """
+        self.window = []
+
+    def push(self, record):
+        """Adds a record to the current window.
+
+        Args:
+            record (tuple): `(sensor, timestamp, values...)` as parsed by the
+              monitor.
+
+        Returns:
+            list: of the reduced records, if `record` completed the window;
+            otherwise empty. The `every` reducer instead emits the record that
+            *opens* each window straight away, and only keeps that record in
+            :attr:`window`, since the others are never needed.
+        """
+        window = self.window
+        if self.reducer == "every":
+            if len(window) == 0 or (self._n >= self.count and
+                                    (self.period is None or
+                                     record[1] - window[0][1] >= self.period)):
+                self.window = [record]
+                self._n = 1
+                return self.window[:]
+            self._n += 1
+            return []
+
+        window.append(record)
+        if len(window) < self.count:
+            return []
+        if (self.period is not None and
+            record[1] - window[0][1] < self.period):
+            return []
+        self.window = []
+        return self._reduce(window, self.column)
+
+def _every(window, column):
+    """Keeps the first record of the window."""
+    return window[:1]
+
+def _mean(window, column):
+    """Averages each value column over the window; the record is stamped with
+    the time of the last record, as for the logger's `average` method. Columns
+    that weren't parsed stay `None`.
+    """
+    n = float(len(window))
+    last = window[-1]
+    values = tuple(None if vals[0] is None else sum(vals)/n
+                   for vals in zip(*[r[2:] for r in window]))
+    return [(last[0], last[1]) + values]
+
+def _minmax(window, column):
+    """Keeps the records with the smallest and largest values in the configured
+    column, in the order they were read.
+    """
+    index = column + 1
+    lo = min(window, key=lambda r: r[index])
+    hi = max(window, key=lambda r: r[index])
+    if lo is hi:
+        return [lo]
+    return [lo, hi] if lo[1] <= hi[1] else [hi, lo]
+
+reducers = {
+    "every": _every,
+    "mean": _mean,
+    "minmax": _minmax
+    }
+"""dict: keys are the names of the reducers that can be configured for a sensor;
+values are functions that reduce a complete window of records to a list of
+records:
+
+- `every`: keeps the first record of each window (i.e., every N'th record).
+- `mean`: boxcar average of each value column over the window.
+- `minmax`: the minimum and maximum records of the window (by the sensor's first
+  `value_index` column), so that peaks survive the reduction.
+"""
@@ -0,0 +1,306 @@
+"""Classes for splitting the raw byte stream read off a serial port into
+complete records. The monitor threads read whatever bytes are waiting on the
+port in a single call; the framers here keep track of the partial records
+between reads so that only whole records are ever parsed.
+"""
+class LineFramer(object):
+    """Splits chunks of bytes read from a serial port into complete lines. Any
+    trailing, partial line is kept in a reusable buffer until the rest of it
+    arrives with the next chunk.
+
+    Args:
+        terminator (bytes): sequence of bytes that marks the end of a line.
+
+    Attributes:
+        buffer (bytearray): bytes of the partial line that have been received
+          so far, but which have not been terminated yet.
+    """
+    def __init__(self, terminator=b"\n"):
+        self.terminator = terminator
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Adds the specified chunk of bytes to the framer and returns any lines
+        that were completed by it.
+
+        Args:
+            data (bytes): raw chunk read from the serial port.
+
+        Returns:
+            list: of `bytes`, one for each complete line, *without* the
+            terminator. Other whitespace (such as a `\\r` before the `\\n`) is
+            left for the parser to strip.
+        """
+        buf = self.buffer
+        buf.extend(data)
+        end = buf.rfind(self.terminator)
+        if end < 0:
+            return []
+
+        #We split a single copy of the completed section so that the whole
+        #batch is handled by one call; the partial line stays in the buffer.
+        lines = bytes(buf[:end]).split(self.terminator)
+        del buf[:end + len(self.terminator)]
+        return lines
+
+    def reset(self):
+        """Discards any partial line held in the buffer.
+        """
+        del self.buffer[:]
+
+def _sum8(data):
+    """Returns the 8-bit sum of the bytes in `data`."""
+    return sum(bytearray(data)) & 0xFF
+
+def _xor8(data):
+    """Returns the 8-bit XOR of the bytes in `data`."""
+    result = 0
+    for b in bytearray(data):
+        result ^= b
+    return result
+
+def _crc16(data):
+    """Returns the CRC-16/CCITT (initial value `0xFFFF`) of `data`."""
+    from binascii import crc_hqx
+    #The data is passed as it is: on python 2, `bytes` of a memoryview is
+    #its repr.
+    return crc_hqx(data, 0xFFFF)
+
+checksums = {
+    "none": (None, None),
+    "sum8": ("B", _sum8),
+    "xor8": ("B", _xor8),
+    "crc16": ("<H", _crc16)
+    }
+"""dict: keys are checksum names that can be configured for a binary port;
+values are `(format, function)` tuples, where `format` is the :mod:`struct`
+format of the checksum at the end of the frame and `function` computes it from
+the frame id and payload bytes.
+"""
+
+_npcodes = {"b": "i1", "B": "u1", "h": "i2", "H": "u2", "i": "i4", "I": "u4",
+            "l": "i4", "L": "u4", "q": "i8", "Q": "u8", "e": "f2", "f": "f4",
+            "d": "f8", "?": "b1"}
+"""dict: keys are :mod:`struct` format characters; values are the equivalent
+:mod:`numpy` type codes (without byte order) for standard-size formats.
+"""
+
+def _numpy_fields(layout):
+    """Returns a list of `(name, dtype)` tuples for a structured :mod:`numpy`
+    dtype that is equivalent to the :class:`struct.Struct` `layout`, or `None`
+    if the format can't be represented (native alignment, strings, padding).
+    """
+    import re
+    fmt = layout.format
+    if isinstance(fmt, bytes): # pragma: no cover
+        fmt = fmt.decode("ascii")
+    if len(fmt) == 0 or fmt[0] not in "<>!=":
+        return None
+    order = ">" if fmt[0] == "!" else fmt[0]
+    fields = []
+    for count, code in re.findall(r"(\d*)(.)", fmt[1:]):
+        if code not in _npcodes:
+            return None
+        for i in range(int(count) if count else 1):
+            name = "v{}".format(len(fields))
+            fields.append((name, order + _npcodes[code]))
+    return fields
+
+class BinaryFramer(object):
+    """Splits chunks of bytes read from a serial port into fixed-width binary
+    frames. Each frame consists of the sync bytes, a single byte frame id that
+    identifies the sensor, the packed payload for that sensor and an optional
+    checksum over the id and payload. Frames with unknown ids or bad checksums
+    are dropped and the framer resynchronizes on the next sync sequence.
+
+    Args:
+        sync (bytes): sequence that starts every frame.
+        checksum (str): one of the keys in :data:`checksums`.
+
+    Attributes:
+        buffer (bytearray): bytes received so far that don't form a complete
+          frame yet.
+        layouts (dict): keys are frame ids; values are :class:`struct.Struct`
+          instances describing the payload of frames with that id.
+        dropped (int): number of frames that were discarded because their id
+          was unknown or their checksum didn't match.
+    """
+    def __init__(self, sync=b"\xaa", checksum="none"):
+        self.sync = bytes(sync)
+        self.checksum = checksum
+        self._ckfmt, self._ckfun = checksums[checksum]
+        self._cksize = 0
+        if self._ckfmt is not None:
+            import struct
+            self._ckstruct = struct.Struct(self._ckfmt)
+            self._cksize = self._ckstruct.size
+        self.buffer = bytearray()
+        self.layouts = {}
+        self.dropped = 0
+        self._fixed = None
+        """numpy.dtype: structured dtype of a whole frame when every
+        configured layout has the same format, so that runs of consecutive
+        frames can be decoded in one call; otherwise `None`.
+        """
+
+    def __getstate__(self):
+        """Replaces the :class:`struct.Struct` layouts, which can't be pickled,
+        with their formats.
+        """
+        state = self.__dict__.copy()
+        state.pop("_ckstruct", None)
+        state["layouts"] = dict((k, l.format) for k, l in self.layouts.items())
+        return state
+
+    def __setstate__(self, state):
+        import struct
+        self.__dict__.update(state)
+        if self._ckfmt is not None:
+            self._ckstruct = struct.Struct(self._ckfmt)
+        self.layouts = dict((k, struct.Struct(f)) for k, f in self.layouts.items())
+
+    def add_layout(self, frameid, layout):
+        """Registers the payload layout for frames with the specified id.
+
+        Args:
+            frameid (int): value of the id byte that follows the sync bytes.
+            layout (struct.Struct): packed format of the frame's payload.
+        """
+        self.layouts[frameid] = layout
+        self._fixed = None
+        formats = set(l.format for l in self.layouts.values())
+        if len(formats) == 1:
+            fields = _numpy_fields(layout)
+            if fields is not None:
+                import numpy as np
+                head = [("sync", "V{}".format(len(self.sync))), ("id", "u1")]
+                tail = []
+                if self._cksize > 0:
+                    tail = [("checksum", "V{}".format(self._cksize))]
+                self._fixed = np.dtype(head + fields + tail)
+
+    def frame_size(self, frameid):
+        """Returns the number of bytes in a whole frame with the specified id,
+        from its sync bytes to its checksum.
+        """
+        return (len(self.sync) + 1 + self.layouts[frameid].size +
+                self._cksize)
+
+    def reset(self):
+        """Discards any partial frame held in the buffer.
+        """
+        del self.buffer[:]
+
+    def _valid(self, view, start, size):
+        """Returns True if the checksum of the frame starting at `start` (whose
+        payload has `size` bytes) is correct.
+        """
+        if self._ckfun is None:
+            return True
+        body = start + len(self.sync)
+        end = body + 1 + size
+        expected = self._ckstruct.unpack_from(view, end)[0]
+        return self._ckfun(view[body:end]) == expected
+
+    def _decode_run(self, view, pos, end):
+        """Decodes the run of consecutive, valid frames that starts at `pos`
+        with a single :func:`numpy.frombuffer` call. Only used when all the
+        layouts share the same format.
+
+        Returns:
+            tuple: `(count, frames)` where `count` is the number of frames
+            decoded and `frames` is a list of `(frameid, values)`.
+        """
+        import numpy as np
+        size = self._fixed.itemsize
+        count = (end - pos)//size
+        if count < 2:
+            return 0, []
+
+        rows = np.frombuffer(view, np.uint8, count*size, pos).reshape(count, size)
+        nsync = len(self.sync)
+        valid = (rows[:, :nsync] == bytearray(self.sync)).all(axis=1)
+        valid &= np.isin(rows[:, nsync], list(self.layouts.keys()))
+        if self._cksize > 0:
+            body = rows[:, nsync:size - self._cksize]
+            if self.checksum == "sum8":
+                valid &= (body.sum(axis=1) & 0xFF) == rows[:, -1]
+            elif self.checksum == "xor8":
+                valid &= np.bitwise_xor.reduce(body, axis=1) == rows[:, -1]
+            else:
+                for i in np.nonzero(valid)[0]:
+                    valid[i] = self._valid(view, pos + i*size,
+                                           size - nsync - 1 - self._cksize)
+
+        #We only take the leading run of valid frames; anything after the
+        #first bad frame is handled by the resynchronizing scalar loop.
+        nvalid = count if valid.all() else int(np.argmin(valid))
+        if nvalid == 0:
+            return 0, []
+        records = np.frombuffer(view, self._fixed, nvalid, pos)
+        names = list(self._fixed.names[2:len(self._fixed.names) -
+                                       (1 if self._cksize > 0 else 0)])
+        ids = records["id"].tolist()
+        values = records[names].tolist()
+        return nvalid, list(zip(ids, values))
+
+    def feed(self, data):
+        """Adds the specified chunk of bytes to the framer and returns any frames
+        that were completed by it.
+
+        Args:
+            data (bytes): raw chunk read from the serial port.
+
+        Returns:
+            list: of `(frameid, values)` tuples, where `values` is the tuple of
+            unpacked payload values.
+        """
+        buf = self.buffer
+        buf.extend(data)
+        frames = []
+        nsync = len(self.sync)
+        header = nsync + 1
+        n = len(buf)
+        pos = 0
+        view = memoryview(buf)
+        try:
+            while True:
+                start = buf.find(self.sync, pos)
+                if start < 0:
+                    #Keep the tail in case it holds the start of a split sync.
+                    pos = max(pos, n - nsync + 1)
+                    break
+                if start + header > n:
+                    pos = start
+                    break
+
+                layout = self.layouts.get(buf[start + nsync])
+                if layout is None:
+                    self.dropped += 1
+                    pos = start + 1
+                    continue
+                end = start + header + layout.size + self._cksize
+                if end > n:
+                    pos = start
+                    break
+                if not self._valid(view, start, layout.size):
+                    self.dropped += 1
+                    pos = start + 1
+                    continue
+
+                frames.append((buf[start + nsync],
+                               layout.unpack_from(view, start + header)))
+                pos = end
+                if self._fixed is not None:
+                    count, run = self._decode_run(view, pos, n)
+                    frames.extend(run)
+                    pos += count*self._fixed.itemsize
+        finally:
+            #The buffer can't be resized while the view exists; python 2 has
+            #no `release`, so the view is only gone once it is deleted.
+            if hasattr(view, "release"):
+                view.release()
+            del view
+
+        del buf[:pos]
+        return frames
@@ -1,5 +1,6 @@
 #!/usr/bin/python
 from liveserial import msg
+from liveserial.reduction import methods
 def examples():
     """Prints examples of using the script to the console using colored output.
     """
@@ -23,7 +24,11 @@ def examples():
                  "Plot any sensors listed in that file.",
                  "livemon.py auto -config custom.cfg",
                  "If your file is called `sensors.cfg`, you can just use "
-                 "`livemon.py auto`.")]
+                 "`livemon.py auto`."),
+                ("Log several busy ports, reading each one in its own process.",
+                 "livemon.py COM3 COM4 -noplot -processes -logdir ~/sensordata",
+                 "Use the `process` option of a `[port.*]` section to only "
+                 "move some of the ports out of the main process.")]
     required = ("REQUIRED: working serial port.")
     output = ("RETURNS: plot window; for logging-only mode, the data being "
               "logged is also periodically printed to stdout.")
@@ -112,22 +117,70 @@ script_options = {
                           "this value is low, the thread will return data "
                           "in finer grained chunks, with more accurate "
                           "timestamps, but it will also consume more CPU.")},
+    "-latency": {"type": float, "default": 0.,
+                 "help": ("Latency budget (in seconds) for the records of "
+                          "each port. When set, the read timeout and the "
+                          "minimum number of bytes per read are tuned to the "
+                          "arrival rate of each port instead of using "
+                          "`-timeout`. Ports can also set `latency` in the "
+                          "config, which takes precedence.")},
     "-refresh": {"type": int, "default": 100,
                  "help": ("How often (in milliseconds) to plot new data "
                           "obtained from the serial port.")},
     "-buffertime": {"type": float, "default": 25,
                     "help": ("How often (in milliseconds) to query buffered data "
                              "obtained from the serial port.")},
+    "-push": dict(action="store_true",
+                  help=("Hands each batch of records to the logger as soon as "
+                        "a port publishes it instead of every `-buffertime`, "
+                        "which then only sets a heartbeat.")),
+    "-wallclock": dict(action="store_true",
+                       help=("Writes wall-clock times (seconds since the "
+                             "epoch) to the CSV files instead of the seconds "
+                             "since each port was opened.")),
     "-logfreq": {"type": float, "default": 10,
                  "help": ("How often (in *seconds*) to save the buffered "
                           "data points to CSV.")},
-    "-method": dict(default="average", choices=["last", "average"],
+    "-method": dict(default="average", choices=sorted(methods),
                     help=("Specifies how buffered data is aggregated each "
-                          "time it is read from the serial port.")),
+                          "time it is read from the serial port; sensors can "
+                          "override it with their `method` option.")),
     "-listen": dict(action="store_true",
                     help=("Prints the raw output from the serial port "
                           "instead of plotting and logging it. Useful "
                           "for debugging port connection issues.")),
+    "-processes": dict(action="store_true",
+                       help=("Reads and parses each port in its own process "
+                             "instead of a thread, so that busy ports don't "
+                             "compete for the GIL. Ports can also opt in "
+                             "with the `process` option in the config.")),
+    "-shm": dict(action="store_true",
+                 help=("Carries the records from the ports monitored in their "
+                       "own process to the logger through shared-memory ring "
+                       "buffers instead of pickled queues (python 3.8+).")),
+    "-multiplex": dict(action="store_true",
+                       help=("Reads all the ports that aren't monitored in "
+                             "their own process from a single thread that "
+                             "sleeps until data arrives, instead of one "
+                             "polling thread per port (unix only).")),
+    "-maxsize": dict(type=int, default=0,
+                     help=("Maximum number of batches (one per read) that each "
+                           "port can have waiting for the logger; 0 for no "
+                           "limit. Ports can also set `maxsize` in the "
+                           "config, which takes precedence.")),
+    "-overflow": dict(default="block",
+                      choices=["block", "drop-oldest", "drop-newest",
+                               "decimate"],
+                      help=("What a port does with new records when its data "
+                            "queue is full (see `-maxsize`). Ports can also "
+                            "set `overflow` in the config, which takes "
+                            "precedence.")),
+    "-schemacache": dict(default=None,
+                         help=("Path to a file in which the data formats "
+                               "inferred for ports without configured sensors "
+                               "are kept, so that they don't have to be "
+                               "inferred again when the ports are next "
+                               "monitored.")),
     "-virtual": dict(action="store_true",
                      help=("Specifies that the port being connected to is "
                            "virtual (e.g., with `socat`), which changes the "
@@ -189,6 +242,10 @@ def _parser_options():
         if not _list_serial(args["port"]):
             return None
 
+    if args["schemacache"]:
+        from os import path
+        args["schemacache"] = path.abspath(path.expanduser(args["schemacache"]))
+
     #Convert the units for the buffer and refresh times.
     args["refresh"] /= 1000.
     args["buffertime"] /= 1000.
@@ -201,33 +258,121 @@ def _parser_options():
 def _get_com(args):
     """Gets a list of configured COM ports for serial communication.
     """
-    from liveserial.monitor import ComMonitorThread as CMT
-    from multiprocessing import Queue
-    dataq, errorq = Queue(), Queue()
+    from liveserial.monitor import monitor_class, create_queue
+    #Monitors running as threads in this process share queues that don't
+    #pickle the records; monitors in separate processes need queues that can
+    #cross the process boundary.
+    queues = {}
+    def _queues(CM):
+        if CM.transport not in queues:
+            queues[CM.transport] = (create_queue(CM.transport),
+                                    create_queue(CM.transport))
+        return queues[CM.transport]
+    
     result = []
     msg.info("Starting setup of ports {}.".format(args["port"]), 2)
     if args["config"]:
+        from liveserial.config import ports
+        #The script arguments only fill in what the port sections leave out.
+        defaults = {"maxsize": args["maxsize"], "overflow": args["overflow"],
+                    "latency": args["latency"]}
         for port in args["port"]:
             if port.lower() != "aggregate":
                 #The aggregate port name is just a shortcut so that we can plot
                 #transforms between multiple sensor streams. It doesn't actually
                 #represent a physical port that will be monitored.
-                com = CMT.from_config(args["config"], port, dataq, errorq,
-                                      args["listen"], args["sensors"])
+                process = ports(args["config"], port)["process"]
+                CM = monitor_class(args["processes"] or process)
+                dataq, errorq = _queues(CM)
+                com = CM.from_config(args["config"], port, dataq, errorq,
+                                     args["listen"], args["sensors"],
+                                     args["schemacache"], defaults)
                 result.append(com)                               
     else:
+        CM = monitor_class(args["processes"])
+        dataq, errorq = _queues(CM)
         for port in args["port"]:
-            com = CMT(dataq, errorq, port, args["baudrate"],
-                      args["stopbits"], args["parity"], args["timeout"],
-                      args["listen"], args["virtual"])
+            if args["maxsize"] > 0:
+                #The bound applies to each port, so they can't share a queue.
+                dataq = create_queue(CM.transport, args["maxsize"])
+            com = CM(dataq, errorq, port, args["baudrate"],
+                     args["stopbits"], args["parity"], args["timeout"],
+                     args["listen"], args["virtual"],
+                     schema_cache=args["schemacache"],
+                     overflow=args["overflow"], latency=args["latency"])
             result.append(com)
+
+    if args["shm"]:
+        try:
+            from liveserial.ring import SharedRing
+        except ImportError: # pragma: no cover
+            msg.warn("Shared-memory rings need python 3.8 or later; using "
+                     "queues instead.", -1)
+        else:
+            for com in result:
+                if com.transport != "process":
+                    continue
+                try:
+                    com.data_q = SharedRing.for_monitor(com)
+                except ValueError as e: # pragma: no cover
+                    msg.warn("{} Using a queue instead.".format(e), -1)
+
+    if args["multiplex"]:
+        from os import name
+        threads = [c for c in result if c.transport == "thread"]
+        if name == "nt": # pragma: no cover
+            msg.warn("Serial ports can't be multiplexed on Windows; using a "
+                     "thread per port instead.", -1)
+        elif len(threads) > 0:
+            from liveserial.multiplex import Multiplexer
+            result = [c for c in result if c.transport != "thread"]
+            result.append(Multiplexer(threads))
+    return result
+
+def _monitors(coms):
+    """Returns the monitors of the ports, including those read by a
+    :class:`~liveserial.multiplex.Multiplexer`.
+    """
+    result = []
+    for com in coms:
+        result.extend(getattr(com, "monitors", [com]))
     return result
 
+def _com_stop(coms):
+    """Stops the serial port communication and frees the shared-memory rings
+    that carried the data (see :mod:`liveserial.ring`).
+
+    Args:
+        coms (list): of :class:`monitor.ComMonitor` instances to stop.
+    """
+    for com in coms:
+        com.join(1)
+    for com in coms:
+        if hasattr(com.data_q, "drain"):
+            com.data_q.close()
+
+def _stop_all(coms, logger, plotter=None):
+    """Stops the plotting, the serial port communication and the logging.
+
+    Args:
+        coms (list): of :class:`monitor.ComMonitor` instances to stop.
+        logger (liveserial.log.Logger): logger of the data from `coms`.
+        plotter (liveserial.plotting.Plotter): plotter of the live feed, if
+          any.
+    """
+    #The plotter stops first so that it doesn't keep reading the feed while
+    #everything else shuts down; the logger must stop before the
+    #shared-memory rings that it reads from are freed.
+    if plotter is not None:
+        plotter.stop()
+    logger.stop()
+    _com_stop(coms)
+
 def _com_start(coms):
     """Starts the serial port communication thread using the specified object.
 
     Args:
-        coms (list): of :class:`monitor.ComMonitorThread` instances to start
+        coms (list): of :class:`monitor.ComMonitor` instances to start
           running.
     """
     from liveserial.monitor import get_item_from_queue
@@ -279,7 +424,8 @@ def run(args, runtime=None, testmode=False):
     #and puts it on the live data feed. Optionally, the data is also
     #periodically saved to CSV.
     from liveserial.log import Logger
-    dataqs = [c.data_q for c in coms]
+    monitors = _monitors(coms)
+    dataqs = [c.data_q for c in monitors]
     #The logger prints values to screen if it isn't running in plotting
     #mode. Plotting mode means that the plot window is present, or that
     #'-listen' was specified.
@@ -287,18 +433,16 @@ def run(args, runtime=None, testmode=False):
     logger = Logger(args["buffertime"], dataqs, feed,
                     args["method"], args["logdir"], args["logfreq"],
                     plotting, args["config"],
-                    aggregate="aggregate" in args["port"])
+                    aggregate="aggregate" in args["port"],
+                    monitors=monitors, push=args["push"],
+                    wallclock=args["wallclock"])
     
     import signal
     def exit_handler(signal, frame): # pragma: no cover
         """Cleans up the serial communication and logging.
         """
         msg.warn("SIGINT >> cleaning up threads.", -1)
-        logger.stop()
-        for com in coms:
-            com.join(1)
-        if plotter is not None:
-            plotter.stop()
+        _stop_all(coms, logger, plotter)
         print("")
         exit(0)
         #Matplotlib's cleanup code for animations is lousy--it doesn't
@@ -365,11 +509,7 @@ def run(args, runtime=None, testmode=False):
         _runtime += 1.
         if runtime is not None:
             if _runtime >= runtime:
-                logger.stop()
-                for com in coms:
-                    com.join(1)
-                if plotter is not None:
-                    plotter.stop()
+                _stop_all(coms, logger, plotter)
 
     return vardir
 
@@ -1,6 +1,161 @@
 """Methods for grabbing data and logging it to CSV files.
 """
 from liveserial import msg
+
+def _seconds(row):
+    """Returns a copy of a data point whose timestamp (in the first position)
+    is converted from the monitors' integer nanoseconds to seconds.
+    """
+    if row is None:
+        return None
+    return [row[0]/1e9] + list(row[1:])
+
+def _column_format(column):
+    """Returns the :mod:`numpy` format of a field that holds all the values of a
+    column: 64-bit integers if they are all integers, 64-bit floats if they are
+    all numbers (values that weren't parsed, `None`, become NaN), or else
+    objects.
+    """
+    import numpy as np
+    from six import integer_types
+    types = set(map(type, column))
+    if all(issubclass(t, integer_types + (np.integer,))
+           and not issubclass(t, bool) for t in types):
+        return "<i8"
+    numbers = integer_types + (float, np.number, type(None))
+    if all(issubclass(t, numbers) and not issubclass(t, bool) for t in types):
+        return "<f8"
+    return object # pragma: no cover
+
+def _infer_dtype(values):
+    """Returns the structured dtype of the records of a sensor that isn't
+    configured (see :attr:`liveserial.config.Sensor.structured_dtype`), from
+    the values of one of its records.
+    """
+    return _columns_dtype([[value] for value in values])
+
+def _columns_dtype(columns):
+    """Returns the structured dtype of records whose values are given by
+    column, so that every value of each column fits in its field.
+    """
+    import numpy as np
+    fields = [("time", "<i8")]
+    for i, column in enumerate(columns):
+        fields.append(("v{}".format(i), _column_format(column)))
+    return np.dtype(fields)
+
+def _packed(dtype):
+    """Returns a structured dtype with only the named fields of `dtype`, packed;
+    two of them compare equal if their fields have the same names and types.
+    """
+    import numpy as np
+    return np.dtype([(n, dtype[n]) for n in dtype.names])
+
+def _runs(records):
+    """Splits the records of a sensor into runs of consecutive records with the
+    same number of values; there is more than one run only when the format of
+    the sensor changed.
+    """
+    widths = list(map(len, records))
+    if widths.count(widths[0]) == len(widths):
+        return [records]
+    runs, start = [], 0
+    for i in range(1, len(widths)):
+        if widths[i] != widths[i-1]:
+            runs.append(records[start:i])
+            start = i
+    runs.append(records[start:])
+    return runs
+
+class LogBuffer(object):
+    """Growable structured array that gathers the records of a single sensor,
+    so that they can be handled a whole column at a time. The storage is kept
+    when the buffer is cleared and only grows (by doubling) when it is full.
+
+    Args:
+        dtype (numpy.dtype): structured dtype of the records (see
+          :attr:`liveserial.config.Sensor.structured_dtype`).
+        capacity (int): number of records that the buffer holds initially.
+        keyed (bool): when True, the records that are added as tuples still
+          have the sensor name in the first position, as published by the
+          monitors; it is kept in a `sensor` field, so the tuples don't have to
+          be sliced.
+
+    Attributes:
+        data (numpy.ndarray): structured storage of the records.
+        dtype (numpy.dtype): packed structured dtype of the timestamp and value
+          fields (see :attr:`fields`).
+        fields (list): of the names of the timestamp and value fields.
+        size (int): number of records in the buffer.
+    """
+    def __init__(self, dtype, capacity=1024, keyed=False):
+        import numpy as np
+        self.dtype = _packed(dtype)
+        self.fields = list(dtype.names)
+        if keyed:
+            dtype = np.dtype([("sensor", object)] + dtype.descr)
+        self.data = np.empty(max(int(capacity), 1), dtype)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def columns(self):
+        """numpy.ndarray: view of the timestamp and value fields of the records
+        in the buffer; it is only valid until the buffer is changed.
+        """
+        return self.data[:self.size][self.fields]
+
+    def clear(self):
+        """Empties the buffer, keeping its storage."""
+        self.size = 0
+
+    def extend(self, records):
+        """Adds records to the buffer.
+
+        Args:
+            records: structured :class:`numpy.ndarray` with (at least) the
+              :attr:`fields` of the buffer, or list of `(timestamp,
+              values...)` tuples (`(sensor, timestamp, values...)` for `keyed`
+              buffers). Values that weren't parsed (`None`) become NaN.
+        """
+        n = len(records)
+        if self.size + n > len(self.data):
+            self._grow(self.size + n)
+        span = self.data[self.size:self.size + n]
+        if hasattr(records, "dtype"):
+            for name in self.fields:
+                span[name] = records[name]
+        else:
+            try:
+                span[:] = records
+            except (TypeError, ValueError): # pragma: no cover
+                #A value that doesn't fit the type of its column (a `None` in
+                #an `int` one, for instance); the values are kept as objects.
+                self._grow(len(self.data), True)
+                span = self.data[self.size:self.size + n]
+                span[:] = records
+        self.size += n
+
+    def _grow(self, size, widen=False):
+        """Copies the records to a larger storage, with room for at least
+        `size` records. When `widen` is True, the value fields become objects.
+        """
+        import numpy as np
+        capacity = len(self.data)
+        while capacity < size:
+            capacity *= 2
+        dtype = self.data.dtype
+        if widen: # pragma: no cover
+            dtype = np.dtype([(n, dtype[n] if n == "time" else object)
+                              for n in dtype.names])
+        data = np.empty(capacity, dtype)
+        for name in dtype.names:
+            data[name][:self.size] = self.data[name][:self.size]
+        self.data = data
+        self.dtype = _packed(data[self.fields].dtype)
+
 class Logger(object):
     """Logs data points from the serial port to CSV. The arguments to this class
     constructor are also available as attributes on the class instance.
@@ -8,14 +163,16 @@ class Logger(object):
     Args:
         interval (int): how often (in milliseconds) to read data from the serial
           buffer.
-        dataqs (list): of :class:`multiprocessing.Queue`; stores the data read
-          in from the serial port.
+        dataqs (list): of queues (see :func:`liveserial.monitor.create_queue`)
+          or shared-memory rings (see :class:`liveserial.ring.SharedRing`);
+          stores the batches of data read in from the serial port.
         errorqs (list): of :class:`multiprocessing.Queue`; stores any error
           raised during serial port reading.
         livefeed (monitor.LiveDataFeed): feed for storing the latest data points
           obtained from the serial port.
-        method (str): one of ['average', 'last'] specifies how to aggregate multiple
-          data points in the buffer.
+        method (str): one of the keys in :data:`liveserial.reduction.methods`;
+          specifies how to aggregate multiple data points in the buffer. Sensors
+          can override it with their `method` option.
         logdir (str): directory to place log files in for the sensors. If `None`,
           then data will *not* be logged to disk.
         logfreq (int): how often (in seconds) to write the accumulated data points
@@ -26,22 +183,43 @@ class Logger(object):
           argument is a `str`, then the file path.
         aggregate (bool): when True, the logger should check sensor config for
           aggregate ports to be handled; otherwise, aggregate ports are ignored.
+        monitors (list): of :class:`liveserial.monitor.ComMonitor` instances
+          that fill the data queues; the records that they had to drop because
+          their queue was full are reported (see :attr:`dropped`), as are the
+          reads tuned to a latency budget (see :attr:`stats`).
+        overrun (str): what the timer does when a tick takes longer than
+          `interval`; one of :data:`liveserial.schedule.policies`.
+        push (bool): when True, the `monitors` wake the logger up as soon as
+          they put a batch on their queue, so the records reach the live feed
+          (and the consumers waiting on it, see
+          :meth:`liveserial.monitor.LiveDataFeed.wait`) without waiting for the
+          next tick; `interval` then only sets a heartbeat.
+        wallclock (bool): when True, the times in the CSV files are wall-clock
+          times (seconds since the epoch, see :attr:`anchors`) instead of the
+          seconds since the sensor's port was opened.
     Attributes:
-        timer (threading.Timer): executes calls to the serial port reader to get the
-          latest data and push it to the live feed.    
+        timer (liveserial.schedule.Scheduler): executes calls to the serial port
+          reader to get the latest data and push it to the live feed.
         lastsave (float): timestamp indicating the last time the CSV file was
           appended to
-        csvdata (dict): lists of sensor time and value readings, keyed by sensor
-          identifier.
+        csvdata (dict): keys are sensor identifiers; values are the
+          :class:`LogBuffer` of the sensor's records that are waiting to be
+          written. The times are the monitors' integer nanoseconds; they are
+          converted to seconds when they are written.
         config (ConfigParser or str): global sensor configuration parser. If
           `str`, then the config is loaded from the specified file path.
         aggregate (dict): keys are *aggregate* sensor names; values are functions
           that accept a dict of the latest physical sensor values, and return
           single, aggregated values for plotting.
     """
+    max_open_files = 32
+    """int: maximum number of CSV files that the logger keeps open at once;
+    the files of the other sensors are opened again when they are written to.
+    """
     def __init__(self, interval, dataqs, livefeed,
                  method="last", logdir=None, logfreq=10,
-                 plotting=False, config=None, aggregate=False):
+                 plotting=False, config=None, aggregate=False, monitors=None,
+                 overrun="skip", push=False, wallclock=False):
         
         self.interval = interval
         #Our first business is to make sure that we have only a list of *unique*
@@ -52,7 +230,25 @@ class Logger(object):
                 self.dataqs.append(dq)
                 
         self.livefeed = livefeed
+        from liveserial.reduction import methods
+        if method not in methods:
+            raise ValueError("Unknown method '{}'; expected one of {}.".format(
+                method, sorted(methods)))
         self.method = method
+        self._methods = {}
+        """dict: keys are sensor names; values are the reduction functions (see
+        :data:`liveserial.reduction.methods`) that their records are aggregated
+        with.
+        """
+        self._buffers = {}
+        """dict: keys are sensor names; values are the
+        :class:`liveserial.reduction.TickBuffer` that their records are copied
+        into to be aggregated.
+        """
+        self._ticks = {}
+        """dict: keys are sensor names; values are the keyed
+        :class:`LogBuffer` that their records are gathered in on each tick.
+        """
 
         from os import path, makedirs
         if logdir is not None:
@@ -64,17 +260,58 @@ class Logger(object):
             self.logdir = None
         
         self.logfreq = logfreq
+        self.wallclock = wallclock
         self.lastsave = None
         self.csvdata = {}
+        self._plans = {}
+        """dict: keys are sensor names; values are the plans for writing their
+        records to CSV (see :meth:`_log_plan`).
+        """
+        self._headers = {}
+        """dict: keys are the names of the sensors whose format changed; values
+        are the CSV headers of their old format.
+        """
+        from collections import OrderedDict
+        self._files = OrderedDict()
+        """OrderedDict: keys are sensor names; values are the `(file, writer)`
+        of their open CSV files, from the least to the most recently written.
+        """
         self.plotting = plotting
         self.timer = None
+        self.overrun = overrun
         self._timer_calls = 0
         """Number of times that the timer has executed during the application
         run.
         """
         self._cancel = False
         """When true, the main thread is trying to shut us down; don't start the
-        timer again once it fires.
+        timer again.
+        """
+
+        self.monitors = [] if monitors is None else list(monitors)
+        self.wakeup = None
+        """threading.Event: set by the monitors when a batch lands on their
+        queue, in `push` mode.
+        """
+        if push:
+            #Monitors in other processes can only set a multiprocessing event;
+            #this has to happen before they are started.
+            if any(m.transport == "process" for m in self.monitors):
+                from multiprocessing import Event
+            else:
+                from threading import Event
+            self.wakeup = Event()
+            for monitor in self.monitors:
+                monitor.notify = self.wakeup
+        self._lastdrops = {}
+        """dict: the value of :attr:`dropped` when the drops were last reported.
+        """
+        self._lastwarn = None
+        """float: value of :func:`time.time` when the drops were last reported.
+        """
+        self._schemas = {}
+        """dict: the value of :attr:`schemas` when the format changes were last
+        checked.
         """
 
         self.config = config
@@ -136,6 +373,55 @@ class Logger(object):
                 return value
         else: # pragma: no cover
             return default
+
+    def _dtype(self, sensor, records):
+        """Returns the structured dtype of a sensor's records: the one of its
+        configuration, if a monitor has it, or else the one that holds all the
+        values of the `records`.
+
+        Args:
+            records: structured array of the records of the sensor, or list of
+              its `(sensor, timestamp, values...)` tuples, all with the same
+              number of values (see :func:`_runs`).
+        """
+        structured = hasattr(records, "dtype")
+        width = None if structured else len(records[0]) - 1
+        for monitor in self.monitors:
+            if monitor._manual_sensors and sensor in monitor.sensors:
+                dtype = monitor.sensors[sensor].structured_dtype
+                #Records that don't match the configured format (put on the
+                #queue by some other producer) get a dtype of their own.
+                if structured or len(dtype.names) == width:
+                    return dtype
+        if structured:
+            #Records drained from a shared-memory ring.
+            return _packed(records.dtype)
+        #The values are checked whole columns at a time, so that a column that
+        #changed from `int` to `float` isn't truncated to fit the buffer.
+        return _columns_dtype(list(zip(*records))[2:])
+
+    def _tick(self, sensor, dtype):
+        """Returns the buffer that the records of a sensor are gathered in for
+        the current tick; it is replaced when the `dtype` of the sensor's
+        records changes.
+        """
+        buffer = self._ticks.get(sensor)
+        if buffer is None or buffer.dtype != _packed(dtype):
+            buffer = self._ticks[sensor] = LogBuffer(dtype, keyed=True)
+        return buffer
+
+    def _reduce(self, sensor, qdata):
+        """Returns the points to post on the live feed for the records read from
+        a sensor since the last tick.
+        """
+        if sensor not in self._methods:
+            from liveserial.reduction import methods, TickBuffer
+            method = None
+            if self.config is not None and sensor is not None:
+                method = self.sensor_option(sensor, "method")
+            self._methods[sensor] = methods[method or self.method]
+            self._buffers[sensor] = TickBuffer()
+        return self._methods[sensor](qdata, self._buffers[sensor])
                         
     def ready(self, delay=None, wait=1.):
         """Returns True once we have accumulated a few timer calls of data. This
@@ -154,16 +440,24 @@ class Logger(object):
             datapoints = sum([len(v) for v in self.csvdata.values()])/len(self.csvdata)
             havepts = datapoints > 2
             
-        return (self._timer_calls > wait/self.interval
+        calls = self._timer_calls
+        if self.timer is not None:
+            #The calls triggered by the monitors in push mode don't tell how
+            #long we have been running.
+            calls -= self.timer.stats["triggered"]
+        return (calls > wait/self.interval
                 and (self.logdir is None or havepts))
         
     def start(self):
-        """Starts a new timer for the configured interval to gather data from
-        the serial stream.
+        """Starts the timer that gathers data from the serial stream every
+        `interval` seconds (and whenever a monitor publishes a batch, in `push`
+        mode). A single thread makes all the calls, on fixed deadlines (see
+        :class:`liveserial.schedule.Scheduler`).
         """
-        if not self._cancel:
-            from threading import Timer
-            self.timer = Timer(self.interval, self._read_serial)
+        if not self._cancel and self.timer is None:
+            from liveserial.schedule import Scheduler
+            self.timer = Scheduler(self.interval, self._read_serial,
+                                   policy=self.overrun, trigger=self.wakeup)
             self.timer.start()
 
     def stop(self):
@@ -171,26 +465,205 @@ class Logger(object):
         """
         self._cancel = True
         if self.timer is not None:
-            self.timer.cancel()
+            self.timer.join()
+            #One last pass so that the records still waiting on the queues
+            #make it to the CSV files.
+            self._read_serial()
+            msg.info("Logger ticks: {}".format(self.ticks), 2)
         #Write whatever data is left over to CSV file.
         self._csv_append()
+        self._close_files()
+        for port, drops in self.dropped.items():
+            msg.warn("{}: dropped {} records because the data queue was "
+                     "full.".format(port, self._format_drops(drops)), -1)
+        for monitor in self.monitors:
+            if monitor.latency > 0:
+                stats = monitor.stats
+                msg.info("{}: ~{:.0f} bytes/s; reads wait for {} bytes or {:g} "
+                         "seconds.".format(monitor.port, stats["rate"],
+                                           stats["minbatch"],
+                                           stats["timeout"]), 2)
+
+    @property
+    def dropped(self):
+        """dict: keys are port names; values are dicts of the number of records
+        dropped for each sensor of the port (see
+        :attr:`liveserial.monitor.ComMonitor.dropped`). Ports that haven't
+        dropped anything are left out.
+        """
+        result = {}
+        for monitor in self.monitors:
+            drops = dict((s, n) for s, n in monitor.dropped.items() if n > 0)
+            if len(drops) > 0:
+                result[monitor.port] = drops
+        return result
+
+    @property
+    def anchors(self):
+        """dict: keys are port names; values are the wall-clock times at which
+        the ports were opened (see
+        :attr:`liveserial.monitor.ComMonitor.anchor`). The timestamps of the
+        records of each port are relative to its anchor.
+        """
+        return dict((m.port, m.anchor) for m in self.monitors)
+
+    @property
+    def schemas(self):
+        """dict: keys are port names; values are the number of times that the
+        inferred format of one of the port's sensors changed (see
+        :attr:`liveserial.monitor.ComMonitor.schema`).
+        """
+        return dict((m.port, m.schema) for m in self.monitors)
+
+    def _check_schemas(self):
+        """Reports the ports whose inferred formats changed since the last
+        check. The records themselves are still checked against the buffers of
+        their sensors (see :meth:`_dtype`): the counts and the records travel
+        separately, so a count alone can't tell which of the records that are
+        queued have the new format.
+        """
+        schemas = self.schemas
+        for port, count in schemas.items():
+            if count != self._schemas.get(port, 0):
+                msg.info("{}: the format of a sensor changed; its records get "
+                         "new buffers and CSV columns.".format(port), 2)
+        self._schemas = schemas
+
+    def _monitor(self, sensor):
+        """Returns the monitor that reads a sensor, if it can be told: the one
+        that has it configured (for an aggregate sensor, the one of its first
+        input) or else the only monitor.
+        """
+        for monitor in self.monitors:
+            if monitor._manual_sensors and sensor in monitor.sensors:
+                return monitor
+        if self.aggregate and sensor in self.aggregate:
+            from liveserial.config import sensors
+            inputs = sensors(self.config, sensor).sensors
+            if inputs:
+                return self._monitor(inputs[0])
+        if len(self.monitors) == 1:
+            return self.monitors[0]
+
+    @property
+    def ticks(self):
+        """dict: timing statistics of the timer's calls (see
+        :attr:`liveserial.schedule.Scheduler.stats`), or `None` if the timer
+        was never started.
+        """
+        return None if self.timer is None else self.timer.stats
+
+    @property
+    def stats(self):
+        """dict: keys are port names; values are the read statistics of the
+        port's monitor (see :attr:`liveserial.monitor.ComMonitor.stats`).
+        """
+        return dict((m.port, m.stats) for m in self.monitors)
+
+    @staticmethod
+    def _format_drops(drops):
+        """Returns a summary of the per-sensor drop counts of a port."""
+        return ", ".join("{} {}".format(n, "unconfigured" if s is None else s)
+                         for s, n in sorted(drops.items(), key=str))
+
+    def _report_drops(self):
+        """Warns about records that were dropped since the last report; the
+        warnings are printed at most once every `logfreq` seconds.
+        """
+        from time import time
+        if (self._lastwarn is not None and
+            time() - self._lastwarn < self.logfreq):
+            return
+        dropped = self.dropped
+        for port, drops in dropped.items():
+            last = self._lastdrops.get(port, {})
+            new = dict((s, n - last.get(s, 0)) for s, n in drops.items()
+                       if n > last.get(s, 0))
+            if len(new) > 0:
+                msg.warn("{}: dropped {} records; the logger isn't keeping "
+                         "up.".format(port, self._format_drops(new)))
+                self._lastwarn = time()
+        self._lastdrops = dropped
         
     def _read_serial(self):
         """Reads the latest buffered serial information and places it onto the live
         feed for the application.
         """
-        self._timer_calls += 1
         from liveserial.monitor import get_all_from_queue
-        sensedata = {}
-        havedata = False
         #Just iterate over the various queues we have and process their data.
+        #The monitors publish a whole batch of records for each read from the
+        #serial port.
+        batches = []
+        sensedata = {}
         for dataq in self.dataqs:
-            for qdata in get_all_from_queue(dataq):
-                sensor = qdata[0]              
-                if sensor not in sensedata:
-                    sensedata[sensor] = []
-                sensedata[sensor].append(qdata[1:])
-                havedata = True
+            if hasattr(dataq, "drain"):
+                #Shared-memory rings hand out numpy views of whole spans of
+                #records, already grouped by sensor; they are copied a column
+                #at a time.
+                for sensor, records in dataq.drain():
+                    if sensor not in sensedata:
+                        sensedata[sensor] = self._tick(
+                            sensor, self._dtype(sensor, records))
+                        sensedata[sensor].clear()
+                    sensedata[sensor].extend(records)
+            else:
+                batches.extend(get_all_from_queue(dataq))
+        self.process(batches, dict((s, b.columns)
+                                   for s, b in sensedata.items()))
+
+    def process(self, batches, sensedata=None):
+        """Aggregates the batches of records read since the last call, places
+        the result onto the live feed and appends the records to the CSV data.
+        This is called every `interval` by the timer (see :meth:`start`); it can
+        also be called directly by other schedulers (see
+        :func:`liveserial.aio.log`).
+
+        Args:
+            batches (list): of batches (lists) of `(sensor, timestamp,
+              values...)` tuples, as published by the monitors.
+            sensedata (dict): keys are sensor names; values are the records
+              that were already grouped by sensor, as structured arrays with
+              the fields of :attr:`liveserial.config.Sensor.structured_dtype`.
+              The records in `batches` are added to them.
+        """
+        self._timer_calls += 1
+        sensedata = {} if sensedata is None else dict(sensedata)
+        havedata = len(sensedata) > 0
+        #The records are grouped whole, and only copied (a column at a time)
+        #into the sensor's structured buffer for the tick.
+        grouped = {}
+        for batch in batches:
+            if isinstance(batch, tuple): # pragma: no cover
+                #A single record put on the queue by some other producer.
+                batch = [batch]
+            for qdata in batch:
+                sensor = qdata[0]
+                if sensor not in grouped:
+                    grouped[sensor] = []
+                grouped[sensor].append(qdata)
+            havedata = True
+        ticks = []
+        for sensor, records in grouped.items():
+            runs = _runs(records)
+            #When the format of a sensor changed during the tick, the records
+            #of the older format(s) get buffers of their own.
+            for run in runs[:-1]:
+                buffer = LogBuffer(self._dtype(sensor, run), len(run),
+                                   keyed=True)
+                buffer.extend(run)
+                ticks.append((sensor, buffer.columns))
+            dtype = self._dtype(sensor, runs[-1])
+            drained = sensedata.pop(sensor, None)
+            if drained is not None and _packed(drained.dtype) != _packed(dtype):
+                ticks.append((sensor, drained))
+                drained = None
+            buffer = self._tick(sensor, dtype)
+            buffer.clear()
+            if drained is not None:
+                buffer.extend(drained)
+            buffer.extend(runs[-1])
+            ticks.append((sensor, buffer.columns))
+        ticks = list(sensedata.items()) + ticks
 
         # We average/discard the data in the queue to produce the single entry that
         # will be posted to the livefeed.
@@ -198,27 +671,21 @@ class Logger(object):
             if self.aggregate:
                 aggdata = {}
                 
-            for sensor, qdata in sensedata.items():
-                data = None
-                if self.method == "average":
-                    #We use the last data point's time stamp as the authoritative
-                    #one for the averaged set.
-                    tstamp = qdata[-1][0]
-                    #For the values, we take a simple mean.
-                    from numpy import mean
-                    ldata = mean(qdata, axis=0)
-                elif self.method == "last":
-                    ldata = qdata[-1]
-                    
-                if ldata is not None:
-                    self.livefeed.add_data(sensor, ldata)
+            for sensor, qdata in ticks:
+                #Columns that weren't parsed (see `Sensor.projection`) reduce
+                #to NaN. Most methods give a single point; the aggregate
+                #sensors use the last one.
+                points = self._reduce(sensor, qdata)
+                ldata = points[-1]
+                for point in points:
+                    #The records are stamped in nanoseconds; the feed (and so
+                    #the plotter) works in seconds.
+                    self.livefeed.add_data(sensor, _seconds(point))
                     
                 if self.logdir is not None:
-                    if sensor not in self.csvdata:
-                        self.csvdata[sensor] = []
-                    self.csvdata[sensor].extend(qdata)
+                    self._log(sensor, qdata)
                 elif not self.plotting: # pragma: no cover
-                    print("{}: {}".format(sensor, ldata))
+                    print("{}: {}".format(sensor, _seconds(ldata)))
 
                 if self.aggregate:
                     aggdata[sensor] = ldata
@@ -228,107 +695,201 @@ class Logger(object):
             if self.aggregate:
                 for aggsense, aggfun in self.aggregate.items():
                     adata = aggfun(aggdata)
-                    self.livefeed.add_data(aggsense, adata)
+                    self.livefeed.add_data(aggsense, _seconds(adata))
                     if self.logdir is not None:
-                        if aggsense not in self.csvdata:
-                            self.csvdata[aggsense] = []
-                        self.csvdata[aggsense].append(adata)
+                        #The aggregate data functions return None when one of
+                        #the sensors didn't have data ready when the
+                        #aggregation was performed. Those aren't logged.
+                        if adata is not None:
+                            import numpy as np
+                            self._log(aggsense, np.array(
+                                [tuple(adata)], _infer_dtype(adata[1:])))
                     elif not self.plotting: # pragma: no cover
-                        print("{}: {}".format(aggsense, adata))
+                        print("{}: {}".format(aggsense, _seconds(adata)))
                         
-            #Before we restart the timer again, see if we need to save the data to
-            #CSV.
+            #Before the next tick, see if we need to save the data to CSV.
             self.save()
-        self.start()
 
-    def _csv_append(self):
-        """Appends the new data points to the relevant CSV files for each of the
-        sensor's whose data is being tracked.
+        if len(self.monitors) > 0:
+            self._report_drops()
+            self._check_schemas()
+
+    def _log(self, sensor, records):
+        """Adds the records of a sensor to the ones waiting to be written to
+        its CSV file. If the format of the sensor changed, the records of the
+        old format are written first and the CSV plan is made again.
+
+        Args:
+            records (numpy.ndarray): structured array of the records, with the
+              fields of :attr:`liveserial.config.Sensor.structured_dtype`.
         """
+        buffer = self.csvdata.get(sensor)
+        dtype = _packed(records.dtype)
+        if buffer is not None and buffer.dtype != dtype:
+            msg.info("Format of sensor {} changed to {}.".format(
+                sensor, dtype.descr), 2)
+            self._csv_append([sensor])
+            plan = self._plans.pop(sensor, None)
+            if plan is not None:
+                self._headers[sensor] = plan[1]
+            buffer = None
+        if buffer is None:
+            buffer = self.csvdata[sensor] = LogBuffer(dtype, 64)
+        buffer.extend(records)
+
+    def _log_plan(self, sensor, buffer):
+        """Returns the plan for writing a sensor's records to its CSV file: the
+        path of the file, the header of its columns, the names of the
+        :class:`LogBuffer` fields to write, in order, and the monitor whose
+        :attr:`~liveserial.monitor.ComMonitor.anchor` the times are relative
+        to (`None` unless :attr:`wallclock`). It only depends on the
+        configuration, so it is worked out once per sensor.
+        """
+        from os import path, linesep
+        #Let's figure out how many columns to post in the header. We subtract
+        #1 because the time is handled separately.
+        N = len(buffer.fields)-1
+
+        #Check if we have configuration settings available for this sensor.
+        columns = None
+        if self.config is not None:
+            logids = self.sensor_option(sensor, "logging")
+                
+            #We have one issue with the column labeling. We have switched
+            #the important value to be in position 1, whereas it could be
+            #anywhere in the list. Fix the order of the columns.
+            cols = self.sensor_option(sensor, "columns")
+            if logids is None and cols is not None: # pragma: no cover
+                #It is possible that the user will specify one or the other,
+                #but I want to limit the number of concurrent streams for
+                #the unit tests (especially for multi-port testing).
+                logids = list(range(1, len(cols)+1))
+
+            #The other issue is that if the user limits the columns being
+            #logged to include only a few columns, they will supply only a
+            #few column labels.
+            if (logids is not None and cols is not None and
+                len(logids) == len(cols)):
+                columns = {l: c for l, c in zip(logids, cols)}
+            elif cols is not None: # pragma: no cover
+                msg.warn("A different number of column headings than "
+                         "logging ids was specified in configuration.")
+        else:
+            logids = None
+                    
+        if logids is None:
+            #The user didn't say what to log, so we log everything.
+            logids = list(range(1, N+1))
+        if columns is None:
+            columns = {li: "Value {}".format(i+1)
+                       for i, li in enumerate(logids)}
+        #Now, write the columns in the order specified in the logindex.
+        #However, we must remember that until now, we have kept the value in
+        #position 1, so we have to unmix that.
+        strcols = [columns[li] for li in logids]
+        header = "{}{}".format(','.join(["Time"] + strcols), linesep)
+
+        #We log the full data stream from the sensor unless the logging is
+        #limited by the configuration file. The configured list is copied,
+        #since it belongs to the sensor.
+        if 0 not in logids:
+            logids = [0] + logids
+        fields = [buffer.fields[li] for li in logids]
+        logpath = path.join(self.logdir, "{}.csv".format(sensor))
+        monitor = None
+        if self.wallclock:
+            monitor = self._monitor(sensor)
+            if monitor is None: # pragma: no cover
+                msg.warn("Can't tell which port sensor {} is read from; its "
+                         "times are relative to the port.".format(sensor), -1)
+        return logpath, header, fields, monitor
+
+    def _log_writer(self, sensor, logpath, header, rewrite=False):
+        """Returns the CSV writer for a sensor's file, opening the file (and
+        writing its header if it is new) the first time. The files stay open
+        for the session, but no more than :attr:`max_open_files` at once: the
+        one that was written to least recently is closed to make room.
+
+        Args:
+            rewrite (bool): when True, the header is written even if the file
+              isn't new, because the columns of the sensor changed.
+        """
+        if sensor in self._files:
+            self._files[sensor] = entry = self._files.pop(sensor)
+            if rewrite:
+                entry[0].write(header)
+            return entry[1]
+
+        while len(self._files) >= max(self.max_open_files, 1):
+            f, writer = self._files.pop(next(iter(self._files)))
+            f.close()
+
         from os import path
         import csv
-        for sensor in self.csvdata:
+        from six import PY2
+        mode = 'ab' if PY2 else 'a'
+        kwds = {} if PY2 else {"newline": ''}
+        isnew = not path.isfile(logpath)
+        f = open(logpath, mode, **kwds)
+        if isnew or rewrite:
+            f.write(header)
+        writer = csv.writer(f)
+        self._files[sensor] = (f, writer)
+        return writer
+
+    def _close_files(self):
+        """Closes the CSV files that are still open."""
+        while len(self._files) > 0:
+            f, writer = self._files.popitem()[1]
+            f.close()
+
+    def _csv_append(self, sensors=None):
+        """Appends the new data points to the relevant CSV files for each of the
+        sensor's whose data is being tracked.
+
+        Args:
+            sensors (list): of the names of the sensors to write; if `None`, all
+              of them are.
+        """
+        for sensor, buffer in self.csvdata.items():
+            if sensors is not None and sensor not in sensors:
+                continue
             if self.logdir is None: # pragma: no cover
                 #This should never fire because of checks further up the chain.
                 #it is here as as sanity check to keep the file system clean.
                 continue
-
-            #Let's figure out how many columns to post in the header.
-            if len(self.csvdata[sensor]) > 0:
-                #We subtract 1 because the time is handled separately.
-                N = len(self.csvdata[sensor][0])-1
-            else: # pragma: no cover
+            if len(buffer) == 0: # pragma: no cover
                 #No sense in writing to the file at this time; we have no
                 #data to write!
                 continue
 
-            #Check if we have configuration settings available for this sensor.
-            columns = None
-            if self.config is not None:
-                logids = self.sensor_option(sensor, "logging")
-                    
-                #We have one issue with the column labeling. We have switched
-                #the important value to be in position 1, whereas it could be
-                #anywhere in the list. Fix the order of the columns.
-                cols = self.sensor_option(sensor, "columns")
-                if logids is None and cols is not None: # pragma: no cover
-                    #It is possible that the user will specify one or the other,
-                    #but I want to limit the number of concurrent streams for
-                    #the unit tests (especially for multi-port testing).
-                    logids = list(range(1, len(cols)+1))
-
-                vindex = self.sensor_option(sensor, "value_index", [0])
-
-                #The other issue is that if the user limits the columns being
-                #logged to include only a few columns, they will supply only a
-                #few column labels.
-                if (logids is not None and cols is not None and
-                    len(logids) == len(cols)):
-                    columns = {l: c for l, c in zip(logids, cols)}
-                elif cols is not None: # pragma: no cover
-                    msg.warn("A different number of column headings than "
-                             "logging ids was specified in configuration.")
-            else:
-                logids = None
-                vindex = [1]
-                        
-            if logids is None:
-                #The user didn't say what to log, so we log everything.
-                logids = list(range(1, N+1))
-
-            logpath = path.join(self.logdir, "{}.csv".format(sensor))
-            from os import linesep
-            if not path.isfile(logpath):
-                with open(logpath, 'wb') as f:
-                    if columns is None:
-                        columns = {li: "Value {}".format(i+1)
-                                   for i, li in enumerate(logids)}
-                    #Now, write the columns in the order specified in the
-                    #logindex. However, we must remember that until now, we have
-                    #kept the value in position 1, so we have to unmix that.
-                    strcols = [columns[li] for li in logids]
-                    header = "{}{}".format(','.join(["Time"] + strcols), linesep)
-                    f.write(header.encode("ASCII"))
-
-            from six import PY2
-            mode = 'ab' if PY2 else 'a'
-            kwds = {} if PY2 else {"newline": ''}
-            with open(logpath, mode, **kwds) as f:
-                #We log the full data stream from the sensor unless the logging is
-                #limited by the configuration file.
-                if 0 not in logids:
-                    logids.insert(0, 0)
-                writer = csv.writer(f)
-                for idata in self.csvdata[sensor]:
-                    if idata is not None:
-                        #Sometimes, the aggregate data functions return None
-                        #because one of the sensors didn't have data ready when
-                        #the aggregation was performed. Just ignore those.
-                        writer.writerow([idata[li] for li in logids])
-                    
-                #Since we appended the most recent data points, just reset the
-                #lists of points to be empty again.
-                self.csvdata[sensor] = []        
+            rewrite = False
+            if sensor not in self._plans:
+                self._plans[sensor] = self._log_plan(sensor, buffer)
+                #After a change of format, the file gets the new header if the
+                #columns are different.
+                old = self._headers.pop(sensor, None)
+                rewrite = old is not None and old != self._plans[sensor][1]
+            logpath, header, fields, monitor = self._plans[sensor]
+            writer = self._log_writer(sensor, logpath, header, rewrite)
+
+            #The columns are picked and converted whole; the rows are only put
+            #together for the writer.
+            data = buffer.columns
+            cols = [data[name] for name in fields]
+            cols[0] = cols[0]/1e9
+            #The anchor is read on every flush, since it moves when the port
+            #is opened again.
+            anchor = None if monitor is None else monitor.anchor
+            if anchor is not None:
+                cols[0] += anchor
+            writer.writerows(zip(*[c.tolist() for c in cols]))
+            #The file stays open, but what was written has to be on disk.
+            self._files[sensor][0].flush()
+                
+            #Since we appended the most recent data points, just empty the
+            #buffer again; its storage is kept for the next points.
+            buffer.clear()
         
     def save(self):
         """Saves the logger's buffered points to a CSV file. If the file exists,
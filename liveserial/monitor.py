@@ -2,14 +2,30 @@
 that the main UI thread is not blocked or slowed. Code adapted from
 https://github.com/mba7/SerialPort-RealTime-Data-Plotter/blob/master/com_monitor.py
 """
-import threading, serial
+import threading, multiprocessing, serial
 try:
-    from Queue import Empty
+    from Queue import Empty, Full
 except ImportError: # pragma: no cover
     #Why couldn't they have called it queue from the start in py2?
-    from queue import Empty
+    from queue import Empty, Full
+    
+try:
+    from time import perf_counter_ns as clock_ns
+except ImportError: # pragma: no cover
+    #perf_counter_ns is only available from python 3.7 onwards; perf_counter
+    #(python 3.3) is just as monotonic, but python 2 only has the wall clock.
+    try:
+        from time import perf_counter as _clock
+    except ImportError:
+        from time import time as _clock
+    def clock_ns():
+        """Returns the value of the clock in integer nanoseconds; it is
+        monotonic, except on python 2.
+        """
+        return int(_clock()*1e9)
     
 from liveserial import msg
+from liveserial.framing import LineFramer, BinaryFramer
 class FormatInferrer(object):
     """Class that can infer the data types of an unknown sensor stream, provided
     they are consistent between calls.
@@ -17,9 +33,53 @@ class FormatInferrer(object):
     Args:
         infer_limit (int): number of raw lines to consider before reaching consensus
             on the format of the data (when inferring).
+        encoding (str): when the lines are split without being decoded first,
+            the encoding of the stream; the values passed to :meth:`parse` are
+            then `bytes`. If `None`, they are `str`.
+        cache (str): path to a JSON file in which the inferred formats are kept
+            between sessions (see :func:`load_schema`). If a format was cached
+            for the same port and stream fingerprint, the first lines are
+            checked against it and parsed straight away instead of being
+            thrown away while the format is inferred again.
+        port (str): name of the port whose stream is inferred; the key in the
+            cache.
+        fingerprint (list): of JSON-serializable values that identify the
+            stream's settings; a cached format is only used if its fingerprint
+            is the same.
+
+    Once the first `infer_limit` lines have been analyzed, the inferrer keeps
+    adapting to the stream: lines that no known format parses are sampled into
+    a small side buffer, and the format of a new sensor key (or a new format
+    for a known one) is adopted once :attr:`promote_limit` consecutive samples
+    agree on it. Changes to the format of a known sensor are counted in
+    :attr:`schema`, so that consumers that keep state per format can tell. Known lines are dispatched with a dictionary lookup on their
+    key token, so the cost per line doesn't grow with the number of sensors.
     """
-    def __init__(self, infer_limit=15):
+    verify_limit = 2
+    """int: number of lines that a cached format gets to parse successfully
+    before it is discarded; the first line read after opening a port is often
+    only the tail end of a line.
+    """
+    promote_limit = 3
+    """int: number of consecutive samples that have to agree on the format of an
+    unknown line before it is adopted.
+    """
+    max_pending = 16
+    """int: maximum number of candidate formats held in the side buffer. When
+    it is full, samples of new candidates are dropped until one of the held
+    candidates is adopted or goes stale.
+    """
+    stale_after = 1000
+    """int: number of samples after which a candidate that hasn't been seen
+    again can be dropped from a full side buffer.
+    """
+    def __init__(self, infer_limit=15, encoding=None, cache=None, port=None,
+                 fingerprint=None):
         self.infer_limit = infer_limit
+        self.encoding = encoding
+        self.cache = cache
+        self.port = port
+        self.fingerprint = fingerprint
         self._infer_count = 0
         """int: number of lines that have been analyzed alread for inferring data
         structure when no configuration is provided.
@@ -35,10 +95,63 @@ class FormatInferrer(object):
         to be inferred from the incoming stream.
 
         """        
+        self._parsers = None
+        """dict: keys are inferred sensor ids; values are the specialized
+        parsers compiled for them (see
+        :func:`liveserial.config.compile_parser`) once the inference is
+        finished.
+        """
+        self._dispatch = None
+        """dict: keys are the positions of sensor keys in the raw line; values
+        are dicts mapping the key tokens as they appear in the split line
+        (encoded if :attr:`encoding` is set) to `(sensor, parser)` tuples.
+        """
+        self._keyless = None
+        """function: compiled parser for lines without a sensor key, if one was
+        inferred.
+        """
+        from collections import OrderedDict
+        self._pending = OrderedDict()
+        """collections.OrderedDict: side buffer of candidate formats for lines
+        that no known format parses, least recently sampled first; keys are
+        `(sensor, key position)`; values are `[dtype, count, seen]` lists with
+        the sampled format, the number of consecutive samples that agreed on it
+        and the value of :attr:`_nsamples` when it was last sampled.
+        """
+        self._nsamples = 0
+        """int: number of lines that have been sampled into the side buffer.
+        """
+        self.schema = {}
+        """dict: keys are inferred sensor ids; values are the number of times
+        that the types of the sensor's values changed after they were first
+        adopted. Sensors whose format never changed are left out.
+        """
+        self.changes = 0
+        """int: total number of format changes in :attr:`schema`.
+        """
+        self._cached = None
+        """tuple: `(inferred, keys)` for the cached format that still has to be
+        verified against the stream; `None` if there is none.
+        """
+        self._verify_count = 0
+        """int: number of lines that the cached format failed to parse.
+        """
+        if cache is not None:
+            self._cached = load_schema(cache, port, fingerprint)
+
+    def __getstate__(self):
+        """Drops the compiled parsers, which can't be pickled; they are compiled
+        again the next time a line is parsed.
+        """
+        state = self.__dict__.copy()
+        state["_parsers"] = None
+        state["_dispatch"] = None
+        state["_keyless"] = None
+        return state
+
+    def _line_format(self, raw):
+        """Returns the `(sensor, key position, dtype)` of the raw line.
 
-    def _infer_structure(self, raw):
-        """Infers the structure of the raw data; returns the parsed line.
-        
         Args:
             raw (list): of `str` values read from the line.
         """
@@ -62,6 +175,18 @@ class FormatInferrer(object):
         sensor = None
         if key is not None:
             sensor = raw[key]
+            if self.encoding is not None:
+                #Sensor names are always text, even if we split the raw bytes.
+                sensor = sensor.decode(self.encoding)
+        return sensor, key, dtype
+
+    def _infer_structure(self, raw):
+        """Infers the structure of the raw data.
+        
+        Args:
+            raw (list): of `str` values read from the line.
+        """
+        sensor, key, dtype = self._line_format(raw)
         self._infer_keys[sensor] = key
                                          
         if sensor not in self.inferred:
@@ -85,39 +210,334 @@ class FormatInferrer(object):
         Args:
             raw (list): of `str` values read from the line.
         """
+        if self._cached is not None:
+            result = self._verify(raw)
+            if result is not None:
+                return result
+
         if self._infer_count < self.infer_limit:
             self._infer_structure(raw)
             self._infer_count += 1
+            if self._infer_count == self.infer_limit and self.cache is not None:
+                save_schema(self.cache, self.port, self.fingerprint,
+                            self.inferred, self._infer_keys)
             #We need to throw away the first points while we are inferring the
             #structure of the data.
             return (None, None)
 
+        if self._parsers is None:
+            self._compile()
+        return self._parse_known(raw)
+
+    def _parse_known(self, raw, sample=True):
+        """Parses the specified values with the compiled parsers.
+
+        Args:
+            sample (bool): when True, lines that can't be parsed are sampled
+              for new formats (see :meth:`_sample`).
+        """
+        #There is one table per key position (almost always just one), so the
+        #cost doesn't depend on the number of sensors.
+        n = len(raw)
+        for pos, table in self._dispatch.items():
+            if pos < n:
+                entry = table.get(raw[pos])
+                if entry is not None:
+                    #The compiled parser returns None if the number of points
+                    #or their types don't match what we inferred.
+                    vals = entry[1](raw)
+                    if vals is None and sample and self._sample(raw):
+                        return self._parse_known(raw, False)
+                    return (vals, entry[0])
+
+        if self._keyless is not None:
+            vals = self._keyless(raw)
+            if vals is not None:
+                return (vals, None)
+        if sample and self._sample(raw):
+            return self._parse_known(raw, False)
+        return (None, None)
+
+    def _sample(self, raw):
+        """Adds the format of a line that couldn't be parsed to the side
+        buffer, and adopts it once enough consecutive samples agree on it.
+
+        Returns:
+            bool: True if the line's format was adopted.
+        """
+        self._nsamples += 1
+        sensor, key, dtype = self._line_format(raw)
+        candidate = (sensor, key)
+        pending = self._pending.pop(candidate, None)
+        if pending is None:
+            if len(self._pending) >= self.max_pending:
+                oldest = next(iter(self._pending))
+                if self._nsamples - self._pending[oldest][2] < self.stale_after:
+                    return False
+                del self._pending[oldest]
+            pending = [dtype, 0, 0]
+        elif pending[0] != dtype: # pragma: no cover
+            pending[:2] = [dtype, 0]
+        pending[1] += 1
+        pending[2] = self._nsamples
+        if pending[1] < self.promote_limit:
+            #Re-inserting keeps the least recently sampled candidate first.
+            self._pending[candidate] = pending
+            return False
+
+        msg.std("{}: adopting format {} for sensor {}.".format(
+            self.port, dtype, sensor), 2)
+        if sensor in self.inferred and self.inferred[sensor] != dtype:
+            self.schema[sensor] = self.schema.get(sensor, 0) + 1
+            self.changes += 1
+        #A sensor's key only ever sits at one position, so a stale entry for
+        #the sensor is dropped from the dispatch when it is compiled again.
+        self.inferred[sensor] = dtype
+        self._infer_keys[sensor] = key
+        self._compile()
+        if self.cache is not None:
+            save_schema(self.cache, self.port, self.fingerprint,
+                        self.inferred, self._infer_keys)
+        return True
+
+    def _verify(self, raw):
+        """Checks the cached format against a line from the stream. If the line
+        parses, the cached format is adopted and the inference is skipped.
+
+        Returns:
+            tuple: `(vals, sensor)` for the parsed line, or `None` if the cached
+            format didn't parse it (in which case the line should be used for
+            inference as usual).
+        """
+        inferred, keys = self._cached
+        #We swap the cached format in; if it doesn't fit, the partial inference
+        #that was in place is restored.
+        current = self.inferred, self._infer_keys
+        self.inferred, self._infer_keys = inferred, keys
+        self._compile()
+        vals, sensor = self._parse_known(raw, False)
+        if vals is not None:
+            msg.std("{}: using the cached format {}.".format(self.port,
+                                                             inferred), 2)
+            self._cached = None
+            self._infer_count = self.infer_limit
+            return (vals, sensor)
+
+        self.inferred, self._infer_keys = current
+        self._parsers = self._dispatch = self._keyless = None
+        self._verify_count += 1
+        if self._verify_count >= self.verify_limit:
+            msg.std("{}: the cached format doesn't match the stream; "
+                    "inferring it again.".format(self.port), 2)
+            self._cached = None
+
+    def _compile(self):
+        """Compiles a specialized parser for each of the inferred formats.
+        """
+        from liveserial.config import compile_parser
+        self._parsers = {}
+        self._dispatch = {}
+        self._keyless = None
+        for k, dtype in self.inferred.items():
+            pos = self._infer_keys[k]
+            parser = compile_parser(dtype, pos, k, self.encoding)
+            self._parsers[k] = parser
+            if k is None:
+                self._keyless = parser
+            elif pos is not None:
+                token = k.encode(self.encoding) if self.encoding is not None else k
+                self._dispatch.setdefault(pos, {})[token] = (k, parser)
+
+_schema_lock = threading.Lock()
+"""threading.Lock: held while the schema cache is read, merged and replaced (see
+:func:`save_schema`), so that the monitor threads of a process don't lose each
+other's formats.
+"""
+
+def _read_schemas(cache):
+    """Returns the contents of the inferred-schema cache file, or an empty
+    dict if it doesn't exist or can't be read.
+    """
+    import json
+    from os import path
+    if not path.isfile(cache):
+        return {}
+    try:
+        with open(cache) as f:
+            return json.load(f)
+    except (IOError, ValueError) as e: # pragma: no cover
+        msg.warn("Couldn't read the schema cache {}: {}".format(cache, e), -1)
+        return {}
+
+def load_schema(cache, port, fingerprint):
+    """Returns the format that was inferred for a port in a previous session.
+
+    Args:
+        cache (str): path to the JSON cache file.
+        port (str): name of the port to return the format for.
+        fingerprint (list): of values that identify the stream's settings;
+          the cached format is ignored if they differ.
+
+    Returns:
+        tuple: `(inferred, keys)` with the same structure as the
+        :attr:`FormatInferrer.inferred` dict and the dict of key positions in
+        the raw line, or `None` if no format is cached for the port.
+    """
+    entry = _read_schemas(cache).get(port)
+    if entry is None or entry.get("fingerprint") != fingerprint:
+        return None
+    casts = {"int": int, "float": float}
+    inferred, keys = {}, {}
+    for fmt in entry["formats"]:
+        inferred[fmt["sensor"]] = [casts[t] for t in fmt["dtype"]]
+        keys[fmt["sensor"]] = fmt["key"]
+    return inferred, keys
+
+def save_schema(cache, port, fingerprint, inferred, keys):
+    """Stores the format inferred for a port in the cache file, keeping the
+    formats of the other ports that are in it.
+
+    Args:
+        cache (str): path to the JSON cache file.
+        port (str): name of the port that the format was inferred for.
+        fingerprint (list): of values that identify the stream's settings.
+        inferred (dict): see :attr:`FormatInferrer.inferred`.
+        keys (dict): keys are sensor ids; values are the positions of the keys
+          in the raw line.
+    """
+    import json, os, tempfile
+    from os import path
+    formats = [{"sensor": k, "key": keys[k],
+                "dtype": [t.__name__ for t in dtype]}
+               for k, dtype in inferred.items()]
+    folder = path.dirname(path.abspath(cache))
+    with _schema_lock:
+        schemas = _read_schemas(cache)
+        schemas[port] = {"fingerprint": fingerprint, "formats": formats}
+
+        #Monitors of several ports may be writing the cache, so it is replaced
+        #in one step rather than rewritten in place.
+        temp = None
         try:
-            for k, v in self._infer_keys.items():
-                if v is None:
-                    continue
-                if raw[v] == k:
-                    result = []
-                    for i in range(len(raw)):
-                        if i != v:
-                            caster = self.inferred[k][len(result)]
-                            result.append(caster(raw[i]))
-
-                    #This step makes sure that we have the right number of
-                    #points to return.
-                    if len(result) == len(self.inferred[k]):
-                        return (result, k)
-                    else: # pragma: no cover
-                        # We have multiple checks to make sure the lengths are
-                        # consistent, so this never fires in unit tests.
-                        return (None, k)
-            else:
-                return ([t(r) for t, r in zip(self.inferred[None], raw)], None)
-        except ValueError: # pragma: no cover
-            #If the inference works correctly, we have already worked through
-            #the formatting of the stream so that it should always parse
-            #properly.
-            return None, None
+            if not path.isdir(folder):
+                os.makedirs(folder)
+            handle, temp = tempfile.mkstemp(dir=folder)
+            with os.fdopen(handle, 'w') as f:
+                json.dump(schemas, f, indent=2)
+            if hasattr(os, "replace"):
+                os.replace(temp, cache)
+            else: # pragma: no cover
+                #Python 2 doesn't have an atomic replace on Windows.
+                if path.isfile(cache):
+                    os.remove(cache)
+                os.rename(temp, cache)
+        except (IOError, OSError) as e: # pragma: no cover
+            msg.warn("Couldn't write the schema cache {}: {}".format(cache, e),
+                     -1)
+            if temp is not None and path.isfile(temp):
+                os.remove(temp)
+
+def _thread_queue(maxsize=0):
+    """Returns a lock-light queue for monitors that run as threads in the same
+    process as the logger; records are passed by reference without pickling.
+    Bounded queues need the locking :class:`queue.Queue` instead.
+    """
+    if maxsize > 0:
+        from six.moves.queue import Queue
+        return Queue(maxsize)
+    try:
+        from queue import SimpleQueue
+    except ImportError: # pragma: no cover
+        #SimpleQueue is only available from python 3.7 onwards.
+        from six.moves.queue import Queue as SimpleQueue
+    return SimpleQueue()
+
+def _process_queue(maxsize=0):
+    """Returns a queue that can pass records between processes. Everything put
+    on it is pickled and written to a pipe by a feeder thread.
+    """
+    from multiprocessing import Queue
+    return Queue(maxsize)
+
+transports = {
+    "thread": _thread_queue,
+    "process": _process_queue
+    }
+"""dict: keys are transport names; values are functions that return a new,
+empty queue for moving data (or errors) from the monitors to the logger,
+holding at most `maxsize` items (unbounded if 0).
+"""
+
+def create_queue(transport="thread", maxsize=0):
+    """Returns a new queue for the specified transport.
+
+    Args:
+        transport (str): one of the keys in :data:`transports`. Use `thread`
+          when the monitor runs as a thread in this process, and `process` when
+          it runs in a separate process.
+        maxsize (int): maximum number of batches that the queue holds; when it
+          is full, the monitor applies its overflow policy (see
+          :data:`overflows`). If 0, the queue is unbounded.
+    """
+    if transport not in transports: # pragma: no cover
+        raise ValueError("Unknown transport '{}'; expected one of {}.".format(
+            transport, list(transports.keys())))
+    return transports[transport](int(maxsize))
+
+overflows = ["block", "drop-oldest", "drop-newest", "decimate"]
+"""list: policies that a monitor can apply when its (bounded) data queue is
+full:
+
+- `block`: waits for the logger to make room; the port's own buffer then
+  absorbs the backlog, until it overflows too.
+- `drop-oldest`: discards the oldest batch on the queue to make room.
+- `drop-newest`: discards the batch that was just read.
+- `decimate`: keeps only every `decimate_by`'th record of the batches read while
+  the queue is full, and publishes them once there is room again.
+"""
+
+def _split_whitespace(line):
+    """Splits an undecoded line on runs of whitespace."""
+    return line.split()
+
+def _split_comma(line):
+    """Splits an undecoded line on commas."""
+    return line.strip().split(b",")
+
+def _split_tab(line):
+    """Splits an undecoded line on tabs."""
+    return line.strip().split(b"\t")
+
+bytedelims = {
+    r"\s": _split_whitespace,
+    r"\s+": _split_whitespace,
+    ",": _split_comma,
+    r"\t": _split_tab,
+    "\t": _split_tab
+    }
+"""dict: keys are `delimiter` option values that are simple enough to split
+with :meth:`bytes.split` instead of a regex; values are the functions that split
+an undecoded line for them. Note that whitespace runs are treated as a single
+delimiter.
+"""
+bytencodings = ("ascii", "utf-8", "iso8859-1")
+"""tuple: normalized names of encodings for which any delimiter in
+:data:`bytedelims` and any digit of a number is a single byte with its ASCII
+value, so that undecoded lines can be split and cast directly.
+"""
+
+def _sync_bytes(sync):
+    """Returns the sync sequence for binary frames as `bytes`.
+
+    Args:
+        sync: a comma-separated `str` of integers (e.g. `0xAA,0x55`) as it
+          appears in the config file, or the bytes themselves. On python 2,
+          `str` *is* `bytes`, so the raw bytes have to be a `bytearray` there.
+    """
+    from six import string_types
+    if isinstance(sync, string_types):
+        return bytes(bytearray(int(b, 0) for b in sync.split(',')))
+    return bytes(bytearray(sync))
 
 rxdelims = {}
 """dict: keys are port names; values are compiled regex objects. We wanted to
@@ -125,19 +545,20 @@ put these in the thread object, but then it can't be pickled, which makes issues
 for the multiprocessing. Instead, we just have to do a dict lookup in the local
 :meth:`Thread.run()`.
 """        
-class ComMonitorThread(threading.Thread):
-    """ A thread for monitoring a COM port. The COM port is 
-        opened when the thread is started.
+class ComMonitor(object):
+    """ Base class for monitoring a COM port. The COM port is opened when the
+        monitor is started; :class:`ComMonitorThread` reads it on a thread
+        and :class:`ComMonitorProcess` in a separate process.
     
     Args:
-        data_q (multiprocessing.Queue):
-            Queue for received data. Items in the queue are
-            (data, timestamp) pairs, where data is a binary 
-            string representing the received data, and timestamp
-            is the time elapsed from the thread's start (in 
-            seconds).
+        data_q (queue.SimpleQueue):
+            Queue for received data (see :func:`create_queue`). Items in the queue are
+            batches (lists) of `(sensor, timestamp, values...)`
+            tuples; one batch is published for each read from
+            the port. The timestamp is the time elapsed from the
+            thread's start (in seconds).
         
-        error_q (multiprocessing.Queue):
+        error_q (queue.SimpleQueue):
             Queue for error messages. In particular, if the 
             serial port fails to open for some reason, an error
             is placed into this queue.
@@ -157,7 +578,7 @@ class ComMonitorThread(threading.Thread):
             The timeout used for reading the COM port. If this
             value is low, the thread will return data in finer
             grained chunks, with more accurate timestamps, but
-            it will also consume more CPU.
+            it will also consume more CPU. Ignored when `latency` is set.
         listener (bool): specifies that this COMThread is a listener, which prints
             out the raw stream in real-time, but doesn't analyze it.
         infer_limit (int): number of raw lines to consider before reaching consensus
@@ -169,9 +590,32 @@ class ComMonitorThread(threading.Thread):
             port.
         delimiter (str): regex describing the sequence of characters used to
             separate columns of values in a single line from the serial port.
+        protocol (str): one of ['text', 'binary']. For `binary`, the port sends
+            fixed-width frames that are decoded using the `payload` formats of
+            the configured sensors (see :class:`liveserial.framing.BinaryFramer`).
+        sync (str): for the binary protocol, the sequence of bytes that starts
+            every frame, as a comma-separated `str` of integers (e.g.
+            `0xAA,0x55`); `bytes` (`bytearray` on python 2) are also allowed.
+        checksum (str): for the binary protocol, the name of the checksum at the
+            end of every frame; see :data:`liveserial.framing.checksums`.
+        schema_cache (str): path to the file in which inferred formats are kept
+            between sessions; see :class:`FormatInferrer`.
+        overflow (str): policy applied when the data queue is bounded and full;
+            one of :data:`overflows`.
+        decimate_by (int): for the `decimate` overflow policy, keep one of every
+            `decimate_by` records while the queue is full.
+        latency (float): latency budget (in seconds) for the records of the
+            port. When set, the read timeout and the minimum number of bytes
+            per read are tuned to the port's arrival rate so that the records
+            are delivered within the budget with as few reads as possible (see
+            :meth:`_tune`); otherwise (0), every read returns as soon as any
+            bytes arrive and idle ports are polled every `port_timeout`.
     Attributes:
         alive (threading.Event): event for asynchronously handling the reads from
-          the serial port.
+          the serial port (a :func:`multiprocessing.Event` for processes).
+        framer (liveserial.framing.LineFramer): splits the chunks read from the
+          serial port into complete lines (or, for the binary protocol, a
+          :class:`liveserial.framing.BinaryFramer` that splits them into frames).
         serial_arg (dict): arguments used to contstruct the :class:`serial.Serial`.
         serial_port (serial.Serial): serial instance for communication.
         sensors (dict): keys are sensor names; values are
@@ -179,13 +623,41 @@ class ComMonitorThread(threading.Thread):
           parse raw lines read from the serial port.
         inferrer (FormatInferrer): for inferring the format in the absence of
             configured sensor structure.
+        overflow (str): policy applied when the data queue is full.
+        decimate_by (int): decimation factor of the `decimate` policy.
+        latency (float): latency budget of the port's records, or 0 for fixed
+          reads.
+        notify (threading.Event): set whenever a batch of records is put on the
+          data queue, so that the consumer can pick it up straight away (a
+          :func:`multiprocessing.Event` for processes); `None` if nobody is
+          listening. See the `push` argument of :class:`liveserial.log.Logger`.
+    """
+    held_limit = 4096
+    """int: maximum number of records held back by the `decimate` overflow
+    policy; once it is reached, the held records are decimated again, so that
+    they keep spanning the whole backlog with fewer points.
+    """
+    tuning_window = 1.
+    """float: number of seconds over which the arrival rate of the port is
+    averaged when the reads are tuned to a `latency` budget.
+    """
+    idle_timeout = 0.25
+    """float: read timeout (in seconds) of a port with a `latency` budget while
+    its reads return at the first byte; the timeout then only sets how quickly
+    the monitor notices that it was stopped.
+    """
+    max_batch = 65536
+    """int: upper bound on the minimum number of bytes per read chosen for a
+    `latency` budget.
     """
     def __init__(self, data_q, error_q, port, port_baud,
                  port_stopbits=serial.STOPBITS_ONE,
                  port_parity=serial.PARITY_NONE, port_timeout  = 0.01,
                  listener=False, virtual=False, infer_limit=15,
-                 encoding="UTF-8", delimiter=r"\s"):
-        threading.Thread.__init__(self)
+                 encoding="UTF-8", delimiter=r"\s", protocol="text",
+                 sync="0xAA", checksum="none", schema_cache=None,
+                 overflow="block", decimate_by=2, latency=0):
+        super(ComMonitor, self).__init__()
 
         self.port = port
         self.serial_port = None
@@ -204,10 +676,22 @@ class ComMonitorThread(threading.Thread):
         self.listener = listener
         self.encoding = encoding
         
-        import re
+        import re, codecs
         self.delimiter = delimiter
         global rxdelims
         rxdelims[port] = re.compile(delimiter)
+        self._bytesplit = None
+        """function: splits *undecoded* lines when the stream's encoding and
+        delimiter allow it (see :data:`bytedelims`); otherwise `None` and each
+        line is decoded and split with the delimiter regex.
+        """
+        if (delimiter in bytedelims and
+            codecs.lookup(encoding).name in bytencodings):
+            self._bytesplit = bytedelims[delimiter]
+        self._rawencoding = encoding if self._bytesplit is not None else None
+        """str: encoding that the sensor parsers must handle the split values
+        with, or `None` if the values are decoded `str` already.
+        """
         
         self.sensors = {}
         self._manual_sensors = False
@@ -215,15 +699,223 @@ class ComMonitorThread(threading.Thread):
         configuration file; otherwise, it was inferred from the first few lines
         of data from the serial port.
         """
+        self._dispatch = {}
+        """dict: keys are the column positions of sensor keys in the raw line;
+        values are dicts mapping key tokens at that position to `(name,
+        parser)` tuples for the :class:`liveserial.config.Sensor` that owns the
+        line. A value of `None` means that the sensor was filtered out and its
+        lines are rejected.
+        """
+        self._keyless = []
+        """list: of `(name, parser)` tuples for sensors without a key in the
+        stream; these are only tried when no keyed sensor claims the line.
+        """
+        self._rejected = []
+        """list: of :class:`liveserial.config.Sensor` instances that were
+        filtered out with :meth:`reject_sensor`.
+        """
+        self._reducers = {}
+        """dict: keys are sensor names; values are the
+        :class:`liveserial.decimation.Decimator` that reduce the sensor's
+        records before they are published (see
+        :meth:`liveserial.config.Sensor.decimator`).
+        """
         if infer_limit is not None:
-            self.inferrer = FormatInferrer(infer_limit)
+            #The inferred format only carries over to a new session if the
+            #stream is read the same way.
+            fingerprint = [self.serial_arg["baudrate"], encoding, delimiter]
+            self.inferrer = FormatInferrer(infer_limit, self._rawencoding,
+                                           schema_cache, port, fingerprint)
         else: # pragma: no cover
             self.inferrer = None
-        self.alive    = threading.Event()
+        self.protocol = protocol
+        if protocol == "binary":
+            self.framer = BinaryFramer(_sync_bytes(sync), checksum)
+        else:
+            self.framer = LineFramer()
+        self._frameids = {}
+        """dict: for the binary protocol, keys are frame ids; values are the
+        names of the sensors they belong to, or `None` for sensors that were
+        filtered out.
+        """
+        self._decoderr = 0
+        """int: number of times that decoding a line from the port has failed.
+        """
+        self._start = None
+        """int: value of :func:`clock_ns` when the port was opened; record
+        timestamps are the nanoseconds elapsed since then.
+        """
+        self._anchor = None
+        """multiprocessing.sharedctypes.RawArray: value of :func:`time.time`
+        when the port was opened (see :attr:`anchor`); shared memory so that
+        the anchor of a monitor process is visible to the logger.
+        """
+        self._schema = None
+        """multiprocessing.sharedctypes.RawArray: number of times that the
+        inferred format of a sensor changed (see :attr:`schema`); shared memory
+        so that the count of a monitor process is visible to the logger.
+        """
+        self._laststamp = 0
+        """int: timestamp of the last chunk read; records of the next chunk are
+        never stamped before it.
+        """
+        #Each byte on the wire has a start bit, 8 data bits, the parity bit
+        #(if any) and the stop bits.
+        bits = 9 + (port_parity != serial.PARITY_NONE) + float(port_stopbits)
+        self._bytetime = 1e9*bits/self.serial_arg["baudrate"]
+        """float: nanoseconds that it takes to transmit a byte at the port's
+        baud rate.
+        """
+        self._lastlisten = None
+        """int: value of :func:`clock_ns` when a listener last printed a line
+        from the stream.
+        """
+        self.latency = float(latency or 0)
+        if self.latency > 0:
+            self.serial_arg["timeout"] = max(self.latency, self.idle_timeout)
+        self._minbatch = 1
+        """int: minimum number of bytes that a read waits for before it returns
+        (unless the read timeout expires first).
+        """
+        self._rate = 0.
+        """float: running estimate of the port's arrival rate in bytes per
+        second.
+        """
+        self._lastread = None
+        """int: value of :func:`clock_ns` when the last read returned.
+        """
+        self._tuning = None
+        """multiprocessing.sharedctypes.RawArray: the arrival rate, the read
+        timeout and the minimum batch size chosen by :meth:`_tune`; shared
+        memory so that the values of a monitor process are visible to the
+        logger.
+        """
+        if overflow not in overflows: # pragma: no cover
+            raise ValueError("Unknown overflow policy '{}'; expected one of "
+                             "{}.".format(overflow, overflows))
+        self.overflow = overflow
+        self.decimate_by = max(int(decimate_by), 2)
+        self._held = []
+        """list: records kept back by the `decimate` overflow policy until
+        there is room on the data queue.
+        """
+        self._dropslots = None
+        """dict: keys are sensor names; values are their slots in
+        :attr:`_dropcounts`. Sensors that weren't configured share the last
+        slot.
+        """
+        self._dropcounts = None
+        """multiprocessing.sharedctypes.RawArray: number of records dropped for
+        each sensor; shared memory so that the counts of a monitor process are
+        visible to the logger.
+        """
+        self.notify = None
+        self.alive    = self._event()
         self.alive.set()
 
-    @staticmethod
-    def from_port(port, port_baud=9600, virtual=False):
+    def __getstate__(self):
+        """Drops the compiled sensor parsers so that the monitor can be pickled
+        when a process is started with the `spawn` or `forkserver` methods.
+        """
+        state = self.__dict__.copy()
+        state["_dispatch"] = {}
+        state["_keyless"] = []
+        return state
+
+    def __setstate__(self, state):
+        """Restores the monitor in a new process, recompiling the delimiter
+        regex and the sensor parsers.
+        """
+        self.__dict__.update(state)
+        import re
+        rxdelims[self.port] = re.compile(self.delimiter)
+        sensors, rejected = self.sensors, self._rejected
+        self.sensors, self._rejected = {}, []
+        for name, sensor in sensors.items():
+            self.add_sensor(name, sensor)
+        for sensor in rejected:
+            self.reject_sensor(sensor)
+
+    @property
+    def dropped(self):
+        """dict: keys are sensor names; values are the number of records of the
+        sensor that were dropped because the data queue was full. Records of
+        sensors that weren't configured (i.e., inferred) are counted under
+        `None`.
+        """
+        if self._dropcounts is None:
+            return {}
+        result = dict((name, self._dropcounts[slot])
+                      for name, slot in self._dropslots.items())
+        if self._dropcounts[-1] > 0:
+            result[None] = self._dropcounts[-1]
+        return result
+
+    @property
+    def anchor(self):
+        """float: value of :func:`time.time` when the port was (last) opened, so
+        that the record timestamps can be converted to wall-clock times; `None`
+        until the port is open.
+        """
+        if self._anchor is None or self._anchor[0] == 0:
+            return None
+        return self._anchor[0]
+
+    @property
+    def schema(self):
+        """int: number of times that the inferred format of one of the port's
+        sensors changed (see :attr:`FormatInferrer.schema`). It is updated
+        before the first records of the new format are published, so consumers
+        that see it move know that the records they read next may have
+        different types or a different number of values.
+        """
+        return 0 if self._schema is None else self._schema[0]
+
+    @property
+    def stats(self):
+        """dict: read statistics of the port: `rate` is the estimated arrival
+        rate in bytes per second, `timeout` the current read timeout in seconds
+        and `minbatch` the minimum number of bytes that each read waits for.
+        """
+        if self._tuning is None:
+            rate, timeout, minbatch = 0., self.serial_arg["timeout"], 1
+        else:
+            rate, timeout, minbatch = self._tuning
+        return {"rate": rate, "timeout": timeout, "minbatch": int(minbatch)}
+
+    def _init_drops(self):
+        """Allocates the counters of dropped records for the configured sensors,
+        and the shared read statistics (see :attr:`stats`), :attr:`anchor` and
+        :attr:`schema`.
+        This is done right before the monitor starts, once its sensors are
+        known.
+        """
+        from ctypes import c_longlong
+        from multiprocessing.sharedctypes import RawArray
+        names = sorted(self.sensors, key=str)
+        self._dropslots = dict((n, i) for i, n in enumerate(names))
+        #Python 2 has no 'q' typecode for the shared arrays.
+        self._dropcounts = RawArray(c_longlong, len(names) + 1)
+        self._tuning = RawArray('d', [0., self.serial_arg["timeout"], 1])
+        self._anchor = RawArray('d', 1)
+        self._schema = RawArray(c_longlong, 1)
+
+    def _count_drops(self, records):
+        """Adds the records of a batch that is being dropped to the counters."""
+        slots, counts = self._dropslots, self._dropcounts
+        other = len(counts) - 1
+        for record in records:
+            counts[slots.get(record[0], other)] += 1
+
+    def start(self):
+        """Starts monitoring the port (see :meth:`threading.Thread.start`).
+        """
+        self._init_drops()
+        super(ComMonitor, self).start()
+
+    @classmethod
+    def from_port(cls, port, port_baud=9600, virtual=False, schema_cache=None,
+                  maxsize=0, overflow="block", decimate_by=2, latency=0):
         """Returns a COMMonitor instance for the specified port using the
         default configurati of port parameters and with inferrence for the structure
         of the data.
@@ -236,15 +928,26 @@ class ComMonitorThread(threading.Thread):
             port_baud (int):
                 Rate at which information is transferred in a communication channel
                 (in bits/second).    
+            schema_cache (str): path to the file in which the inferred format
+                is kept between sessions.
+            maxsize (int): maximum number of batches on the data queue; 0 for
+                an unbounded queue.
+            overflow (str): policy applied when the data queue is full; one of
+                :data:`overflows`.
+            decimate_by (int): decimation factor for the `decimate` overflow
+                policy.
+            latency (float): latency budget (in seconds) that the reads are
+                tuned to; 0 to read at the first byte.
         """
-        from multiprocessing import Queue
-        dataq = Queue()
-        errorq = Queue()
-        return ComMonitorThread(dataq, errorq, port, port_baud, virtual=virtual)
+        dataq = create_queue(cls.transport, maxsize)
+        errorq = create_queue(cls.transport)
+        return cls(dataq, errorq, port, port_baud, virtual=virtual,
+                   schema_cache=schema_cache, overflow=overflow,
+                   decimate_by=decimate_by, latency=latency)
         
-    @staticmethod
-    def from_config(config, port, dataq=None, errorq=None, listener=False,
-                    sfilter=None):
+    @classmethod
+    def from_config(cls, config, port, dataq=None, errorq=None, listener=False,
+                    sfilter=None, schema_cache=None, defaults=None):
         """Returns a COMMonitor instance from the specified configuration
         parser.
 
@@ -253,13 +956,12 @@ class ComMonitorThread(threading.Thread):
               and port information. `str` is also allowed, in which case it
               should be the path to the config file to load.
             port (str): name of the port to configure for.
-            data_q (multiprocessing.Queue):
+            data_q (queue.SimpleQueue):
                 Queue for received data. Items in the queue are
-                (data, timestamp) pairs, where data is a binary 
-                string representing the received data, and timestamp
-                is the time elapsed from the thread's start (in 
-                seconds).            
-            error_q (multiprocessing.Queue):
+                batches (lists) of `(sensor, timestamp, values...)`
+                tuples; one batch is published for each read from
+                the port.
+            error_q (queue.SimpleQueue):
                 Queue for error messages. In particular, if the 
                 serial port fails to open for some reason, an error
                 is placed into this queue.
@@ -268,34 +970,48 @@ class ComMonitorThread(threading.Thread):
             sfilter (list): of sensor names that should be *included* in the
               monitor. By default, all sensors in the config are included that
               match the port.
+            schema_cache (str): path to the file in which the inferred format
+              is kept between sessions, for ports without configured sensors.
+            defaults (dict): port options (such as `maxsize` or `overflow`) to
+              use when the port's section doesn't set them; see
+              :func:`liveserial.config.ports`.
         Returns:
-            ComMonitorThread: instance created using the configuration
-            parameters.
+            ComMonitor: instance of the class this is called on, created using
+            the configuration parameters. The `process` option of the port is
+            ignored here; see :func:`monitor_class`. If the port has a
+            `maxsize`, the monitor gets its own bounded data queue instead of
+            `dataq`.
         """        
-        from multiprocessing import Queue
         #We allow the user to choose to use a common data and error queue
         #between all the threads. If they don't specify one, then we will just
         #create a new one.
 
         #This method is usually called from the entry script, which allows all
-        #the ports to share the same multiprocessing queues by default.
+        #the ports to share the same queues by default.
         if dataq is None: # pragma: no cover
-            dataq = Queue()
+            dataq = create_queue(cls.transport)
         if errorq is None: # pragma: no cover
-            errorq = Queue()
+            errorq = create_queue(cls.transport)
 
         from liveserial.config import ports
-        params = ports(config, port)
+        params = ports(config, port, defaults).copy()
+        del params["process"]
+        maxsize = int(params.pop("maxsize"))
+        if maxsize > 0:
+            #The bound applies to each port, so the port can't share a queue.
+            dataq = create_queue(cls.transport, maxsize)
         vtext = "{}: using {} as config-set serial parameters."
         msg.std(vtext.format(port, params))
-        result = ComMonitorThread(dataq, errorq, port, listener=listener,
-                                  **params)
+        result = cls(dataq, errorq, port, listener=listener,
+                     schema_cache=schema_cache, **params)
 
         from liveserial.config import sensors, Sensor
         sdict = sensors(config, port=port, monitor=result)
         for sensor, instance in sdict.items():
             if (sfilter is None or sfilter == "all") or sensor in sfilter:
                 result.add_sensor(sensor, instance)
+            else:
+                result.reject_sensor(instance)
 
         return result
 
@@ -311,69 +1027,199 @@ class ComMonitorThread(threading.Thread):
         """
         self._manual_sensors = True
         self.sensors[name] = sensor
-        
-    def run(self):
-        """Starts the COM monitoring thread. If an existing serial connection is
-        open, it will be closed and a new one will be created. The monitoring
-        will continue indefinitely until :meth:`join` is called.
-        """
-        try:
-            if self.serial_port: # pragma: no cover
-                self.serial_port.close()
-            self.serial_port = serial.Serial(**self.serial_arg)
-            msg.info("Serial port communication enabled.", 2)
-        except serial.SerialException as e: # pragma: no cover
-            self.error_q.put(e.strerror)
+        decimator = sensor.decimator()
+        if decimator is not None:
+            self._reducers[name] = decimator
+        if self.protocol == "binary":
+            self._add_layout(sensor, name)
             return
 
-        from time import time
-        start = time()
-        lastlisten = None
-        decoderr = 0 #Number of types the decode has failed.
-        rxsplit = rxdelims[self.port]
+        entry = (sensor.name, sensor.parser(self._rawencoding))
+        if sensor._keyloc is not None:
+            table = self._dispatch.setdefault(sensor._keyloc, {})
+            table[self._token(sensor.key)] = entry
+        else:
+            self._keyless.append(entry)
+
+    def _add_layout(self, sensor, name):
+        """Registers the binary frame layout of the specified sensor with the
+        framer.
+
+        Args:
+            sensor (liveserial.config.Sensor): with `sensor_id` and `payload`
+              configured.
+            name (str): name to publish the sensor's records under, or `None` if
+              its frames should be dropped.
+        """
+        if sensor.sensor_id is None or sensor.struct is None:
+            raise ValueError("Sensor '{}' needs 'sensor_id' and 'payload' options "
+                             "on the binary port {}.".format(sensor.name,
+                                                             self.port))
+        self._frameids[sensor.sensor_id] = name
+        self.framer.add_layout(sensor.sensor_id, sensor.struct)
+
+    def _token(self, key):
+        """Returns the sensor key as it will appear in the split line.
+        """
+        if self._rawencoding is not None:
+            return key.encode(self._rawencoding)
+        return key
+
+    def reject_sensor(self, sensor):
+        """Registers the key of a configured sensor that is *not* being
+        monitored (for example, because of the `-sensors` filter) so that its
+        lines are rejected before any values are cast.
+
+        Args:
+            sensor (liveserial.config.Sensor): instance whose lines should be
+              ignored.
+        """
+        if self.protocol == "binary":
+            #The framer still needs the layout to skip over the frames.
+            self._add_layout(sensor, None)
+            self._rejected.append(sensor)
+        elif sensor._keyloc is not None:
+            table = self._dispatch.setdefault(sensor._keyloc, {})
+            token = self._token(sensor.key)
+            if table.get(token) is None:
+                table[token] = None
+            self._rejected.append(sensor)
         
-        while self.alive.isSet():
-            line = self.serial_port.readline()                
-            if self.listener:
-                if lastlisten is None or time() - lastlisten > 0.05:
-                    print(line)
-                    lastlisten = time()
-                #This is crazy to me... The if statement above and its contents
-                #are covered by the unit tests, but coverage claims that this
-                #continue statement is not...
-                continue # pragma: no cover
+    def _read_chunk(self):
+        """Reads all the bytes that are currently waiting on the serial port in
+        a single call. If nothing is waiting, this blocks for at most the port
+        timeout until the first byte arrives.
+
+        With a `latency` budget, the read also waits for the minimum batch
+        size chosen by :meth:`_tune`, or for the timeout, whichever comes
+        first.
+
+        Returns:
+            bytes: raw chunk read from the port; may be empty if the read timed
+            out.
+        """
+        port = self.serial_port
+        data = port.read(max(port.in_waiting, self._minbatch))
+        waiting = port.in_waiting
+        if waiting > 0:
+            data += port.read(waiting)
+        return data
 
+    def _parse_line(self, line):
+        """Parses a single, complete line read from the serial port.
+
+        Args:
+            line (bytes): raw line read from the port, without its terminator.
+
+        Returns:
+            tuple: `(sensor, vals)` where `vals` is a list of values cast using
+            the sensor's configuration, or `None` if the line couldn't be parsed.
+        """
+        if self._bytesplit is not None:
+            #Fast path: ints and floats can be cast straight from the bytes, so
+            #we skip the decoding and the regex split altogether.
+            raw = self._bytesplit(line)
+            if len(raw) == 0:
+                return None, None
+        else:
+            raw = self._decode_split(line)
+            if raw is None: # pragma: no cover
+                return None, None
+
+        if self._manual_sensors:
+            return self._dispatch_line(raw)
+        elif self.inferrer is not None:
+            #We try to infer the structure of the data from the raw line.
             try:
-                raw = line.decode(self.encoding).strip()
-            except: # pragma: no cover
-                #It is too much hassle to get our port data simulator to simulate garbage
-                #for now. TODO: update the simulator to randomly spew out garbage.
-                if len(line) > 0:
-                    decoderr += 1
-                    if decoderr < 3:
-                        emsg = "Couldn't decode line {} using {}."
-                        msg.warn(emsg.format(line, self.encoding), -1)
-
-            raw = rxsplit.split(raw)
-            if len(raw) == 0: # pragma: no cover
-                #No data read from the stream.
+                vals, sensor = self.inferrer.parse(raw)
+            except UnicodeDecodeError:
+                #With the fast path, only the sensor key gets decoded; a key
+                #that isn't text is just noise on the line.
+                self._decode_error(line)
+                return None, None
+            return sensor, vals
+        else: # pragma: no cover
+            return None, None
+
+    def _decode_split(self, line):
+        """Decodes a line using the port's encoding and splits it with the
+        delimiter regex.
+
+        Returns:
+            list: of `str` values split from the line, or `None` if it couldn't
+            be decoded.
+        """
+        try:
+            raw = line.decode(self.encoding).strip()
+        except: # pragma: no cover
+            #It is too much hassle to get our port data simulator to simulate garbage
+            #for now. TODO: update the simulator to randomly spew out garbage.
+            self._decode_error(line)
+            return None
+
+        raw = rxdelims[self.port].split(raw)
+        if len(raw) == 0: # pragma: no cover
+            #No data read from the stream.
+            return None
+        return raw
+
+    def _decode_error(self, line):
+        """Counts a line that couldn't be decoded with the port's encoding; the
+        first few are also reported.
+        """
+        if len(line) > 0:
+            self._decoderr += 1
+            if self._decoderr < 3:
+                emsg = "Couldn't decode line {} using {}."
+                msg.warn(emsg.format(line, self.encoding), -1)
+
+    def _dispatch_line(self, raw):
+        """Routes a split line to the configured sensor that owns its key using
+        the dispatch index; keyless sensors are only tried as a fallback.
+
+        Args:
+            raw (list): of `str` (or `bytes`) values split from a single line.
+
+        Returns:
+            tuple: `(sensor, vals)` as for :meth:`_parse_line`.
+        """
+        nraw = len(raw)
+        for keyloc, table in self._dispatch.items():
+            if keyloc >= nraw or raw[keyloc] not in table:
                 continue
-            
-            vals, sensor = None, None
-            if self._manual_sensors:
-                for osensor in self.sensors.values():
-                    vals, skey = osensor.parse(raw), osensor.key
-                    sensor = osensor.name
-                    #The parsing will return None if the raw line does not apply
-                    #to its configuration. The moment we found the one that does
-                    #apply, there is not sense in still checking.
-                    if vals is not None:
-                        break
-            else:
-                #We try to infer the structure of the data from the raw line.
-                if self.inferrer is not None:
-                    vals, sensor = self.inferrer.parse(raw)
+            entry = table[raw[keyloc]]
+            if entry is None:
+                #The sensor exists in the configuration, but it was filtered
+                #out; there is no sense in casting its values.
+                return None, None
+            return entry[0], entry[1](raw)
+
+        for name, parser in self._keyless:
+            vals = parser(raw)
+            #The parsing will return None if the raw line does not apply
+            #to its configuration. The moment we found the one that does
+            #apply, there is not sense in still checking.
+            if vals is not None:
+                return name, vals
 
+        return None, None
+
+    def _parse_lines(self, lines, stamps):
+        """Parses a batch of complete lines that were read off the serial port
+        together.
+
+        Args:
+            lines (list): of `bytes`; complete lines returned by the framer.
+            stamps (list): of `int` timestamps of the lines; see
+              :meth:`_stamps`.
+
+        Returns:
+            list: of `(sensor, timestamp, values...)` tuples for each line that
+            could be parsed. Lines that don't parse are dropped.
+        """
+        records = []
+        for line, timestamp in zip(lines, stamps):
+            sensor, vals = self._parse_line(line)
             if vals is not None and len(vals) > 0:
                 if sensor is None:
                     #We use the id of the com thread (which corresponds
@@ -381,18 +1227,296 @@ class ComMonitorThread(threading.Thread):
                     #way, multiple inferred, null-key sensors from different
                     #ports can still be differentiated in the logs.
                     sensor = id(self)
-                timestamp = time() - start
-                self.data_q.put((sensor, timestamp) + tuple(vals))
+                records.append((sensor, timestamp) + tuple(vals))
             #else:
             # There must have been a communication glitch; just ignore
             # this data point.
+        return records
+
+    def _parse_frames(self, frames, stamps):
+        """Converts a batch of decoded binary frames to records.
+
+        Args:
+            frames (list): of `(frameid, values)` tuples returned by the
+              :class:`liveserial.framing.BinaryFramer`.
+            stamps (list): of `int` timestamps of the frames; see
+              :meth:`_stamps`.
+
+        Returns:
+            list: of `(sensor, timestamp, values...)` tuples; frames of sensors
+            that are filtered out are dropped.
+        """
+        names = self._frameids
+        return [(names[fid], timestamp) + values
+                for (fid, values), timestamp in zip(frames, stamps)
+                if names[fid] is not None]
+
+    def _stamps(self, sizes, nbytes, timestamp):
+        """Returns the arrival times of the records completed by a chunk. The
+        last byte of the chunk arrived at `timestamp`; each earlier record
+        ended one byte time (at the port's baud rate) per byte that followed
+        it. The times are squeezed between the previous chunk and this one when
+        the bytes arrived faster than the baud rate (e.g., on virtual ports).
+
+        Args:
+            sizes (list): of the number of bytes in each record, including its
+              terminator.
+            nbytes (int): number of bytes in the chunk that came after the end
+              of the last record.
+            timestamp (int): nanoseconds since the port was opened at which the
+              chunk was read.
+
+        Returns:
+            list: of `int` timestamps, one for each record.
+        """
+        span = nbytes + sum(sizes)
+        bytetime = self._bytetime
+        if span*bytetime > timestamp - self._laststamp:
+            bytetime = (timestamp - self._laststamp)/float(max(span, 1))
+        self._laststamp = timestamp
+
+        stamps = []
+        for size in reversed(sizes):
+            stamps.append(timestamp - int(nbytes*bytetime))
+            nbytes += size
+        stamps.reverse()
+        return stamps
+
+    def _parse_chunk(self, chunk, timestamp):
+        """Frames and parses a chunk of bytes read from the serial port.
+
+        Args:
+            chunk (bytes): raw chunk read from the port.
+            timestamp (int): nanoseconds since the port was opened (see
+              :func:`clock_ns`) at which the chunk was read.
+
+        Returns:
+            list: of `(sensor, timestamp, values...)` tuples for each complete
+            record in the chunk; sensors that are decimated or rate limited
+            only contribute their reduced records. The records are stamped
+            with their interpolated arrival times (see :meth:`_stamps`).
+        """
+        framer = self.framer
+        if self.protocol == "binary":
+            frames = framer.feed(chunk)
+            sizes = [framer.frame_size(fid) for fid, values in frames]
+            stamps = self._stamps(sizes, len(framer.buffer), timestamp)
+            records = self._parse_frames(frames, stamps)
+        else:
+            lines = framer.feed(chunk)
+            term = len(framer.terminator)
+            sizes = [len(line) + term for line in lines]
+            stamps = self._stamps(sizes, len(framer.buffer), timestamp)
+            records = self._parse_lines(lines, stamps)
+            inferrer = self.inferrer
+            if (inferrer is not None and self._schema is not None and
+                inferrer.changes != self._schema[0]):
+                self._schema[0] = inferrer.changes
+        if self._reducers:
+            records = self._reduce(records)
+        return records
+
+    def _reduce(self, records):
+        """Replaces the records of the sensors that are decimated or rate
+        limited by their reduced stream; the other records pass through
+        untouched.
+        """
+        result = []
+        reducers = self._reducers
+        for record in records:
+            decimator = reducers.get(record[0])
+            if decimator is None:
+                result.append(record)
+            else:
+                result.extend(decimator.push(record))
+        return result
+
+    def _open(self):
+        """Opens the serial port (closing any existing connection first) and
+        resets the framing state.
+
+        Returns:
+            bool: True if the port was opened; otherwise, the error is placed on
+            the error queue.
+        """
+        try:
+            if self.serial_port: # pragma: no cover
+                self.serial_port.close()
+            self.serial_port = serial.Serial(**self.serial_arg)
+            msg.info("Serial port communication enabled.", 2)
+        except serial.SerialException as e: # pragma: no cover
+            self.error_q.put(e.strerror)
+            return False
+
+        from time import time
+        self._start = clock_ns()
+        anchor = time()
+        self._laststamp = 0
+        self._lastread = self._start
+        self._rate, self._minbatch = 0., 1
+        self._lastlisten = None
+        self._decoderr = 0
+        self.framer.reset()
+        for decimator in self._reducers.values():
+            decimator.reset()
+        if self._dropcounts is None:
+            #Monitors that are driven by a multiplexer or an event loop are
+            #never started themselves.
+            self._init_drops()
+        self._tuning[:] = [0., self.serial_arg["timeout"], 1]
+        self._anchor[0] = anchor
+        return True
+
+    def _put(self, records):
+        """Puts a batch of records on the data queue, applying the overflow
+        policy if the queue is full.
+        """
+        q = self.data_q
+        if hasattr(q, "drain"):
+            #Shared-memory rings drop whatever doesn't fit by themselves.
+            n = q.put(records)
+            if n < len(records):
+                self._count_drops(records[n:])
+            return
+
+        if self._held:
+            try:
+                q.put_nowait(self._held)
+                self._held = []
+            except Full:
+                self._decimate(records)
+                return
+        try:
+            q.put_nowait(records)
+            return
+        except Full:
+            pass
+
+        if self.overflow == "block":
+            timeout = self.serial_arg["timeout"] or 0.01
+            while self.alive.is_set():
+                try:
+                    q.put(records, True, timeout)
+                    return
+                except Full:
+                    continue
+            self._count_drops(records)
+        elif self.overflow == "drop-oldest":
+            #The logger may empty the queue at any point, so we only try a few
+            #times before giving up on the batch.
+            for attempt in range(3):
+                try:
+                    self._count_drops(q.get_nowait())
+                except Empty: # pragma: no cover
+                    pass
+                try:
+                    q.put_nowait(records)
+                    return
+                except Full: # pragma: no cover
+                    continue
+            self._count_drops(records) # pragma: no cover
+        elif self.overflow == "drop-newest":
+            self._count_drops(records)
+        else:
+            self._decimate(records)
+
+    def _decimate(self, records):
+        """Holds back every `decimate_by`'th record of a batch that didn't fit
+        on the data queue and counts the others as dropped.
+        """
+        n = self.decimate_by
+        self._held.extend(records[::n])
+        self._count_drops([r for i, r in enumerate(records) if i % n])
+        if len(self._held) > self.held_limit:
+            held = self._held
+            self._count_drops([r for i, r in enumerate(held) if i % n])
+            self._held = held[::n]
+
+    def _publish(self, chunk, now):
+        """Frames and parses a chunk of bytes read from the serial port and puts
+        the records on the data queue; listeners print the raw stream instead.
+
+        Args:
+            chunk (bytes): raw chunk read from the port.
+            now (int): value of :func:`clock_ns` when the chunk was read.
+        """
+        if self.listener:
+            lines = self.framer.feed(chunk)
+            if len(lines) > 0 and (self._lastlisten is None
+                                   or now - self._lastlisten > 50000000):
+                print(lines[-1])
+                self._lastlisten = now
+            return
+
+        records = self._parse_chunk(chunk, now - self._start)
+        if len(records) > 0:
+            #The whole batch goes onto the queue in one operation so that
+            #the queue overhead is paid per read instead of per line.
+            self._put(records)
+            notify = self.notify
+            if notify is not None and not notify.is_set():
+                notify.set()
+
+    def _tune(self, nbytes, now):
+        """Updates the estimate of the port's arrival rate after a read. With a
+        `latency` budget, the minimum batch size is then set to the number of
+        bytes that arrive within the budget, and the read timeout to the budget
+        itself, so that a read returns once about `latency` seconds worth of
+        records are waiting. Slow ports, for which less than two bytes arrive
+        within the budget, go back to reading whatever is there as soon as
+        it arrives, with the longer :attr:`idle_timeout`.
+
+        Args:
+            nbytes (int): number of bytes returned by the read.
+            now (int): value of :func:`clock_ns` when the read returned.
+        """
+        elapsed = (now - self._lastread)/1e9
+        self._lastread = now
+        if elapsed <= 0: # pragma: no cover
+            return
+        weight = min(1., elapsed/self.tuning_window)
+        self._rate += weight*(nbytes/elapsed - self._rate)
+        self._tuning[0] = self._rate
+        if not self.latency > 0:
+            return
+
+        minbatch = min(int(self._rate*self.latency), self.max_batch)
+        if minbatch < 2:
+            minbatch, timeout = 1, max(self.latency, self.idle_timeout)
+        else:
+            timeout = self.latency
+        self._minbatch = minbatch
+        self._tuning[2] = minbatch
+        if timeout != self.serial_port.timeout:
+            #Changing the timeout reconfigures the port, so it only happens
+            #when the port switches between batching and idle reads.
+            self.serial_port.timeout = timeout
+            self._tuning[1] = timeout
+
+    def run(self):
+        """Starts the COM monitoring loop. If an existing serial connection is
+        open, it will be closed and a new one will be created. The monitoring
+        will continue indefinitely until :meth:`join` is called.
+        """
+        if not self._open(): # pragma: no cover
+            return
+
+        while self.alive.is_set():
+            chunk = self._read_chunk()
+            #The chunk is stamped as soon as it is read, before any of the
+            #decoding and parsing.
+            now = clock_ns()
+            if len(chunk) > 0:
+                self._publish(chunk, now)
+            self._tune(len(chunk), now)
             
         # clean up
         if self.serial_port:
             self.serial_port.close()
             
     def join(self, timeout=None, terminate=True):
-        """Tells the thread monitoring the COM port to clean up and return.
+        """Tells the thread (or process) monitoring the COM port to clean up and
+        return.
 
         Args:
             timeout (float): number of seconds (or fractions of seconds) to wait
@@ -405,7 +1529,49 @@ class ComMonitorThread(threading.Thread):
         """
         if terminate:
             self.alive.clear()
-        threading.Thread.join(self, timeout)
+        super(ComMonitor, self).join(timeout)
+
+class ComMonitorThread(ComMonitor, threading.Thread):
+    """A thread for monitoring a COM port in the current process. See
+    :class:`ComMonitor` for the constructor arguments.
+    """
+    transport = "thread"
+    """str: name of the queue transport (see :data:`transports`) that can carry
+    data from this kind of monitor to the logger.
+    """
+    _event = staticmethod(threading.Event)
+
+class ComMonitorProcess(ComMonitor, multiprocessing.Process):
+    """A separate process for monitoring a COM port, so that reading and parsing
+    the port doesn't compete with the other ports, the logger or the plotter for
+    the GIL. The start/join contract is the same as for
+    :class:`ComMonitorThread`, but the data and error queues must be created
+    with the `process` transport (see :func:`create_queue`). See
+    :class:`ComMonitor` for the constructor arguments.
+    """
+    transport = "process"
+    """str: name of the queue transport (see :data:`transports`) that can carry
+    data from this kind of monitor to the logger.
+    """
+    _event = staticmethod(multiprocessing.Event)
+
+    def run(self):
+        """Runs the COM monitoring loop in the child process.
+        """
+        #Keyboard interrupts are handled by the parent process, which tells us to
+        #stop by calling :meth:`join`.
+        import signal
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        super(ComMonitorProcess, self).run()
+
+def monitor_class(process=False):
+    """Returns the monitor class to use for a port.
+
+    Args:
+        process (bool): when True, the port is monitored in its own process;
+          otherwise on a thread.
+    """
+    return ComMonitorProcess if process else ComMonitorThread
 
 def enumerate_serial_ports():
     """Scans for available serial ports.
@@ -446,7 +1612,9 @@ def get_all_from_queue(Q):
         while True:
             yield Q.get_nowait()
     except Empty:
-        raise StopIteration
+        #Raising StopIteration inside a generator is an error since PEP 479;
+        #returning ends the iteration in the same way.
+        return
 
 def get_item_from_queue(Q, timeout=0.01):
     """ Attempts to retrieve an item from the queue Q. If Q is
@@ -460,24 +1628,200 @@ def get_item_from_queue(Q, timeout=0.01):
             items (use get_all_from_queue for that).
     """
     try: 
-        item = Q.get(True, 0.01)
+        item = Q.get(True, timeout)
     except Empty: 
         return None
     return item
 
+class _History(object):
+    """Fixed-capacity ring of the data points of a single sensor. Each point is
+    written twice, `capacity` rows apart, so that the latest `capacity` points
+    are always a contiguous slice of the buffer and can be handed out as views
+    without copying.
+
+    There is a single writer (the logger) and no lock: the writer only bumps
+    :attr:`count` once a point is completely written, so readers that copy
+    points out of the ring can tell afterwards whether the writer overwrote any
+    of them in the meantime (see :meth:`copy`).
+
+    Args:
+        capacity (int): maximum number of points kept.
+        ncols (int): number of columns (timestamp plus values) in each point.
+        count (int): number of points that were appended before this ring was
+          created; it keeps the counts in step with the feed versions when a
+          sensor's ring has to be replaced.
+    """
+    def __init__(self, capacity, ncols, count=0):
+        import numpy as np
+        self.capacity = capacity
+        self.ncols = ncols
+        self._buffer = np.zeros((2*capacity, ncols))
+        self._first = count
+        """int: value of :attr:`count` when the ring was created.
+        """
+        self.count = count
+        """int: number of points that have been appended, ever.
+        """
+
+    def append(self, point):
+        """Appends a single data point to the ring."""
+        slot = self.count % self.capacity
+        self._buffer[slot] = point
+        self._buffer[slot + self.capacity] = point
+        self.count += 1
+
+    def _window(self, count, n):
+        """Returns a view of the last `n` of the first `count` points."""
+        n = max(0, min(n, count - self._first, self.capacity))
+        end = count % self.capacity + self.capacity
+        return self._buffer[end - n:end]
+
+    def last(self, n=None):
+        """Returns a view of the last `n` points (all of them if `None`)."""
+        return self._window(self.count, self.capacity if n is None else n)
+
+    def since(self, t):
+        """Returns a view of the points with a timestamp later than `t`."""
+        window = self.last()
+        return window[window[:, 0].searchsorted(t, side="right"):]
+
+    def copy(self, after):
+        """Returns a consistent copy of the points appended after the first
+        `after` ones, retrying if the writer overwrote any of them while they
+        were being copied.
+
+        Returns:
+            tuple: `(count, points)`, where `count` is the number of points that
+            had been appended when the copy was taken.
+        """
+        while True:
+            count = self.count
+            #The writer may be halfway through the point after `count`, which
+            #overwrites the oldest point in the ring; so at most `capacity - 1`
+            #points can be copied consistently.
+            n = min(count - after, self.capacity - 1)
+            points = self._window(count, n).copy()
+            if self.count - count + len(points) < self.capacity:
+                return count, points
+
+class FeedReader(object):
+    """Reader of a :class:`LiveDataFeed` with its own cursor, so that several
+    consumers (plotter, console printer, exporters) can each find out what is
+    new since *they* last read, independently of the others. Reading never
+    blocks the writer: snapshots are published atomically and the history is
+    copied optimistically (see :meth:`read_new`).
+
+    Args:
+        feed (LiveDataFeed): feed to read from.
+
+    Attributes:
+        versions (dict): keys are sensor identifiers; values are the feed
+          version of the latest point that this reader has read.
+    """
+    def __init__(self, feed):
+        self.feed = feed
+        self.versions = {}
+
+    def has_new_data(self, sensor):
+        """Returns True if the sensor has points that this reader hasn't read.
+        """
+        return self.feed.version.get(sensor, 0) > self.versions.get(sensor, 0)
+
+    def read_data(self, sensor):
+        """Returns the most recent data point of the sensor and moves the
+        cursor up to it.
+        """
+        version, data = self.feed.snapshot(sensor)
+        self.versions[sensor] = version
+        return data
+
+    def wait(self, sensor, timeout=None):
+        """Blocks until the sensor has points that this reader hasn't read (see
+        :meth:`LiveDataFeed.wait`).
+
+        Returns:
+            bool: True if there are new points; False if the timeout expired.
+        """
+        return self.feed.wait(sensor, self.versions.get(sensor, 0), timeout)
+
+    def read_new(self, sensor):
+        """Returns a copy of all the points of the sensor that this reader
+        hasn't read yet, oldest first, and moves the cursor up to the last of
+        them. Points that were pushed out of the feed's history before they were
+        read are lost.
+
+        Returns:
+            numpy.ndarray: of shape `(n, 1 + number of values)`; the first
+            column holds the timestamps.
+        """
+        import numpy as np
+        history = self.feed._history.get(sensor)
+        if history is None:
+            return np.empty((0, 0))
+        count, points = history.copy(self.versions.get(sensor, 0))
+        self.versions[sensor] = max(count, self.versions.get(sensor, 0))
+        return points
+
 class LiveDataFeed(object):
     """A simple "live data feed" abstraction that allows a reader to read the most
-    recent data and find out whether it was updated since the last read.
+    recent data and find out whether it was updated since the last read. The
+    feed also keeps the latest `capacity` points of each sensor, so that readers
+    that miss an update can still pull everything that is new (see :meth:`last`
+    and :meth:`since`).
+
+    The feed has a single writer (the logger) and takes no locks. Each new point
+    is published as an immutable `(version, data)` snapshot in a single
+    assignment, so readers on other threads always see a consistent point;
+    consumers that need their own notion of "new since my last read" should use
+    a :meth:`reader`. Consumers that have to react to new points straight away
+    can block in :meth:`wait` instead of polling; the writer only takes a lock
+    to wake them up while someone is waiting.
+
+    .. note:: the arrays returned by :meth:`last` and :meth:`since` are views
+       into the history, so they are only valid until `capacity` more points
+       have been added; copy them to keep them for longer, or use
+       :meth:`FeedReader.read_new`, which copies them consistently.
+
+    Args:
+        capacity (int): number of points kept in the history of each sensor.
 
     Attributes:
-        has_new_data (dict): A boolean attribute telling the reader whether the
-          data was updated since the last read; keyed by sensor identifier.
         cur_data (dict): most recent data point placed on the feed; keyed by the
           sensor identifier.
+        version (dict): number of points added to the feed so far; keyed by
+          sensor identifier. It only ever increases, so a reader can compare it
+          with the value it saw last to find out how many points are new.
     """
-    def __init__(self):
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
         self.cur_data = {}
-        self.has_new_data = {}
+        self.version = {}
+        self._snapshots = {}
+        """dict: keys are sensor identifiers; values are `(version, data)` tuples
+        for the latest point of the sensor.
+        """
+        self._history = {}
+        """dict: keys are sensor identifiers; values are the :class:`_History`
+        rings of their points.
+        """
+        self._reader = FeedReader(self)
+        """FeedReader: cursor behind :attr:`has_new_data` and :meth:`read_data`.
+        """
+        import threading
+        self._added = threading.Condition()
+        """threading.Condition: notified when points are added while someone
+        is waiting in :meth:`wait`.
+        """
+        self._waiting = 0
+        """int: number of threads waiting in :meth:`wait`.
+        """
+
+    @property
+    def has_new_data(self):
+        """dict: A boolean telling the (default) reader whether the data was
+        updated since its last :meth:`read_data`; keyed by sensor identifier.
+        """
+        return {s: self._reader.has_new_data(s) for s in self._snapshots}
         
     def add_data(self, sensor, data):
         """Add new data to the feed.
@@ -485,10 +1829,106 @@ class LiveDataFeed(object):
         Args:
         sensor (str): sensor identifier for the data point.
         """
+        import numpy as np
+        version = self.version.get(sensor, 0) + 1
+        try:
+            point = np.asarray(data, dtype=float).ravel()
+        except (TypeError, ValueError): # pragma: no cover
+            #Points that aren't numeric can't be kept in the history.
+            point = None
+        if point is not None:
+            history = self._history.get(sensor)
+            if history is None or history.ncols != len(point):
+                history = _History(self.capacity, len(point), version - 1)
+                self._history[sensor] = history
+            history.append(point)
+
+        #The snapshot is published last, and in a single assignment, so that a
+        #reader that sees the new version also finds the point in the history.
         self.cur_data[sensor] = data
-        self.has_new_data[sensor] = True
+        self._snapshots[sensor] = (version, data)
+        self.version[sensor] = version
+        #Waiters register before they check the version, so either they see
+        #the new version or we see them waiting.
+        if self._waiting > 0:
+            with self._added:
+                self._added.notify_all()
+
+    def wait(self, sensor, version=0, timeout=None):
+        """Blocks until the sensor has more than `version` points.
+
+        Args:
+            sensor (str): sensor identifier.
+            version (int): number of points of the sensor that were seen
+              already (see :attr:`version`).
+            timeout (float): maximum number of seconds to wait; `None` to wait
+              for as long as it takes.
+
+        Returns:
+            bool: True if the sensor has new points; False if the timeout
+            expired first.
+        """
+        #Condition.wait_for is python 3 only, so the deadline is kept here.
+        deadline = None if timeout is None else clock_ns() + int(timeout*1e9)
+        with self._added:
+            self._waiting += 1
+            try:
+                while self.version.get(sensor, 0) <= version:
+                    if deadline is None:
+                        self._added.wait()
+                        continue
+                    remaining = (deadline - clock_ns())/1e9
+                    if remaining <= 0:
+                        return False
+                    self._added.wait(remaining)
+                return True
+            finally:
+                self._waiting -= 1
     
     def read_data(self, sensor):
         """Returns the most recent data."""
-        self.has_new_data[sensor] = False
-        return self.cur_data[sensor]
+        return self._reader.read_data(sensor)
+
+    def snapshot(self, sensor):
+        """Returns a consistent `(version, data)` tuple for the most recent data
+        point of a sensor.
+        """
+        return self._snapshots[sensor]
+
+    def reader(self):
+        """Returns a new :class:`FeedReader` with its own cursor, positioned
+        before the first point of every sensor.
+        """
+        return FeedReader(self)
+
+    def last(self, sensor, n=None):
+        """Returns the latest points of a sensor.
+
+        Args:
+            sensor (str): sensor identifier.
+            n (int): number of points to return; if `None`, the whole history is
+              returned. Fewer points are returned if the history is shorter.
+
+        Returns:
+            numpy.ndarray: view of shape `(n, 1 + number of values)`, oldest
+            point first; the first column holds the timestamps.
+        """
+        import numpy as np
+        if sensor not in self._history:
+            return np.empty((0, 0))
+        return self._history[sensor].last(n)
+
+    def since(self, sensor, t):
+        """Returns the points of a sensor that have a timestamp later than `t`.
+
+        Args:
+            sensor (str): sensor identifier.
+            t (float): timestamp of the last point the reader already has.
+
+        Returns:
+            numpy.ndarray: view with the same layout as for :meth:`last`.
+        """
+        import numpy as np
+        if sensor not in self._history:
+            return np.empty((0, 0))
+        return self._history[sensor].since(t)
@@ -0,0 +1,174 @@
+"""Class for reading many serial ports from a single thread. Instead of running a
+thread per port that wakes up every `port_timeout` to poll its port, the
+multiplexer blocks on the file descriptors of all the ports at once (using
+:mod:`selectors`) and only wakes up when bytes arrive or when it is told to
+stop. Idle ports then cost no CPU at all.
+
+.. note:: serial ports can only be selected on unix-based systems. On python 2,
+   which has no :mod:`selectors`, they are selected with :func:`select.select`.
+"""
+import threading
+from collections import namedtuple
+from liveserial import msg
+try:
+    import selectors
+except ImportError: # pragma: no cover
+    selectors = None
+
+_SelectKey = namedtuple("_SelectKey", ["fd", "data"])
+"""Registration of a file descriptor with a :class:`_SelectSelector`; it has
+the fields of :class:`selectors.SelectorKey` that the multiplexer uses.
+"""
+
+class _SelectSelector(object):
+    """Stand-in for :class:`selectors.DefaultSelector` on python 2 that waits
+    with :func:`select.select`; it only has the methods that the multiplexer
+    uses, and only selects for reading.
+    """
+    def __init__(self):
+        self._keys = {}
+
+    def register(self, fd, events, data=None):
+        self._keys[fd] = _SelectKey(fd, data)
+
+    def unregister(self, fd):
+        del self._keys[fd]
+
+    def select(self):
+        import select, errno
+        try:
+            ready = select.select(list(self._keys), [], [])[0]
+        except (select.error, OSError) as e: # pragma: no cover
+            #Python 2 doesn't retry the call when a signal interrupts it.
+            if e.args[0] != errno.EINTR:
+                raise
+            return []
+        return [(self._keys[fd], 1) for fd in ready]
+
+    def close(self):
+        self._keys.clear()
+
+class Multiplexer(threading.Thread):
+    """A single thread that reads, frames and parses the data from several
+    serial ports. The monitors passed in are never started themselves; this
+    thread opens their ports and hands the chunks read from each port to that
+    port's monitor, so the framing, parsing and queueing are the same as for
+    :class:`liveserial.monitor.ComMonitorThread`.
+
+    Args:
+        monitors (list): of :class:`liveserial.monitor.ComMonitorThread`
+          instances to read the ports for. They should share the same data and
+          error queues, except for ports with bounded data queues. A monitor
+          whose overflow policy is `block` stalls all the ports while its queue
+          is full.
+
+    Attributes:
+        monitors (list): of the monitors whose ports are read.
+        data_q (queue.SimpleQueue): data queue shared by the monitors.
+        error_q (queue.SimpleQueue): error queue shared by the monitors.
+        port (str): comma-separated names of the ports being read.
+        alive (threading.Event): cleared when the thread should stop.
+    """
+    chunksize = 65536
+    """int: maximum number of bytes to read from a port at a time.
+    """
+    transport = "thread"
+    """str: name of the queue transport (see
+    :data:`liveserial.monitor.transports`) that can carry data from this reader
+    to the logger.
+    """
+    def __init__(self, monitors):
+        threading.Thread.__init__(self)
+        self.monitors = list(monitors)
+        self.data_q = self.monitors[0].data_q
+        self.error_q = self.monitors[0].error_q
+        self.port = ", ".join(m.port for m in self.monitors)
+
+        import os
+        self._wakeup = os.pipe()
+        """tuple: `(read, write)` file descriptors of the pipe that wakes the
+        selector up when the thread has to stop.
+        """
+        self.alive = threading.Event()
+        self.alive.set()
+
+    def _register(self, selector):
+        """Opens the ports of all the monitors and registers them with the
+        selector. Ports that fail to open report their error on the error queue
+        and are skipped.
+        """
+        read = 1 if selectors is None else selectors.EVENT_READ
+        selector.register(self._wakeup[0], read)
+        for monitor in self.monitors:
+            #The selector tells us when bytes are waiting, so the reads never
+            #have to block.
+            monitor.serial_arg["timeout"] = 0
+            if monitor._open():
+                selector.register(monitor.serial_port.fileno(), read, monitor)
+
+    def run(self):
+        """Reads the ports until :meth:`join` is called.
+        """
+        import os
+        from liveserial.monitor import clock_ns
+        if selectors is None: # pragma: no cover
+            selector = _SelectSelector()
+        else:
+            selector = selectors.DefaultSelector()
+        try:
+            self._register(selector)
+            while self.alive.is_set():
+                #No timeout: we sleep until a port has data or we are woken up
+                #through the pipe.
+                for key, events in selector.select():
+                    monitor = key.data
+                    if monitor is None:
+                        os.read(key.fd, 512)
+                        continue
+                    #The port is readable, so we can take whatever is waiting
+                    #straight from the descriptor without pyserial's extra
+                    #select and ioctl calls.
+                    try:
+                        chunk = os.read(key.fd, self.chunksize)
+                    except OSError as e: # pragma: no cover
+                        chunk, error = b"", e.strerror
+                    else:
+                        error = "device reports readiness to read but returned no data"
+                    if len(chunk) == 0: # pragma: no cover
+                        #Usually, the device was disconnected; the other ports
+                        #can keep going.
+                        msg.err("{}: {}".format(monitor.port, error))
+                        monitor.error_q.put(error)
+                        selector.unregister(key.fd)
+                        continue
+                    monitor._publish(chunk, clock_ns())
+        finally:
+            selector.close()
+            for monitor in self.monitors:
+                if monitor.serial_port:
+                    monitor.serial_port.close()
+
+    def join(self, timeout=None, terminate=True):
+        """Tells the thread reading the COM ports to clean up and return.
+
+        Args:
+            timeout (float): number of seconds (or fractions of seconds) to wait
+              until returning. If `None`, then the operation will block until the
+              thread terminates. See also :meth:`threading.Thread.join`.
+            terminate (bool): when True, the thread is woken up and told to stop
+              before joining it; otherwise, it keeps reading the ports.
+        """
+        import os
+        if terminate and self._wakeup is not None:
+            self.alive.clear()
+            #Monitors that are blocked on a full queue give up once their own
+            #event is cleared.
+            for monitor in self.monitors:
+                monitor.alive.clear()
+            os.write(self._wakeup[1], b"x")
+        threading.Thread.join(self, timeout)
+
+        if not self.is_alive() and self._wakeup is not None:
+            for fd in self._wakeup:
+                os.close(fd)
+            self._wakeup = None
@@ -13,7 +13,7 @@ if os.name != "nt":
 
 from liveserial import msg
 import numpy as np
-from threading import Timer
+from liveserial.schedule import Scheduler
 
 def colorspace(size, cmap=cm.winter):
     """Returns an cycler over a linear color space with 'size' entries.
@@ -76,7 +76,8 @@ class Plotter(animation.TimedAnimation):
         subplots show up in the figure.
         """
         self._timer = None
-        """Timer for unit testing the plotting code data acquisition.
+        """Scheduler that draws the frames for unit testing the plotting code
+        data acquisition.
         """
         
         #Find out how many subplots we will need; sort their keys for plotting.
@@ -179,7 +180,11 @@ class Plotter(animation.TimedAnimation):
         else:
             self._init_draw()
             self.new_frame_seq()
-            self._timer = Timer(self.interval, self._draw_frame, (0,))
+            #The frames fall halfway between the deadlines of the loop that
+            #runs the script for a fixed time, so that the last frame doesn't
+            #race with the data of the last logger tick.
+            self._timer = Scheduler(self.interval, self._draw_frame, (0,),
+                                    offset=self.interval/2.)
             self._timer.start()
             
         msg.info("Plotting animation configured.", 2)
@@ -213,9 +218,6 @@ class Plotter(animation.TimedAnimation):
             self.axes[sensor].autoscale_view()   # reset axes limits 
             
         self._drawn_artists = self.lines.values()
-        if self.testmode:
-            self._timer = Timer(self.interval, self._draw_frame, (0,))
-            self._timer.start()
         
     def _init_draw(self):
         """Initializes all the subplot line objects to be empty."""
@@ -226,4 +228,4 @@ class Plotter(animation.TimedAnimation):
         """Cleans up the timer when the plotter is running in test mode.
         """
         if self._timer:
-            self._timer.cancel()
+            self._timer.join()
@@ -0,0 +1,142 @@
+"""Vectorized reduction of the records that the logger reads from the data queues
+on each tick to the point(s) that it posts on the live feed. Each sensor's
+records are copied into a preallocated, column-major :class:`TickBuffer`, so
+that every reduction is a single :mod:`numpy` call over contiguous columns. The
+method is chosen with the logger's `method` argument (the `-method` script
+option) or, for a single sensor, with its `method` option (see
+:class:`liveserial.config.Sensor`).
+"""
+import numpy as np
+
+class TickBuffer(object):
+    """Column-major storage for the records of a single sensor during a logger
+    tick. The storage is kept from one tick to the next and only grows (by
+    doubling) when a tick reads more records than it can hold.
+
+    Args:
+        capacity (int): number of records that the buffer holds initially.
+
+    Attributes:
+        data (numpy.ndarray): of shape `(capacity, width)`, in Fortran order so
+          that each column is contiguous. Column 0 holds the timestamps.
+    """
+    def __init__(self, capacity=64):
+        self.data = np.empty((max(int(capacity), 1), 0), order='F')
+
+    def load(self, rows):
+        """Copies the records into the buffer.
+
+        Args:
+            rows: structured :class:`numpy.ndarray` of the records of a single
+              sensor (see :class:`liveserial.log.LogBuffer`), or list of
+              `(timestamp, values...)` tuples; values that weren't parsed
+              (`None`) become `NaN`. If the tuples don't all have the same
+              length (because the format of the sensor changed), only the last
+              ones with the length of the last tuple are loaded.
+
+        Returns:
+            numpy.ndarray: view of shape `(len(rows), width - 1)` of the value
+            columns of the records; it is only valid until the next load.
+        """
+        names = getattr(getattr(rows, "dtype", None), "names", None)
+        if names is None:
+            width = len(rows[-1])
+            if len(set(map(len, rows))) > 1:
+                start = len(rows) - 1
+                while start > 0 and len(rows[start - 1]) == width:
+                    start -= 1
+                rows = rows[start:]
+        else:
+            width = len(names)
+        n = len(rows)
+        capacity = self.data.shape[0]
+        if n > capacity or width != self.data.shape[1]:
+            while capacity < n:
+                capacity *= 2
+            self.data = np.empty((capacity, width), order='F')
+        if names is None:
+            self.data[:n] = rows
+        else:
+            #Each field is copied straight into its contiguous column.
+            for i, name in enumerate(names):
+                self.data[:n, i] = rows[name]
+        return self.data[:n, 1:]
+
+def _record(row):
+    """Returns a record as a tuple, even if it is an element of a structured
+    array.
+    """
+    return row.tolist() if hasattr(row, "tolist") else row
+
+def _stamp(row, values):
+    """Returns the point with the timestamp of `row` and the reduced values."""
+    return [int(row[0])] + values.tolist()
+
+def _first(rows, buffer):
+    """Keeps the first record of the tick."""
+    return [_record(rows[0])]
+
+def _last(rows, buffer):
+    """Keeps the last record of the tick."""
+    return [_record(rows[-1])]
+
+def _mean(rows, buffer):
+    """Averages each value column."""
+    return [_stamp(rows[-1], buffer.load(rows).mean(axis=0))]
+
+def _min(rows, buffer):
+    """Smallest value of each column."""
+    return [_stamp(rows[-1], buffer.load(rows).min(axis=0))]
+
+def _max(rows, buffer):
+    """Largest value of each column."""
+    return [_stamp(rows[-1], buffer.load(rows).max(axis=0))]
+
+def _median(rows, buffer):
+    """Median of each value column."""
+    return [_stamp(rows[-1], np.median(buffer.load(rows), axis=0))]
+
+def _rms(rows, buffer):
+    """Root mean square of each value column."""
+    values = buffer.load(rows)
+    return [_stamp(rows[-1], np.sqrt((values*values).mean(axis=0)))]
+
+def _count(rows, buffer):
+    """Number of values that were parsed in each column."""
+    values = buffer.load(rows)
+    return [_stamp(rows[-1], np.count_nonzero(~np.isnan(values), axis=0))]
+
+def _envelope(rows, buffer):
+    """Smallest and then largest value of each column, as two points."""
+    values = buffer.load(rows)
+    return [_stamp(rows[-1], values.min(axis=0)),
+            _stamp(rows[-1], values.max(axis=0))]
+
+methods = {
+    "first": _first,
+    "last": _last,
+    "average": _mean,
+    "mean": _mean,
+    "min": _min,
+    "max": _max,
+    "median": _median,
+    "rms": _rms,
+    "count": _count,
+    "envelope": _envelope
+    }
+"""dict: keys are the names of the methods that the logger can reduce the
+records of a tick with; values are functions that accept the records of a
+sensor (see :meth:`TickBuffer.load`) and a :class:`TickBuffer`, and
+return the list of points to post on the live feed:
+
+- `first`, `last`: the first or last record, unchanged.
+- `average` (or `mean`), `min`, `max`, `median`, `rms`: the mean, smallest,
+  largest, median or root-mean-square value of each column.
+- `count`: the number of values that were parsed in each column (see
+  :attr:`liveserial.config.Sensor.projection`).
+- `envelope`: two points with the smallest and the largest value of each column,
+  so that the spikes between the ticks still show on the plots.
+
+Except for `first`, the points are stamped with the time of the last record of
+the tick. The methods other than `first` and `last` need numeric values.
+"""
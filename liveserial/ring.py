@@ -0,0 +1,240 @@
+"""Shared-memory ring buffers that carry records from monitor processes to the
+logger without pickling them. Each ring has a single producer (the monitor of
+one port) and a single consumer (the logger), so no locks are needed: the
+producer only ever advances the `head` counter after the records are written
+and the consumer only advances the `tail` counter once it is done with them.
+
+Records are fixed-size, so that a whole span of them can be handed out as a
+:mod:`numpy` structured array without copying. Each record holds the index of
+its sensor, the timestamp (in integer nanoseconds) and one 8-byte slot per
+value; every sensor gets its own structured dtype over the same bytes so that
+its values keep their `int` or `float` types.
+
+.. note:: this module needs :mod:`multiprocessing.shared_memory` (python 3.8 or
+   later).
+"""
+import struct
+import numpy as np
+from multiprocessing import shared_memory
+_header = 64
+"""int: number of bytes reserved at the start of the shared memory block for
+the `head`, `tail` and `dropped` counters.
+"""
+_codes = {int: ("q", "<i8"), float: ("d", "<f8")}
+"""dict: keys are the value types that can be carried in a ring; values are
+`(struct, numpy)` format codes for them.
+"""
+
+def _open_block(name):
+    """Attaches to an existing shared memory block without tracking it, since
+    only the creator of the ring frees the block.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError: # pragma: no cover
+        #The `track` argument is only available from python 3.13. Before that,
+        #monitor processes share the resource tracker of the process that
+        #created the block, so registering it again is harmless.
+        return shared_memory.SharedMemory(name=name)
+
+class SharedRing(object):
+    """Single-producer/single-consumer ring buffer of records in shared memory.
+    The producer side has the same :meth:`put` method as the data queues, so a
+    monitor can publish its batches to a ring without any changes.
+
+    Args:
+        layouts (list): of `(sensor, dtype)` tuples, where `dtype` is the list of
+          value types of the sensor (see :attr:`liveserial.config.Sensor.dtype`);
+          only `int` and `float` values can be carried. Values that weren't
+          parsed (`None`) are carried as 0 or NaN.
+        capacity (int): maximum number of records held by the ring; records put
+          on a full ring are dropped and counted in :attr:`dropped`.
+        name (str): name of an existing shared memory block to attach to; if
+          `None`, a new block is created and owned by this instance.
+
+    Attributes:
+        sensors (list): of sensor names, in the order of their record index.
+        capacity (int): maximum number of records in the ring.
+        itemsize (int): number of bytes in each record.
+        name (str): name of the shared memory block.
+    """
+    def __init__(self, layouts, capacity=65536, name=None):
+        self._layouts = [(s, list(d)) for s, d in layouts]
+        self.sensors = [s for s, d in self._layouts]
+        self.capacity = capacity
+        nslots = max([len(d) for s, d in self._layouts] + [1])
+        self.itemsize = 16 + 8*nslots
+
+        self._structs = {}
+        """dict: keys are sensor names; values are :class:`struct.Struct` that
+        pack a whole record for that sensor.
+        """
+        self._dtypes = {}
+        """dict: keys are sensor names; values are structured
+        :class:`numpy.dtype` that read a record of that sensor.
+        """
+        self._fields = {}
+        """dict: keys are sensor names; values are the names of the timestamp and
+        value fields in the sensor's dtype.
+        """
+        self._fills = {}
+        """dict: keys are sensor names; values are the values written in place
+        of columns that weren't parsed (`None` in the record; see
+        :attr:`liveserial.config.Sensor.projection`): 0 for `int` and NaN for
+        `float` columns.
+        """
+        for index, (sensor, dtype) in enumerate(self._layouts):
+            if any(t not in _codes for t in dtype):
+                raise ValueError("Sensor '{}' has values that can't be carried "
+                                 "in a shared-memory ring.".format(sensor))
+            codes = [_codes[t] for t in dtype]
+            fmt = "<H6xq" + ''.join(c[0] for c in codes)
+            fmt += "{}x".format(self.itemsize - struct.calcsize(fmt))
+            self._structs[sensor] = (index, struct.Struct(fmt))
+            fields = ["time"] + ["v{}".format(i) for i in range(len(dtype))]
+            self._dtypes[sensor] = np.dtype({
+                "names": ["sensor"] + fields,
+                "formats": ["<u2", "<i8"] + [c[1] for c in codes],
+                "offsets": [0, 8] + [16 + 8*i for i in range(len(dtype))],
+                "itemsize": self.itemsize})
+            self._fields[sensor] = fields
+            self._fills[sensor] = [0 if t is int else float("nan") for t in dtype]
+
+        self._owner = name is None
+        size = _header + capacity*self.itemsize
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = _open_block(name)
+        self.name = self._shm.name
+        self._attach()
+        if self._owner:
+            self._counters[:] = 0
+
+    @classmethod
+    def for_monitor(cls, monitor, capacity=65536):
+        """Returns a new ring for the records of the configured sensors of a
+        monitor.
+
+        Raises:
+            ValueError: if the monitor infers its sensors (so their layout is
+              unknown) or if a sensor has values other than `int` or `float`.
+        """
+        if not monitor._manual_sensors:
+            raise ValueError("The sensors of port {} are inferred, so their "
+                             "record layout is unknown.".format(monitor.port))
+        layouts = [(n, s.record_dtype) for n, s in monitor.sensors.items()]
+        return cls(layouts, capacity)
+
+    def _attach(self):
+        """Creates the numpy views of the counters and records."""
+        buf = self._shm.buf
+        self._counters = np.ndarray((3,), "<u8", buf, 0)
+        self._records = np.ndarray((self.capacity,), "V{}".format(self.itemsize),
+                                   buf, _header)
+
+    def __getstate__(self):
+        """Pickles the ring by the name of its shared memory block, so that a
+        spawned monitor process attaches to the same block.
+        """
+        return {"layouts": self._layouts, "capacity": self.capacity,
+                "name": self.name}
+
+    def __setstate__(self, state):
+        self.__init__(state["layouts"], state["capacity"], state["name"])
+
+    @property
+    def dropped(self):
+        """int: number of records that were dropped because the ring was full.
+        """
+        return int(self._counters[2])
+
+    def empty(self):
+        """Returns True if there are no records waiting for the consumer."""
+        return self._shm is None or self._counters[0] == self._counters[1]
+
+    def put(self, records):
+        """Writes a batch of records to the ring (producer side only).
+
+        Args:
+            records (list): of `(sensor, timestamp, values...)` tuples.
+
+        Returns:
+            int: number of records that were written; the rest of the batch
+            was dropped because the ring is full.
+        """
+        counters = self._counters
+        head, tail = int(counters[0]), int(counters[1])
+        n = min(len(records), self.capacity - (head - tail))
+        if n < len(records):
+            counters[2] += len(records) - n
+
+        buf, structs, capacity = self._shm.buf, self._structs, self.capacity
+        for record in records[:n]:
+            index, layout = structs[record[0]]
+            offset = _header + (head % capacity)*self.itemsize
+            try:
+                layout.pack_into(buf, offset, index, *record[1:])
+            except struct.error:
+                fills = self._fills[record[0]]
+                values = [f if v is None else v
+                          for v, f in zip(record[2:], fills)]
+                layout.pack_into(buf, offset, index, record[1], *values)
+            head += 1
+        #The records are only visible to the consumer once the head moves.
+        counters[0] = head
+        return n
+
+    def drain(self):
+        """Yields the records that were published since the last drain
+        (consumer side only), grouped by sensor.
+
+        Returns:
+            generator: of `(sensor, records)` tuples, where `records` is a
+            structured :mod:`numpy` array with a `time` field and one `v<i>`
+            field per value. For rings with a single sensor, the arrays are
+            views straight into the shared memory. The space is handed back to
+            the producer once the generator is exhausted (or closed), so the
+            arrays must not be kept after that.
+        """
+        if self._shm is None: # pragma: no cover
+            #The ring was closed while the logger was still running.
+            return
+        head, tail = int(self._counters[0]), int(self._counters[1])
+        if head == tail:
+            return
+        start = tail % self.capacity
+        first = min(head - tail, self.capacity - start)
+        spans = [self._records[start:start + first]]
+        if head - tail > first:
+            spans.append(self._records[:head - tail - first])
+
+        try:
+            for span in spans:
+                if len(self.sensors) == 1:
+                    sensor = self.sensors[0]
+                    view = span.view(self._dtypes[sensor])
+                    yield sensor, view[self._fields[sensor]]
+                    continue
+
+                ids = span.view(self._dtypes[self.sensors[0]])["sensor"]
+                for index, sensor in enumerate(self.sensors):
+                    mask = ids == index
+                    if mask.any():
+                        view = span.view(self._dtypes[sensor])
+                        yield sensor, view[self._fields[sensor]][mask]
+        finally:
+            self._counters[1] = head
+
+    def close(self):
+        """Detaches from the shared memory block; the creator of the ring also
+        frees it.
+        """
+        if self._shm is None:
+            return
+        #The numpy views export the buffer, which has to be released first.
+        self._counters = self._records = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
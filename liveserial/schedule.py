@@ -0,0 +1,161 @@
+"""Class for calling a function periodically from a single, long-lived thread.
+Instead of starting a new :class:`threading.Timer` for every tick once the
+previous one is done (so that the real period is the interval *plus* the time
+spent in the function), the scheduler keeps absolute deadlines on a monotonic
+clock. Ticks that take longer than the interval are detected and handled with
+one of the :data:`policies`.
+"""
+import threading
+from liveserial import msg
+policies = ["skip", "catch-up"]
+"""list: what a :class:`Scheduler` does when a tick runs past the deadline of
+the next one. With `skip`, the missed ticks are dropped and the schedule resumes
+on the next deadline that is still in the future; with `catch-up`, the missed
+ticks run back to back until the schedule is on time again.
+"""
+
+class Scheduler(threading.Thread):
+    """A thread that calls a function every `interval` seconds until it is
+    stopped. The deadlines are multiples of the interval from the first one, so
+    the ticks don't drift when the function is slow.
+
+    Args:
+        interval (float): number of seconds between the ticks.
+        function: to call on each tick.
+        args (tuple): positional arguments for `function`.
+        policy (str): what to do with the ticks that are missed because a tick
+          overran; one of :data:`policies`.
+        trigger (threading.Event): when given, an extra tick also runs as soon
+          as the event is set (and the event is cleared); the ticks on the
+          deadlines then act as a heartbeat. A :func:`multiprocessing.Event`
+          also works.
+        offset (float): number of seconds from the start of the thread to the
+          first deadline; defaults to `interval`. Use it to keep the ticks out
+          of phase with another periodic loop.
+
+    Attributes:
+        interval (float): number of seconds between the ticks.
+        policy (str): overrun policy of the scheduler.
+        finished (threading.Event): set when the thread should stop; the
+          thread sleeps on it between the ticks, so it stops straight away.
+    """
+    def __init__(self, interval, function, args=(), policy="skip",
+                 trigger=None, offset=None):
+        threading.Thread.__init__(self)
+        if policy not in policies: # pragma: no cover
+            raise ValueError("Unknown overrun policy '{}'; expected one of "
+                             "{}.".format(policy, policies))
+        self.interval = float(interval)
+        self.function = function
+        self.args = args
+        self.policy = policy
+        self.trigger = trigger
+        self.offset = self.interval if offset is None else float(offset)
+        self.finished = threading.Event()
+
+        self._ticks = 0
+        """int: number of times that the function was called.
+        """
+        self._overruns = 0
+        """int: number of ticks that ran past the deadline of the next tick.
+        """
+        self._skipped = 0
+        """int: number of ticks that were dropped by the `skip` policy.
+        """
+        self._triggered = 0
+        """int: number of ticks that ran because the trigger was set.
+        """
+        self._durations = [0, 0, 0]
+        """list: last, longest and total time (in nanoseconds) spent in the
+        function.
+        """
+        self._maxlate = 0
+        """int: longest delay (in nanoseconds) between a deadline and the start
+        of its tick.
+        """
+
+    @property
+    def stats(self):
+        """dict: timing statistics of the ticks so far: the number of `ticks`,
+        `overruns`, `skipped` ticks and `triggered` ticks, and the `last`, `max`
+        and `mean` time spent in the function and the `maxlate` delay of a tick
+        behind its deadline (all in seconds).
+        """
+        last, longest, total = self._durations
+        return {"ticks": self._ticks, "overruns": self._overruns,
+                "skipped": self._skipped, "triggered": self._triggered,
+                "last": last/1e9,
+                "max": longest/1e9, "mean": total/1e9/max(self._ticks, 1),
+                "maxlate": self._maxlate/1e9}
+
+    def run(self):
+        """Calls the function on every deadline until :meth:`cancel` is called.
+        """
+        from liveserial.monitor import clock_ns
+        interval = int(self.interval*1e9)
+        durations = self._durations
+        trigger, finished = self.trigger, self.finished
+        deadline = clock_ns() + int(self.offset*1e9)
+        while True:
+            timeout = max(deadline - clock_ns(), 0)/1e9
+            if trigger is None:
+                if finished.wait(timeout):
+                    break
+            else:
+                trigger.wait(timeout)
+                if finished.is_set():
+                    break
+                #Cleared before the call, so that a trigger that arrives during
+                #the call gets a tick of its own.
+                trigger.clear()
+
+            start = clock_ns()
+            if start < deadline:
+                self._triggered += 1
+            else:
+                self._maxlate = max(self._maxlate, start - deadline)
+            self.function(*self.args)
+            end = clock_ns()
+
+            self._ticks += 1
+            duration = end - start
+            durations[0] = duration
+            durations[1] = max(durations[1], duration)
+            durations[2] += duration
+
+            if start < deadline:
+                #Triggered ticks don't move the deadlines of the heartbeat.
+                continue
+            deadline += interval
+            if end > deadline:
+                self._overruns += 1
+                if self.policy == "skip":
+                    missed = (end - deadline)//interval + 1
+                    self._skipped += missed
+                    deadline += missed*interval
+                    msg.info("Tick took {:.3f}s; skipped {} ticks.".format(
+                        duration/1e9, missed), 3)
+
+    def cancel(self):
+        """Stops the ticks; the tick that is running (if any) still finishes.
+        """
+        self.finished.set()
+        if self.trigger is not None:
+            #Wakes the thread up if it is waiting on the trigger.
+            self.trigger.set()
+
+    def join(self, timeout=None, terminate=True):
+        """Tells the thread to stop ticking and waits for it to return.
+
+        Args:
+            timeout (float): number of seconds (or fractions of seconds) to wait
+              until returning. If `None`, then the operation will block until the
+              thread terminates. See also :meth:`threading.Thread.join`.
+            terminate (bool): when True, the ticks are stopped before joining
+              the thread; otherwise, it keeps ticking.
+        """
+        if terminate:
+            self.cancel()
+        #The function itself may stop the scheduler that calls it.
+        if self.ident is not None and threading.current_thread() is not self:
+            threading.Thread.join(self, timeout)
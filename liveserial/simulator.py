@@ -106,6 +106,11 @@ class ComSimulatorThread(threading.Thread):
         """
         if terminate:
             self.alive.clear()
-            self.serial.cancel_write()
-            self.serial.flushOutput()
+            from serial import SerialException
+            try:
+                self.serial.cancel_write()
+                self.serial.flushOutput()
+            except (OSError, SerialException): # pragma: no cover
+                #The thread already closed the port after its last write.
+                pass
         threading.Thread.join(self, timeout)
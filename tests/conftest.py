@@ -1,6 +1,12 @@
 """Provides a session-scoped, auto-use fixture for all the unit tests.
 """
 import pytest
+import sys
+
+collect_ignore = []
+if sys.version_info < (3, 5): # pragma: no cover
+    #The asyncio module uses `async` syntax that can't even be compiled.
+    collect_ignore.append("test_aio.py")
 
 @pytest.fixture(scope="session")
 def isnt(request):
@@ -0,0 +1,72 @@
+"""Tests the asyncio counterparts of the monitor threads and logger timer
+against the simulated serial port.
+"""
+import pytest
+import asyncio
+from liveserial.config import reset_config
+
+def _run(coro):
+    """Runs the coroutine to completion on a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+def test_batches(isnt):
+    """Tests that the parsed batches can be iterated asynchronously.
+    """
+    if isnt: # pragma: no cover
+        pytest.skip("Serial ports can't be read with add_reader on Windows.")
+    from liveserial.aio import AsyncMonitor
+    async def collect():
+        batches = []
+        async with AsyncMonitor.from_config("sensors.cfg",
+                                            "/dev/tty.lscom-r") as port:
+            async for batch in port:
+                batches.append(batch)
+                if len(batches) == 5:
+                    break
+        return batches, port
+
+    batches, port = _run(collect())
+    reset_config()
+    assert len(batches) == 5
+    assert port.monitor.serial_port.is_open is False
+    sensors = set(record[0] for batch in batches for record in batch)
+    assert sensors <= set(["weight", "cardio", "blank"])
+    assert all(isinstance(record[1], int) for batch in batches
+               for record in batch)
+
+def test_log(isnt, tmpdir):
+    """Tests the logging and live feed of the asynchronous monitors.
+    """
+    if isnt: # pragma: no cover
+        pytest.skip("Serial ports can't be read with add_reader on Windows.")
+    from liveserial.aio import AsyncMonitor, log
+    from liveserial.log import Logger
+    from liveserial.monitor import LiveDataFeed
+    sub = tmpdir.mkdir("aiolog")
+    feed = LiveDataFeed()
+    logger = Logger(0.025, [], feed, "average", str(sub), 10, True,
+                    "sensors.cfg")
+    async def monitor():
+        port = AsyncMonitor.from_config("sensors.cfg", "/dev/tty.lscom-r",
+                                        ["weight", "cardio"])
+        port.open()
+        try:
+            await asyncio.wait_for(log(logger, [port]), 1.5)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            port.close()
+
+    _run(monitor())
+    reset_config()
+    assert set(feed.cur_data.keys()) == set(["weight", "cardio"])
+    assert logger._timer_calls > 10
+    assert set(f.basename for f in sub.listdir()) == set(["weight.csv",
+                                                          "cardio.csv"])
+    assert all(f.stat().size > 60 for f in sub.listdir())
@@ -0,0 +1,77 @@
+"""Tests the binary frame protocol by passing packed frames straight to a
+monitor configured from 'binary.cfg'.
+"""
+import pytest
+import struct
+from os import path
+from liveserial.config import reset_config
+from liveserial.framing import checksums
+
+def _frame(sid, fmt, *values):
+    """Returns a complete frame with the sync bytes and checksum configured in
+    'binary.cfg'.
+    """
+    body = struct.pack("B", sid) + struct.pack(fmt, *values)
+    ckfmt, ckfun = checksums["crc16"]
+    return b"\xaa\x55" + body + struct.pack(ckfmt, ckfun(body))
+
+@pytest.fixture
+def com(request):
+    """Returns a monitor for the binary port that is never started.
+    """
+    from liveserial.monitor import ComMonitorThread, create_queue
+    def cleanup():
+        reset_config()
+    request.addfinalizer(cleanup)
+    return ComMonitorThread.from_config(path.join("tests", "binary.cfg"),
+                                        "/dev/tty.lscom-b", create_queue(),
+                                        create_queue())
+
+def test_frames(com):
+    """Tests decoding of interleaved frames with garbage and resyncing.
+    """
+    forces = [_frame(1, "<if", i, i/4.) for i in range(20)]
+    data = (b"\x00\xaa" + b"".join(forces[:10]) + _frame(2, "<hhf", -3, 4, 1.5) +
+            b"\xaa\x55\x09garbage" + b"".join(forces[10:]))
+    #Split the data at an awkward place to make sure partial frames are kept.
+    records = (com._parse_chunk(data[:37], 500000000) +
+               com._parse_chunk(data[37:], 1000000000))
+    force = [r for r in records if r[0] == "force"]
+    temp = [r for r in records if r[0] == "temp"]
+    assert len(force) == 20
+    assert force[-1] == ("force", 1000000000, 19, 4.75)
+    assert temp[0][2:] == (-3, 4, 1.5)
+    #The frames that arrived earlier in a chunk are stamped earlier.
+    stamps = [r[1] for r in records]
+    assert stamps == sorted(stamps) and stamps[0] <= 500000000
+    assert 500000000 < temp[0][1] < 1000000000
+    assert com.framer.dropped == 1
+    assert com.sensors["temp"].dtype == [int, int, float]
+
+def test_checksum(com):
+    """Makes sure that corrupted frames are dropped.
+    """
+    good = _frame(1, "<if", 7, 0.5)
+    bad = bytearray(good)
+    bad[4] ^= 0xFF
+    records = com._parse_chunk(bytes(bad) + good*3, 0)
+    assert records == [("force", 0, 7, 0.5)]*3
+    assert com.framer.dropped == 1
+
+def test_pickle(com):
+    """Tests that the frame layouts survive pickling the framer, as they do
+    when a monitor process is spawned.
+    """
+    import pickle
+    framer = pickle.loads(pickle.dumps(com.framer))
+    data = _frame(1, "<if", 7, 0.25) + _frame(2, "<hhf", 1, 2, 0.5)
+    assert framer.feed(data) == [(1, (7, 0.25)), (2, (1, 2, 0.5))]
+
+def test_sync():
+    """Tests that the sync sequence is parsed from config text on every python
+    version, and that raw bytes are kept as they are.
+    """
+    from liveserial.monitor import _sync_bytes
+    assert _sync_bytes("0xAA") == b"\xaa"
+    assert _sync_bytes(u"0xAA,0x55") == b"\xaa\x55"
+    assert _sync_bytes(bytearray(b"\xaa\x55")) == b"\xaa\x55"
@@ -1,5 +1,6 @@
 """Methods to test the configuration file setup for the monitor.
 """
+import sys
 import pytest
 from test_livemon import get_sargs
 from liveserial.config import reset_config
@@ -119,3 +120,99 @@ def test_legend():
     assert "plotter" in vardir
     assert any([len(v) > 1 for v in vardir["plotter"]._vindices.values()])
     reset_config()
+
+def test_filter():
+    """Makes sure that sensors excluded with `-sensors` have their lines
+    rejected by the dispatch index and never reach the live feed.
+    """
+    argv = ["py.test", "auto", "-noplot", "-sensors", "weight"]
+    args = get_sargs(argv)
+
+    from liveserial.livemon import run
+    vardir = run(args, 2)
+    assert "com" in vardir
+    com = vardir["com"][0]
+    assert list(com.sensors.keys()) == ["weight"]
+    assert com._dispatch[0][com._token("K")] is None
+    assert list(vardir["feed"].cur_data.keys()) == ["weight"]
+    reset_config()
+
+@pytest.mark.skipif(sys.version_info < (3, 4),
+                    reason="multiprocessing start methods need python 3.4+")
+def test_spawn():
+    """Makes sure that a monitor process works when it has to be pickled to
+    start (i.e., with the `spawn` start method), including its filtered sensors.
+    """
+    import multiprocessing
+    from liveserial.monitor import (ComMonitorProcess, create_queue,
+                                    get_item_from_queue)
+    method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        monitor = ComMonitorProcess.from_config("sensors.cfg",
+                                                "/dev/tty.lscom-r",
+                                                create_queue("process"),
+                                                create_queue("process"),
+                                                sfilter=["weight"])
+        monitor.start()
+        batch = get_item_from_queue(monitor.data_q, 10)
+        monitor.join(5)
+    finally:
+        multiprocessing.set_start_method(method, force=True)
+        reset_config()
+
+    assert not monitor.is_alive()
+    assert len(batch) > 0
+    assert all(record[0] == "weight" for record in batch)
+
+def test_projection():
+    """Makes sure that only the columns that are logged or plotted are parsed,
+    and that inputs of aggregate sensors are parsed in full.
+    """
+    from os import path
+    from liveserial.config import sensors
+    try:
+        weight = sensors("sensors.cfg", "weight")
+        assert weight.projection == set([2])
+        assert weight.parse(["W", "12", "0.5"]) == [None, 0.5]
+        #The skipped column is never cast, so it isn't checked either.
+        assert weight.parse(["W", "x", "0.5"]) == [None, 0.5]
+        assert weight.parse(["W", "12", "x"]) is None
+        assert weight.parse(["W", "12"]) is None
+        assert sensors("sensors.cfg", "cardio").projection is None
+        assert sensors("sensors.cfg", "blank").projection is None
+    finally:
+        reset_config()
+
+    try:
+        weight = sensors(path.join("tests", "aggregate.cfg"), "weight")
+        assert weight.aggregated
+        assert weight.projection is None
+        assert weight.parse(["W", "12", "0.5"]) == [12, 0.5]
+    finally:
+        reset_config()
+
+def test_defaults(tmpdir):
+    """Tests that the script arguments fill in the port options that the config
+    leaves out, and that the config takes precedence.
+    """
+    from liveserial.config import ports
+    from liveserial.monitor import ComMonitorThread, create_queue
+    config = tmpdir.join("ports.cfg")
+    config.write("[port./dev/null]\noverflow=drop-oldest\n")
+    defaults = {"maxsize": 3, "overflow": "decimate", "latency": 0.05}
+    try:
+        params = ports(str(config), "/dev/null", defaults)
+        assert params["maxsize"] == 3 and params["overflow"] == "drop-oldest"
+        assert ports(str(config), "/dev/null")["maxsize"] == 0
+        com = ComMonitorThread.from_config(str(config), "/dev/null",
+                                           create_queue(), create_queue(),
+                                           defaults=defaults)
+        assert com.data_q.maxsize == 3
+        assert com.latency == 0.05
+    finally:
+        reset_config()
+
+    com = ComMonitorThread.from_port("/dev/null", overflow="decimate",
+                                     decimate_by=4, latency=0.1)
+    assert com.decimate_by == 4 and com.latency == 0.1
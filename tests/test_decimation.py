@@ -0,0 +1,89 @@
+"""Tests the reduction of fast sensors in the monitor, right after their records
+are parsed.
+"""
+import pytest
+from liveserial.decimation import Decimator
+
+def _push(decimator, records):
+    """Pushes the records and returns the reduced stream."""
+    result = []
+    for record in records:
+        result.extend(decimator.push(record))
+    return result
+
+def _records(n, rate=1000.):
+    """Returns `n` records of sensor `W` read at `rate` Hz; the first value is
+    the index of the record and the second one peaks on every 7th record.
+    """
+    return [("W", i/rate, i, 100. if i % 7 == 3 else float(i % 5))
+            for i in range(n)]
+
+def test_every():
+    """Tests keeping every N'th record, or one record per period.
+    """
+    reduced = _push(Decimator("every", 4), _records(10))
+    assert [r[2] for r in reduced] == [0, 4, 8]
+    reduced = _push(Decimator("every", period=0.0025), _records(10))
+    assert [r[2] for r in reduced] == [0, 3, 6, 9]
+    #Both limits have to be reached before the next record is kept.
+    reduced = _push(Decimator("every", 2, 0.0025), _records(10))
+    assert [r[2] for r in reduced] == [0, 3, 6, 9]
+    reduced = _push(Decimator("every", 4, 0.0025), _records(10))
+    assert [r[2] for r in reduced] == [0, 4, 8]
+
+def test_mean():
+    """Tests the boxcar average over windows of records.
+    """
+    d = Decimator("mean", 4)
+    reduced = _push(d, _records(10))
+    assert reduced == [("W", 0.003, 1.5, 25.75), ("W", 0.007, 5.5, 1.75)]
+    #The incomplete window is kept until it is complete.
+    assert len(d.window) == 2
+    d.reset()
+    assert d.window == []
+
+    #Columns that weren't parsed stay empty.
+    records = [("W", 0.25*i, i, None) for i in range(4)]
+    assert _push(Decimator("mean", 2), records) == [("W", 0.25, 0.5, None),
+                                                     ("W", 0.75, 2.5, None)]
+
+def test_minmax():
+    """Tests that the minimum and maximum records of each window are kept, in
+    the order that they were read.
+    """
+    reduced = _push(Decimator("minmax", 7, column=2), _records(14))
+    assert [r[2] for r in reduced] == [0, 3, 10, 11]
+    reduced = _push(Decimator("minmax", 3, column=1), _records(6))
+    assert [r[2] for r in reduced] == [0, 2, 3, 5]
+    with pytest.raises(ValueError):
+        Decimator("median")
+
+def test_monitor():
+    """Tests that the monitor publishes the reduced stream of the sensors that
+    are decimated and leaves the other sensors alone.
+    """
+    from liveserial.config import Sensor
+    from liveserial.monitor import ComMonitorThread, create_queue
+    com = ComMonitorThread(create_queue(), create_queue(), "/dev/null", 9600)
+    com.add_sensor("W", Sensor(com, "W", key="W", decimate="3",
+                               reducer="mean"))
+    com.add_sensor("K", Sensor(com, "K", key="K", max_rate="10"))
+    lines = b"".join(b"W 1 %d.0\nK 2 %d.5\n" % (i, i) for i in range(7))
+    records = (com._parse_chunk(lines, 500000000) +
+               com._parse_chunk(lines, 550000000))
+    W = [r for r in records if r[0] == "W"]
+    assert [r[2:] for r in W] == [(1., 1.), (1., 4.), (1., 7/3.), (1., 3.)]
+    #The averages are stamped with the time of the last record in the window.
+    assert [r[1] for r in W] == sorted(r[1] for r in W)
+    assert W[1][1] < 500000000 < W[2][1] < 550000000
+    #The kept records of the rate-limited sensor are at least 0.1s apart.
+    records += com._parse_chunk(lines, 700000000)
+    K = [r[1] for r in records if r[0] == "K"]
+    assert 1 < len(K) < 14
+    assert all(b - a >= 100000000 for a, b in zip(K, K[1:]))
+
+    #The ring carries the averages of `int` columns as floats.
+    assert com.sensors["W"].record_dtype == [float, float]
+    assert com.sensors["K"].record_dtype == [int, float]
+    with pytest.raises(ValueError):
+        Sensor(com, "S", key="S", decimate="2", reducer="median")
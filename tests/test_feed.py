@@ -0,0 +1,122 @@
+"""Tests the history that the live data feed keeps for each sensor.
+"""
+import pytest
+
+@pytest.fixture
+def feed():
+    """Returns a feed with a small history capacity."""
+    from liveserial.monitor import LiveDataFeed
+    return LiveDataFeed(capacity=8)
+
+def test_history(feed):
+    """Tests the last/since views and the version counter before and after the
+    history wraps around.
+    """
+    assert feed.last("W").shape == (0, 0)
+    for i in range(5):
+        feed.add_data("W", (i*0.5, i, i*2.))
+    assert feed.version["W"] == 5
+    assert feed.read_data("W") == (2., 4, 8.)
+    assert feed.last("W").tolist() == [[i*0.5, i, i*2.] for i in range(5)]
+    assert feed.last("W", 2)[:, 1].tolist() == [3., 4.]
+    assert feed.since("W", 1.)[:, 0].tolist() == [1.5, 2.]
+
+    for i in range(5, 21):
+        feed.add_data("W", (i*0.5, i, i*2.))
+    assert feed.version["W"] == 21
+    window = feed.last("W")
+    assert window.shape == (8, 3)
+    assert window[:, 1].tolist() == list(range(13, 21))
+    assert feed.since("W", 9.)[:, 1].tolist() == [19., 20.]
+    assert feed.since("W", 100.).shape == (0, 3)
+    #The views share memory with the history instead of copying it.
+    assert window.base is feed._history["W"]._buffer
+
+def test_sensors(feed):
+    """Tests that each sensor keeps its own history, and that the history of a
+    sensor whose points change shape is restarted.
+    """
+    import numpy as np
+    feed.add_data("W", (0.1, 1))
+    feed.add_data("K", np.array([0.1, 2., 3.]))
+    feed.add_data("W", (0.2, 2))
+    assert feed.version == {"W": 2, "K": 1}
+    assert feed.last("W").tolist() == [[0.1, 1.], [0.2, 2.]]
+    assert feed.last("K").tolist() == [[0.1, 2., 3.]]
+    feed.add_data("W", (0.3, 3, 4))
+    assert feed.last("W").tolist() == [[0.3, 3., 4.]]
+    assert feed.version["W"] == 3
+
+def test_readers(feed):
+    """Tests that readers keep their own cursors and that a write landing after
+    a snapshot is still reported as new.
+    """
+    first, second = feed.reader(), feed.reader()
+    feed.add_data("W", (0.1, 1))
+    feed.add_data("W", (0.2, 2))
+    assert feed.snapshot("W") == (2, (0.2, 2))
+    assert first.read_new("W").tolist() == [[0.1, 1.], [0.2, 2.]]
+    assert first.read_new("W").shape == (0, 2)
+    assert second.has_new_data("W")
+    assert second.read_data("W") == (0.2, 2)
+    assert not second.has_new_data("W")
+
+    feed.add_data("W", (0.3, 3))
+    assert feed.has_new_data == {"W": True}
+    assert feed.read_data("W") == (0.3, 3)
+    feed.add_data("W", (0.4, 4))
+    assert feed.has_new_data == {"W": True}
+    assert first.read_new("W")[:, 1].tolist() == [3., 4.]
+
+    #A reader that falls more than the capacity behind loses the oldest points.
+    for i in range(5, 30):
+        feed.add_data("W", (i/10., i))
+    assert second.read_new("W")[:, 1].tolist() == list(range(23, 30))
+
+def test_concurrent():
+    """Tests that snapshots and copied points stay consistent while another
+    thread keeps writing to the feed.
+    """
+    import threading
+    from liveserial.monitor import LiveDataFeed
+    feed = LiveDataFeed(capacity=16)
+    npoints = 20000
+    def write():
+        for i in range(1, npoints + 1):
+            feed.add_data("W", (float(i), 2.*i, 3.*i))
+    writer = threading.Thread(target=write)
+    reader = feed.reader()
+    feed.add_data("W", (0., 0., 0.))
+    writer.start()
+    #The first read may include the point at 0.
+    last = -1
+    while writer.is_alive() or reader.has_new_data("W"):
+        version, data = feed.snapshot("W")
+        assert data[1] == 2*data[0] and version == data[0] + 1
+        points = reader.read_new("W")
+        if len(points) > 0:
+            assert (points[:, 1] == 2*points[:, 0]).all()
+            assert (points[:, 2] == 3*points[:, 0]).all()
+            assert (points[1:, 0] - points[:-1, 0] == 1).all()
+            assert points[0, 0] > last
+            last = points[-1, 0]
+    writer.join()
+    assert last == npoints
+
+def test_wait():
+    """Tests that a reader blocked on the feed wakes up as soon as a point is
+    added, and that it times out otherwise.
+    """
+    import threading
+    from liveserial.monitor import LiveDataFeed
+    feed = LiveDataFeed()
+    reader = feed.reader()
+    assert not reader.wait("W", 0.05)
+    writer = threading.Timer(0.05, feed.add_data, ("W", (1., 2.)))
+    writer.start()
+    assert reader.wait("W", 5)
+    writer.join()
+    #Points that were already there don't block the reader.
+    assert reader.wait("W", 0)
+    reader.read_new("W")
+    assert not reader.wait("W", 0.01)
@@ -0,0 +1,165 @@
+"""Tests the inferrence of the data format when no sensors are configured,
+including the cache that carries inferred formats over to the next session.
+"""
+import pytest
+
+def _lines(n, key="W"):
+    """Returns `n` split lines for a keyed sensor with an int and float value.
+    """
+    return [[key, str(i), str(i/4.)] for i in range(n)]
+
+def test_infer():
+    """Tests that the first lines are used to infer the format.
+    """
+    from liveserial.monitor import FormatInferrer
+    inferrer = FormatInferrer(5)
+    results = [inferrer.parse(raw) for raw in _lines(8)]
+    assert results[:5] == [(None, None)]*5
+    assert results[5:] == [([i, i/4.], "W") for i in range(5, 8)]
+    assert inferrer.inferred == {"W": [int, float]}
+
+def test_cache(tmpdir):
+    """Tests that an inferred format is cached, reused straight away in the
+    next session and inferred again if it no longer matches the stream.
+    """
+    from liveserial.monitor import FormatInferrer, load_schema
+    cache = str(tmpdir.join("schemas.json"))
+    fingerprint = [9600, "UTF-8", r"\s"]
+    first = FormatInferrer(5, cache=cache, port="COM1", fingerprint=fingerprint)
+    for raw in _lines(5):
+        first.parse(raw)
+    assert load_schema(cache, "COM1", fingerprint) == ({"W": [int, float]},
+                                                       {"W": 0})
+    assert load_schema(cache, "COM1", [115200, "UTF-8", r"\s"]) is None
+    assert load_schema(cache, "COM2", fingerprint) is None
+
+    #The next session parses from the first line; a partial first line gets
+    #thrown away without giving up on the cached format.
+    second = FormatInferrer(5, cache=cache, port="COM1", fingerprint=fingerprint)
+    assert second.parse(["0.5"]) == (None, None)
+    assert second.parse(["W", "3", "0.5"]) == ([3, 0.5], "W")
+    assert second.parse(["W", "4", "1.5"]) == ([4, 1.5], "W")
+
+    #A stream that changed format is inferred again, and the new format is
+    #cached in place of the old one.
+    third = FormatInferrer(5, cache=cache, port="COM1", fingerprint=fingerprint)
+    changed = [["K", "0.5", "1.5", "2"]]*6
+    results = [third.parse(raw) for raw in changed]
+    assert results[:5] == [(None, None)]*5
+    assert results[5] == ([0.5, 1.5, 2], "K")
+    assert load_schema(cache, "COM1", fingerprint) == ({"K": [float, float, int]},
+                                                       {"K": 0})
+
+def test_threads(tmpdir):
+    """Tests that monitor threads writing the cache at the same time keep each
+    other's formats.
+    """
+    import threading
+    from liveserial.monitor import save_schema, load_schema
+    cache = str(tmpdir.join("schemas.json"))
+    def save(port):
+        for i in range(20):
+            save_schema(cache, port, [i], {"W": [int, float]}, {"W": 0})
+    threads = [threading.Thread(target=save, args=("COM{}".format(i),))
+               for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(load_schema(cache, "COM{}".format(i), [19]) is not None
+               for i in range(4))
+    assert tmpdir.listdir() == [tmpdir.join("schemas.json")]
+
+def test_adapt():
+    """Tests that sensors that first show up after the inferrence are adopted
+    once their format is consistent, and that a sensor whose format changes is
+    adapted to.
+    """
+    from liveserial.monitor import FormatInferrer
+    inferrer = FormatInferrer(5)
+    for raw in _lines(5):
+        inferrer.parse(raw)
+    assert inferrer.parse(["K", "1.5"]) == (None, None)
+    assert inferrer.parse(["W", "1", "0.5"]) == ([1, 0.5], "W")
+    assert inferrer.parse(["K", "2.5"]) == (None, None)
+    assert inferrer.parse(["K", "3.5"]) == ([3.5], "K")
+    assert inferrer.parse(["K", "4.5"]) == ([4.5], "K")
+    #Keyless lines and keys at other positions are picked up the same way.
+    results = [inferrer.parse(["1", "2"]) for i in range(3)]
+    assert results == [(None, None)]*2 + [([1, 2], None)]
+    results = [inferrer.parse(["0.5", "T"]) for i in range(3)]
+    assert results == [(None, None)]*2 + [([0.5], "T")]
+    assert inferrer.parse(["W", "2", "1.5"]) == ([2, 1.5], "W")
+    assert sorted(inferrer._dispatch) == [0, 1]
+
+    #A changed format is only adopted once it is consistent.
+    assert inferrer.parse(["W", "2.5", "1.5"]) == (None, "W")
+    assert inferrer.parse(["W", "2.5", "1.5"]) == (None, "W")
+    assert inferrer.parse(["W", "2.5", "1.5"]) == ([2.5, 1.5], "W")
+    assert inferrer.inferred["W"] == [float, float]
+    assert len(inferrer._pending) == 0
+
+def test_crowded():
+    """Tests that more new sensors than fit in the side buffer, interleaved in
+    the stream, are all adopted eventually.
+    """
+    from liveserial.monitor import FormatInferrer
+    inferrer = FormatInferrer(5)
+    for raw in _lines(5):
+        inferrer.parse(raw)
+    keys = ["S{}".format(i) for i in range(3*inferrer.max_pending)]
+    for i in range(len(keys)*inferrer.promote_limit*3):
+        inferrer.parse([keys[i % len(keys)], "1.5"])
+    assert set(inferrer.inferred) == set(keys + ["W"])
+    assert inferrer.parse(["S0", "2.5"]) == ([2.5], "S0")
+
+def test_pickle():
+    """Tests that an inferrer can be pickled after its parsers are compiled.
+    """
+    import pickle
+    from liveserial.monitor import FormatInferrer
+    inferrer = FormatInferrer(5, "UTF-8")
+    for raw in _lines(6):
+        inferrer.parse([v.encode("UTF-8") for v in raw])
+    clone = pickle.loads(pickle.dumps(inferrer))
+    assert clone.parse([b"W", b"3", b"0.5"]) == ([3, 0.5], "W")
+
+def test_garbage(monkeypatch):
+    """Tests that lines with keys that aren't valid text are dropped and counted
+    instead of stopping the monitor, both during and after the inferrence.
+    """
+    from liveserial import msg
+    from liveserial.monitor import ComMonitorThread, create_queue
+    monkeypatch.setattr(msg, "warn", lambda *args: None)
+    com = ComMonitorThread(create_queue(), create_queue(), "/dev/null", 9600)
+    good = b"W 12 0.5\n"
+    garbage = b"\xff\xfe 12 0.5\n"
+    records = com._parse_chunk(garbage + good*(com.inferrer.infer_limit + 2) +
+                               garbage, 0)
+    assert com._decoderr == 2
+    assert [r[0] for r in records] == ["W", "W"]
+
+def test_logged(tmpdir):
+    """Tests that the records of a sensor whose inferred format changes, first
+    from `int` to `float` values and then to more values, are all logged.
+    """
+    from liveserial.log import Logger
+    from liveserial.monitor import ComMonitorThread, create_queue, LiveDataFeed
+    com = ComMonitorThread(create_queue(), create_queue(), "/dev/null", 9600,
+                           infer_limit=3)
+    com._init_drops()
+    logger = Logger(0.1, [], LiveDataFeed(), logdir=str(tmpdir), plotting=True,
+                    monitors=[com])
+    chunks = [b"W 1 2\n"*5, b"W 1 2.75\n"*4, b"W 1 2.0 3.0\n"*4]
+    for i, chunk in enumerate(chunks):
+        logger.process([com._parse_chunk(chunk, 10*i)])
+    logger.stop()
+    assert com.inferrer.schema == {"W": 2}
+    assert com.schema == 2 and logger.schemas == {"/dev/null": 2}
+
+    #The first lines are used for the inferrence, and the first two lines of
+    #each new format are only sampled.
+    rows = tmpdir.join("W.csv").read().splitlines()
+    assert [r.split(',', 1)[1] for r in rows] == [
+        "Value 1,Value 2", "1,2", "1,2", "1,2.75", "1,2.75",
+        "Value 1,Value 2,Value 3", "1,2.0,3.0", "1,2.0,3.0"]
@@ -45,7 +45,7 @@ def test_com(isnt):
     """Tests that the com thread can read from the virtual serial port.
     """
     from liveserial.livemon import _get_com, _com_start
-    from time import sleep
+    from time import sleep, time
     if isnt:
         argv = ["py.test", "COM2", "-virtual"]
     else:
@@ -60,6 +60,60 @@ def test_com(isnt):
     assert not(coms[0].data_q.empty())
     coms[0].join(1)
 
+    #The records are stamped in integer nanoseconds since the port was opened,
+    #in the order that they arrived.
+    from liveserial.monitor import get_all_from_queue
+    stamps = [r[1] for b in get_all_from_queue(coms[0].data_q) for r in b]
+    assert all(isinstance(t, int) for t in stamps)
+    assert stamps == sorted(stamps) and 0 <= stamps[0] < stamps[-1] < 3e9
+    assert abs(coms[0].anchor - time()) < 5
+
+def test_latency(isnt):
+    """Tests that the reads of a port with a latency budget are tuned to its
+    arrival rate.
+    """
+    from liveserial.livemon import _get_com, _com_start
+    from liveserial.log import Logger
+    port = "COM2" if isnt else "/dev/tty.lscom-r"
+    args = get_sargs(["py.test", port, "-virtual", "-latency", "0.05"])
+    coms = _get_com(args)
+    assert coms[0].stats == {"rate": 0., "timeout": 0.25, "minbatch": 1}
+    _com_start(coms)
+    coms[0].join(1.5, terminate=False)
+    stats = Logger(0.025, [], None, monitors=coms).stats[port]
+    coms[0].join(1)
+
+    #The simulator writes a few kB per second, so reads wait for a batch of
+    #bytes with the budget as the timeout.
+    assert stats["rate"] > 100
+    assert stats["timeout"] == 0.05
+    assert stats["minbatch"] > 1
+    assert not coms[0].data_q.empty()
+
+def test_schemacache(tmpdir, isnt):
+    """Tests that the format inferred for a port is cached and then used
+    straight away by the monitor of the next session.
+    """
+    from liveserial.livemon import _get_com, _com_start
+    from liveserial.monitor import load_schema
+    cache = str(tmpdir.join("schemas.json"))
+    port = "COM2" if isnt else "/dev/tty.lscom-r"
+    argv = ["py.test", port, "-virtual", "-schemacache", cache]
+    inferred = []
+    for session in range(2):
+        coms = _get_com(get_sargs(argv))
+        _com_start(coms)
+        coms[0].join(1, terminate=False)
+        coms[0].join(1)
+        inferred.append(coms[0].inferrer.inferred)
+
+    fingerprint = [9600, "UTF-8", r"\s"]
+    assert load_schema(cache, port, fingerprint)[0] == inferred[0]
+    #The second monitor adopted the cached format instead of inferring it.
+    assert inferred[1] == inferred[0]
+    assert coms[0].inferrer._cached is None
+    assert coms[0].inferrer._verify_count < coms[0].inferrer.verify_limit
+
 def _raise_sigint(duration):
     """Raises the standard ^C signal interrupt to test proper termination of the
     threads.
@@ -92,6 +146,62 @@ def test_listen(isnt):
     assert "logger" in vardir
 
     assert all(vardir["feed"].has_new_data.values())
+    #The feed keeps the history of each sensor, not just the latest point.
+    for sensor, version in vardir["feed"].version.items():
+        window = vardir["feed"].last(sensor)
+        assert len(window) == min(version, vardir["feed"].capacity)
+        assert list(window[:, 0]) == sorted(window[:, 0])
+
+def test_overflow(isnt):
+    """Tests that a port with a small data queue drops records, and counts
+    them, when the logger reads the queue too slowly.
+    """
+    port = "COM2" if isnt else "/dev/tty.lscom-r"
+    argv = ["py.test", port, "-virtual", "-noplot", "-maxsize", "1",
+            "-overflow", "drop-newest", "-buffertime", "500"]
+    args = get_sargs(argv)
+    from liveserial.livemon import run
+    vardir = run(args, 2)
+    com = vardir["com"][0]
+    assert com.data_q.maxsize == 1
+    assert sum(vardir["logger"].dropped[port].values()) > 0
+    assert vardir["logger"].dropped[port] == dict(
+        (s, n) for s, n in com.dropped.items() if n > 0)
+
+def test_push(isnt):
+    """Tests that, in push mode, the monitors wake the logger up so that the
+    records reach the live feed well before the next heartbeat.
+    """
+    port = "COM2" if isnt else "/dev/tty.lscom-r"
+    argv = ["py.test", port, "-virtual", "-noplot", "-push",
+            "-buffertime", "500"]
+    args = get_sargs(argv)
+    from liveserial.livemon import run
+    vardir = run(args, 2)
+    ticks = vardir["logger"].ticks
+    assert ticks["triggered"] > 4
+    assert ticks["ticks"] > ticks["triggered"]
+    assert len(vardir["feed"].version) > 0
+
+def test_wallclock(tmpdir, isnt):
+    """Tests that the anchor of a monitor process reaches the logger, and that
+    the CSV files get wall-clock times from it.
+    """
+    from time import time
+    port = "COM2" if isnt else "/dev/tty.lscom-r"
+    argv = ["py.test", port, "-virtual", "-noplot", "-processes", "-wallclock",
+            "-logdir", str(tmpdir)]
+    args = get_sargs(argv)
+    from liveserial.livemon import run
+    start = time()
+    vardir = run(args, 2)
+    anchor = vardir["logger"].anchors[port]
+    assert start <= anchor < time()
+    for sfile in tmpdir.listdir():
+        with sfile.open() as f:
+            f.readline()
+            stamp = float(f.readline().split(',')[0])
+        assert anchor < stamp < time()
 
 def test_logging(tmpdir, isnt):
     """Tests the sensor logging in temporary directory.
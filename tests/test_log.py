@@ -0,0 +1,106 @@
+"""Tests the columnar buffers that the logger keeps the records of each sensor
+in until they are written.
+"""
+import pytest
+import numpy as np
+from liveserial.log import LogBuffer
+
+def test_dtype():
+    """Tests the structured dtype of the records of a configured sensor.
+    """
+    from liveserial.config import Sensor
+    sensor = Sensor(None, "W", key="W", port="none",
+                    dtype="key,int,float,str")
+    dtype = sensor.structured_dtype
+    assert dtype.names == ("time", "v0", "v1", "v2")
+    assert [dtype[n] for n in dtype.names[:3]] == [np.dtype("<i8"),
+                                                   np.dtype("<i8"),
+                                                   np.dtype("<f8")]
+    assert dtype["v2"] == np.dtype(object)
+    #Columns that aren't parsed have to hold NaN.
+    sensor.logging = sensor.value_index = [2]
+    assert sensor.structured_dtype["v0"] == np.dtype("<f8")
+
+def test_buffer():
+    """Tests that records added as tuples or structured arrays end up in the
+    same columns, and that the buffer grows and keeps its storage.
+    """
+    dtype = np.dtype([("time", "<i8"), ("v0", "<i8"), ("v1", "<f8")])
+    buffer = LogBuffer(dtype, 2, keyed=True)
+    buffer.extend([("W", 10, 1, 0.5), ("W", 20, 2, None)])
+    assert len(buffer) == 2
+    buffer.extend([("W", 30, 3, 1.5)])
+    assert len(buffer.data) == 4
+    columns = buffer.columns
+    assert columns["time"].tolist() == [10, 20, 30]
+    assert columns["v0"].tolist() == [1, 2, 3]
+    assert np.isnan(columns["v1"][1])
+
+    pending = LogBuffer(dtype)
+    pending.extend(columns)
+    pending.extend(columns[:1])
+    assert pending.columns["time"].tolist() == [10, 20, 30, 10]
+    data = pending.data
+    pending.clear()
+    assert len(pending) == 0 and pending.data is data
+
+def test_files(tmpdir):
+    """Tests that the CSV files stay open between the flushes, with no more
+    than `max_open_files` of them at once.
+    """
+    from liveserial.log import Logger
+    from liveserial.monitor import LiveDataFeed
+    logger = Logger(0.1, [], LiveDataFeed(), logdir=str(tmpdir), plotting=True)
+    logger.max_open_files = 1
+    for i in range(3):
+        logger.process([[("W", 10*i, i, 0.5), ("K", 10*i + 5, 2*i)]])
+        logger._csv_append()
+        assert len(logger._files) == 1
+    assert sorted(logger._plans) == ["K", "W"]
+    logger.stop()
+    assert len(logger._files) == 0
+
+    #The records are all there, after a single header.
+    assert tmpdir.join("W.csv").read().splitlines() == [
+        "Time,Value 1,Value 2", "0.0,0,0.5", "1e-08,1,0.5", "2e-08,2,0.5"]
+    assert tmpdir.join("K.csv").read().splitlines() == [
+        "Time,Value 1", "5e-09,0", "1.5e-08,2", "2.5e-08,4"]
+
+def test_missing(tmpdir, capsys):
+    """Tests that an aggregate sensor without data is neither logged nor
+    printed when the logger writes CSV files.
+    """
+    from liveserial.log import Logger
+    from liveserial.monitor import LiveDataFeed
+    logger = Logger(0.1, [], LiveDataFeed(), logdir=str(tmpdir), plotting=False)
+    logger.aggregate = {"total": lambda aggdata: None}
+    logger.process([[("W", 10, 1, 0.5)]])
+    logger.stop()
+    assert "total" not in capsys.readouterr().out
+    assert "total" not in logger.csvdata
+
+def test_format(tmpdir):
+    """Tests that the records of a sensor whose format changes (wider records,
+    or an `int` column that becomes `float`) are all logged, without being
+    truncated to the first format.
+    """
+    from liveserial.log import Logger
+    from liveserial.monitor import LiveDataFeed
+    feed = LiveDataFeed()
+    logger = Logger(0.1, [], feed, logdir=str(tmpdir), plotting=True)
+    logger.process([[("W", 10, 1, 2.0), ("K", 10, 1, 2)]])
+    #The new format shows up halfway through a tick.
+    logger.process([[("W", 20, 1, 2.0), ("W", 30, 1, 2.0, 3.0),
+                     ("K", 20, 1, 2), ("K", 30, 1, 2.75)]])
+    logger.process([[("W", 40, 4, 5.0, 6.0), ("K", 40, 3, 4.5)]])
+    logger.stop()
+    assert feed.read_data("W") == [4e-8, 4, 5.0, 6.0]
+    assert feed.read_data("K") == [4e-8, 3, 4.5]
+
+    #The file gets the header of the new columns when they change.
+    assert tmpdir.join("W.csv").read().splitlines() == [
+        "Time,Value 1,Value 2", "1e-08,1,2.0", "2e-08,1,2.0",
+        "Time,Value 1,Value 2,Value 3", "3e-08,1,2.0,3.0", "4e-08,4,5.0,6.0"]
+    assert tmpdir.join("K.csv").read().splitlines() == [
+        "Time,Value 1,Value 2", "1e-08,1,2", "2e-08,1,2.0", "3e-08,1,2.75",
+        "4e-08,3,4.5"]
@@ -107,3 +107,96 @@ def test_multi_logplot(isnt, tmpdir):
     assert all([len(q) > 0
                 for q in vardir["plotter"].ys.values()])    
     reset_config()
+
+def test_multi_processes(isnt, tmpdir):
+    """Tests logging from multiple ports when each port is monitored in its own
+    process.
+    """
+    from os import path
+    sub = tmpdir.mkdir("proclog")
+    if isnt:
+        argv = ["py.test", "COM2", "COM4", "-virtual", "-noplot", "-processes",
+                "-logdir", str(sub), "-config",
+                path.join("tests", "ntmultiple.cfg")]
+    else:
+        strport = "/dev/tty.{}"
+        argv = ["py.test", strport.format("lscom-r"),
+                strport.format("lscom-mr"), "-virtual", "-noplot",
+                "-processes", "-logdir", str(sub), "-config",
+                path.join("tests", "multiple.cfg")]
+    args = get_sargs(argv)
+
+    from liveserial.livemon import run
+    from liveserial.monitor import ComMonitorProcess
+    vardir = run(args, 3)
+    assert all(isinstance(c, ComMonitorProcess) for c in vardir["com"])
+    assert not any(c.is_alive() for c in vardir["com"])
+    assert all(vardir["feed"].has_new_data.values())
+    assert len(sub.listdir()) == len(vardir["logger"].csvdata)
+    assert all(f.stat().size > 60 for f in sub.listdir())
+    reset_config()
+
+def test_multi_multiplex(isnt, tmpdir):
+    """Tests logging from multiple ports that are all read by a single,
+    multiplexing thread.
+    """
+    if isnt: # pragma: no cover
+        pytest.skip("Serial ports can't be multiplexed on Windows.")
+    from os import path
+    sub = tmpdir.mkdir("muxlog")
+    strport = "/dev/tty.{}"
+    argv = ["py.test", strport.format("lscom-r"), strport.format("lscom-mr"),
+            "-virtual", "-noplot", "-multiplex", "-logdir", str(sub),
+            "-config", path.join("tests", "multiple.cfg")]
+    args = get_sargs(argv)
+
+    from liveserial.livemon import run
+    from liveserial.multiplex import Multiplexer
+    vardir = run(args, 3)
+    assert len(vardir["com"]) == 1
+    mux = vardir["com"][0]
+    assert isinstance(mux, Multiplexer)
+    assert len(mux.monitors) == 2
+    assert not mux.is_alive()
+    assert len(vardir["feed"].cur_data) == 4
+    assert all(vardir["feed"].has_new_data.values())
+    assert len(sub.listdir()) == len(vardir["logger"].csvdata)
+    reset_config()
+
+def test_multi_shm(isnt, tmpdir):
+    """Tests logging from monitor processes that publish their records through
+    shared-memory rings.
+    """
+    pytest.importorskip("multiprocessing.shared_memory")
+    from os import path
+    sub = tmpdir.mkdir("shmlog")
+    if isnt:
+        argv = ["py.test", "COM2", "COM4", "-virtual", "-noplot", "-processes",
+                "-shm", "-logdir", str(sub), "-config",
+                path.join("tests", "ntmultiple.cfg")]
+    else:
+        strport = "/dev/tty.{}"
+        argv = ["py.test", strport.format("lscom-r"),
+                strport.format("lscom-mr"), "-virtual", "-noplot",
+                "-processes", "-shm", "-logdir", str(sub), "-config",
+                path.join("tests", "multiple.cfg")]
+    args = get_sargs(argv)
+
+    from liveserial.livemon import run
+    from liveserial.ring import SharedRing
+    vardir = run(args, 3)
+    assert all(isinstance(c.data_q, SharedRing) for c in vardir["com"])
+    assert set(vardir["feed"].cur_data.keys()) == set(["weight", "cardio",
+                                                       "ppg", "seat"])
+    assert all(vardir["feed"].has_new_data.values())
+    for sfile in sub.listdir():
+        with sfile.open() as f:
+            f.readline()
+            value = f.readline()
+        if sfile.basename == "seat.csv":
+            #The int column must still be written as an int.
+            assert len(value.split(',')) == 2
+        elif sfile.basename == "cardio.csv":
+            time, vint, vfloat = value.strip().split(',')
+            assert '.' not in vint and '.' in vfloat
+    reset_config()
@@ -0,0 +1,112 @@
+"""Tests the overflow policies of monitors with bounded data queues and the
+counting of the records that they drop.
+"""
+import pytest
+from liveserial.monitor import ComMonitorThread, create_queue, get_all_from_queue
+
+def _monitor(overflow, maxsize=2):
+    """Returns an unstarted monitor with a bounded data queue and a configured
+    sensor `W`.
+    """
+    from liveserial.config import Sensor
+    com = ComMonitorThread(create_queue(maxsize=maxsize), create_queue(),
+                           "/dev/null", 9600, overflow=overflow, decimate_by=3)
+    com.add_sensor("W", Sensor(com, "W", key="W"))
+    com._init_drops()
+    return com
+
+def _batch(start, n=6, sensor="W"):
+    """Returns a batch of `n` records."""
+    return [(sensor, float(i), i) for i in range(start, start + n)]
+
+def _records(com):
+    """Returns all the records waiting on the data queue of the monitor."""
+    return [r for b in get_all_from_queue(com.data_q) for r in b]
+
+def test_drop_newest():
+    """Tests that batches read while the queue is full are dropped.
+    """
+    com = _monitor("drop-newest")
+    for start in (0, 6, 12):
+        com._put(_batch(start))
+    com._put(_batch(18, 2, "X"))
+    assert com.dropped == {"W": 6, None: 2}
+    assert [r[2] for r in _records(com)] == list(range(12))
+
+def test_drop_oldest():
+    """Tests that the oldest batch makes room for the latest one.
+    """
+    com = _monitor("drop-oldest")
+    for start in (0, 6, 12):
+        com._put(_batch(start))
+    assert com.dropped == {"W": 6}
+    assert [r[2] for r in _records(com)] == list(range(6, 18))
+
+def test_decimate():
+    """Tests that every third record is kept while the queue is full and
+    published once there is room again.
+    """
+    com = _monitor("decimate")
+    for start in (0, 6, 12, 18):
+        com._put(_batch(start))
+    assert com.dropped == {"W": 8}
+    assert [r[2] for r in _records(com)] == list(range(12))
+    com._put(_batch(24))
+    assert [r[2] for r in _records(com)] == [12, 15, 18, 21] + list(range(24, 30))
+
+    #The held records are thinned again when there are too many of them.
+    com.held_limit = 4
+    com._put(_batch(0))
+    com._put(_batch(6))
+    for start in (12, 18, 24):
+        com._put(_batch(start))
+    assert len(com._held) <= 4
+    assert com.dropped["W"] == 8 + 18 - len(com._held)
+
+def test_block():
+    """Tests that the monitor waits for room on the queue, and that it gives up
+    on the batch when it is told to stop.
+    """
+    import threading
+    com = _monitor("block", 1)
+    com._put(_batch(0))
+    t = threading.Thread(target=com._put, args=(_batch(6),))
+    t.start()
+    t.join(0.1)
+    assert t.is_alive()
+    assert [r[2] for r in _records(com)] == list(range(6))
+    t.join(1)
+    assert not t.is_alive()
+    assert com.dropped == {"W": 0}
+
+    assert [r[2] for r in _records(com)] == list(range(6, 12))
+    com._put(_batch(12))
+    com.alive.clear()
+    com._put(_batch(18))
+    assert com.dropped == {"W": 6}
+
+def test_logger(monkeypatch):
+    """Tests that the logger reports the dropped records of its monitors.
+    """
+    from liveserial import msg
+    from liveserial.log import Logger
+    from liveserial.monitor import LiveDataFeed
+    warnings = []
+    monkeypatch.setattr(msg, "warn", lambda text, *args: warnings.append(text))
+    com = _monitor("drop-newest", 1)
+    logger = Logger(0.025, [com.data_q], LiveDataFeed(), plotting=True,
+                    monitors=[com])
+    assert logger.dropped == {}
+    com._put(_batch(0))
+    com._put(_batch(6))
+    logger.process(list(get_all_from_queue(com.data_q)))
+    assert logger.dropped == {"/dev/null": {"W": 6}}
+    assert len(warnings) == 1 and "dropped 6 W records" in warnings[0]
+
+    #Further drops are only reported once `logfreq` has passed, or on stop.
+    com._put(_batch(12))
+    com._put(_batch(18))
+    logger.process(list(get_all_from_queue(com.data_q)))
+    assert len(warnings) == 1
+    logger.stop()
+    assert "dropped 12 W records" in warnings[-1]
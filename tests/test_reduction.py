@@ -0,0 +1,74 @@
+"""Tests the vectorized reduction of the records that the logger reads on each
+tick.
+"""
+import pytest
+from liveserial.reduction import methods, TickBuffer
+
+def _rows():
+    """Returns the records of a tick: a timestamp and two values; the second
+    value wasn't parsed in the second record.
+    """
+    return [(10, 1., 4.), (20, 3., None), (30, 2., 2.), (40, 6., 6.)]
+
+def test_methods():
+    """Tests each of the reduction methods.
+    """
+    from math import isnan, sqrt
+    buffer = TickBuffer()
+    reduce = lambda m: methods[m](_rows(), buffer)
+    assert reduce("first") == [(10, 1., 4.)]
+    assert reduce("last") == [(40, 6., 6.)]
+    assert reduce("min")[0][:2] == [40, 1.]
+    assert reduce("count") == [[40, 4, 3]]
+    assert reduce("average")[0][:2] == [40, 3.] == reduce("mean")[0][:2]
+    assert reduce("max")[0][:2] == [40, 6.]
+    assert reduce("median")[0][:2] == [40, 2.5]
+    assert reduce("rms")[0][:2] == [40, sqrt(50./4)]
+    low, high = reduce("envelope")
+    assert low[:2] == [40, 1.] and high[:2] == [40, 6.]
+    #Columns that weren't parsed reduce to NaN.
+    assert all(isnan(reduce(m)[0][2])
+               for m in ["average", "min", "max", "median", "rms"])
+
+def test_buffer():
+    """Tests that the buffer is reused across ticks and grows when needed.
+    """
+    buffer = TickBuffer(2)
+    values = buffer.load(_rows())
+    assert buffer.data.shape == (4, 3) and buffer.data.flags.f_contiguous
+    assert values[:, 0].tolist() == [1., 3., 2., 6.]
+    data = buffer.data
+    assert buffer.load(_rows()[:2]).shape == (2, 2)
+    assert buffer.data is data
+    assert buffer.load([(i, float(i)) for i in range(9)]).shape == (9, 1)
+    assert buffer.data.shape == (16, 2)
+    #After a change of format, only the records of the new one are reduced.
+    rows = [(10, 1.), (20, 2.), (30, 3., 4.), (40, 5., 6.)]
+    assert buffer.load(rows).tolist() == [[3., 4.], [5., 6.]]
+    assert methods["max"](rows, buffer) == [[40, 5., 6.]]
+
+def test_logger(tmpdir):
+    """Tests that a sensor's `method` option overrides the logger's.
+    """
+    from liveserial.config import reset_config, Sensor
+    from liveserial.log import Logger
+    from liveserial.monitor import LiveDataFeed
+    config = tmpdir.join("method.cfg")
+    config.write("[sensor.W]\nkey=W\nport=none\nmethod=envelope\n\n"
+                 "[sensor.K]\nkey=K\nport=none\n")
+    feed = LiveDataFeed()
+    logger = Logger(0.1, [], feed, method="max", plotting=True,
+                    config=str(config))
+    try:
+        logger.process([[("W",) + r for r in _rows()],
+                        [("K", 5, 2.), ("K", 15, 7.), ("V", 25, 1.)]])
+    finally:
+        reset_config()
+    assert feed.version == {"W": 2, "K": 1, "V": 1}
+    assert feed.read_data("W")[1] == 6.
+    assert feed.read_data("K") == [15/1e9, 7.]
+
+    with pytest.raises(ValueError):
+        Logger(0.1, [], feed, method="mode")
+    with pytest.raises(ValueError):
+        Sensor(None, "W", key="W", port="none", method="mode")
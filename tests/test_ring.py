@@ -0,0 +1,64 @@
+"""Tests the shared-memory ring buffers that carry records from the monitor
+processes to the logger.
+"""
+import pytest
+import pickle
+ring = pytest.importorskip("liveserial.ring")
+
+@pytest.fixture
+def shm(request):
+    """Returns a small ring with two sensors of different layouts.
+    """
+    result = ring.SharedRing([("W", [int, float]), ("S", [float])], 8)
+    request.addfinalizer(result.close)
+    return result
+
+def _drain(shm):
+    """Returns the drained records as `{sensor: rows}`."""
+    result = {}
+    for sensor, records in shm.drain():
+        result.setdefault(sensor, []).extend(records.tolist())
+    return result
+
+def test_records(shm):
+    """Tests that the records keep their types and are grouped by sensor.
+    """
+    assert shm.empty()
+    shm.put([("W", 500, 3, 1.25), ("S", 500, 2.5), ("W", 1000, -4, 0.)])
+    assert not shm.empty()
+    data = _drain(shm)
+    assert data == {"W": [(500, 3, 1.25), (1000, -4, 0.)], "S": [(500, 2.5)]}
+    assert isinstance(data["W"][0][1], int)
+    assert shm.empty()
+    assert _drain(shm) == {}
+
+    #Columns that weren't parsed are carried as 0 or NaN.
+    shm.put([("W", 500, None, 1.25), ("W", 1000, 3, None)])
+    rows = _drain(shm)["W"]
+    assert rows[0] == (500, 0, 1.25)
+    assert rows[1][:2] == (1000, 3) and rows[1][2] != rows[1][2]
+
+def test_wrap(shm):
+    """Tests records that wrap around the end of the ring and the dropping of
+    records when it is full.
+    """
+    for i in range(3):
+        shm.put([("S", i, i/2.) for i in range(5)])
+        assert _drain(shm) == {"S": [(i, i/2.) for i in range(5)]}
+
+    shm.put([("S", i, 0.) for i in range(10)])
+    assert shm.dropped == 2
+    assert len(_drain(shm)["S"]) == 8
+
+def test_attach(shm):
+    """Tests that a pickled ring attaches to the same shared memory, as it does
+    for a spawned monitor process.
+    """
+    producer = pickle.loads(pickle.dumps(shm))
+    try:
+        producer.put([("W", 2000, 7, 0.5)])
+        assert _drain(shm) == {"W": [(2000, 7, 0.5)]}
+    finally:
+        producer.close()
+    with pytest.raises(ValueError):
+        ring.SharedRing([("name", [str])])
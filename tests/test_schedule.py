@@ -0,0 +1,91 @@
+"""Tests the periodic calls of the scheduler that drives the logger and the
+plotter in test mode.
+"""
+import pytest
+from time import sleep
+from liveserial.schedule import Scheduler
+
+def test_ticks():
+    """Tests that the ticks keep to their deadlines and that the scheduler stops
+    straight away.
+    """
+    calls = []
+    timer = Scheduler(0.01, calls.append, (1,), policy="catch-up")
+    timer.start()
+    sleep(0.255)
+    timer.join(1)
+    assert not timer.is_alive()
+    #The ticks are on fixed deadlines, so they don't drift by the time that the
+    #calls take (or by the thread waking up late).
+    assert 20 <= len(calls) <= 26
+    stats = timer.stats
+    assert stats["ticks"] == len(calls)
+    assert stats["skipped"] == 0
+    assert 0 <= stats["mean"] <= stats["max"]
+
+def test_offset():
+    """Tests that the first deadline is `offset` seconds after the start.
+    """
+    from time import time
+    calls = []
+    timer = Scheduler(0.2, lambda: calls.append(time()), offset=0.05)
+    start = time()
+    timer.start()
+    sleep(0.3)
+    timer.join(1)
+    assert len(calls) == 2
+    assert 0.04 <= calls[0] - start < 0.15
+    assert 0.15 <= calls[1] - calls[0] < 0.25
+
+def _slow(calls):
+    """Takes 2.5 ticks of a 0.02 second scheduler on its first call."""
+    calls.append(len(calls))
+    if len(calls) == 1:
+        sleep(0.05)
+
+def test_skip():
+    """Tests that the ticks missed by a slow call are skipped.
+    """
+    calls = []
+    timer = Scheduler(0.02, _slow, (calls,))
+    timer.start()
+    sleep(0.09)
+    timer.join(1)
+    stats = timer.stats
+    assert stats["overruns"] >= 1
+    assert stats["skipped"] >= 2
+    assert stats["max"] >= 0.05
+
+def test_catchup():
+    """Tests that the ticks missed by a slow call are run back to back.
+    """
+    calls = []
+    timer = Scheduler(0.02, _slow, (calls,), policy="catch-up")
+    timer.start()
+    sleep(0.09)
+    timer.join(1)
+    stats = timer.stats
+    assert stats["overruns"] >= 1
+    assert stats["skipped"] == 0
+    assert stats["ticks"] >= 3
+    assert stats["maxlate"] >= 0.02
+
+def test_trigger():
+    """Tests that setting the trigger runs a tick straight away without moving
+    the deadlines of the heartbeat.
+    """
+    import threading
+    from time import time
+    calls = []
+    trigger = threading.Event()
+    timer = Scheduler(10, lambda: calls.append(time()), trigger=trigger)
+    timer.start()
+    for i in range(3):
+        start = time()
+        trigger.set()
+        sleep(0.05)
+        assert len(calls) == i + 1 and calls[-1] - start < 0.05
+    timer.join(1)
+    assert not timer.is_alive()
+    assert timer.stats["triggered"] == 3
+    assert timer.stats["ticks"] == 3